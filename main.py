@@ -24,11 +24,25 @@ def main(app_config: Config) -> None:
         garmin_api_client = dependencies.garmin_api_client
         garmin_api_client.login()
 
+        # Start delivering queued messages (including any left from a previous run)
+        if outbox_dispatcher := dependencies.outbox_dispatcher:
+            outbox_dispatcher.start()
+
         # Add job and start scheduler
         scheduler = dependencies.scheduler
         scheduler.add_garmin_fetch_summary_job(
             app_config.notify_time_of_day, job_name="garmin_weekly_summary_job"
         )
+        if weekly_summary_day := app_config.weekly_summary_day:
+            scheduler.add_weekly_summary_job(
+                weekly_summary_day.value,
+                app_config.notify_time_of_day,
+                job_name="garmin_end_of_week_summary_job",
+            )
+
+        # Allow triggering the fetch job right away (after the job is added)
+        if trigger_api := dependencies.trigger_api:
+            trigger_api.start()
         scheduler.run()
     except Exception as e:
         # Notify discord on exception error if handler configured
@@ -36,6 +50,11 @@ def main(app_config: Config) -> None:
             stack_trace = traceback.format_exc()
             error_handler(exception=e, stack_trace=stack_trace)  # type: ignore
         raise e  # Re-raise to exit program
+    finally:
+        # Stop background workers, e.g. render worker processes
+        if trigger_api := dependencies.trigger_api:
+            trigger_api.stop()
+        dependencies.plot_renderer.shutdown()
 
 
 if __name__ == "__main__":
@@ -3,9 +3,12 @@ from datetime import date
 from typing import Optional, Sequence
 
 import src.domain.metrics as metrics
+from src.application.missing_data_cache import MissingDataCache
 from src.domain.common import DatePeriod
 from src.infra.garmin.dtos import *
 from src.infra.garmin.garmin_api_adapter import GarminApiAdapter
+from src.infra.storage.missing_data_stats_store import MissingDataStatsStore
+from src.infra.time_provider import TimeProvider
 from src.setup.garmin_metrid_ids import GarminMetricId
 from src.setup.registry import *
 
@@ -24,6 +27,9 @@ class GarminService:
         response_to_dto_converter_registry: ResponseToDtoConverterRegistry,
         dto_to_model_converter_registry: DtoToModelConverterRegistry,
         metrics_to_include: Sequence[GarminMetricId],
+        time_provider: TimeProvider,
+        missing_data_cache: MissingDataCache,
+        missing_data_stats: MissingDataStatsStore,
     ):
         super().__init__()
         self._client = client
@@ -31,26 +37,86 @@ class GarminService:
         self._response_to_dto_converter_registry = response_to_dto_converter_registry
         self._dto_to_model_converter_registry = dto_to_model_converter_registry
         self._metrics_to_include = metrics_to_include
+        self._time_provider = time_provider
+        self._missing_data_cache = missing_data_cache
+        self._missing_data_stats = missing_data_stats
+        # Period of the current attempts and the data of each metric already containing its end date
+        # Kept across retries, such that a retry only requests the metrics not ready yet
+        self._ready_period: Optional[DatePeriod] = None
+        self._ready_dtos: dict[
+            GarminMetricId, GarminResponseDto[GarminResponseEntryDto]
+        ] = {}
 
     # Returns health summary
     # or None if today has not been registered yet for one of the metrics
-    def try_get_health_summary(self, end_date: date) -> Optional[metrics.HealthSummary]:
+    # If partial summaries are allowed, the summary is created from the metrics registered today (None if no metric is registered yet)
+    # If skipping recently missing data, metrics found missing within the missing data TTL are not requested again (e.g. repeated triggers)
+    def try_get_health_summary(
+        self,
+        end_date: date,
+        allow_partial: bool = False,
+        skip_recently_missing: bool = False,
+    ) -> Optional[metrics.HealthSummary]:
         # Request 4 weeks of data -> needed for the summary (if includes plots)
         period = DatePeriod.from_last_4_weeks(end_date)
         # period = DatePeriod.from_last_7_days(week_end)
 
         # Try to get summary for this period
-        return self._try_get_health_summary(period)
+        return self._try_get_health_summary(
+            period, self._metrics_to_include, allow_partial, skip_recently_missing
+        )
+
+    # Returns partial summary of the given metrics registered today, e.g. metrics missing in a previous partial summary
+    def try_get_metrics(
+        self,
+        end_date: date,
+        metric_ids: Sequence[GarminMetricId],
+        skip_recently_missing: bool = False,
+    ) -> Optional[metrics.HealthSummary]:
+        period = DatePeriod.from_last_4_weeks(end_date)
+        return self._try_get_health_summary(
+            period,
+            metric_ids,
+            allow_partial=True,
+            skip_recently_missing=skip_recently_missing,
+        )
 
     def _try_get_health_summary(
-        self, period: DatePeriod
+        self,
+        period: DatePeriod,
+        metric_ids: Sequence[GarminMetricId],
+        allow_partial: bool,
+        skip_recently_missing: bool,
     ) -> Optional[metrics.HealthSummary]:
         logger.info(f"Trying to create health summary for period: {period}")
 
-        dtos: Sequence[GarminResponseDto[GarminResponseEntryDto]] = []
+        # New day, forget the data of the previous attempts
+        if period != self._ready_period:
+            self._ready_period = period
+            self._ready_dtos = {}
 
         # TODO: Move to separate method, fetch_metrics(), fetch_metric()
-        for metric in self._metrics_to_include:
+        missing_metrics: list[GarminMetricId] = []
+        for metric in self._get_fetch_order(metric_ids):
+            if metric in self._ready_dtos:
+                logger.debug(f"Using {metric} data from previous attempt")
+                continue
+
+            # Avoid requesting data that was just found missing. Scheduled runs always request, as their retries are planned
+            now = self._time_provider.now()
+            if skip_recently_missing and (
+                time_left := self._missing_data_cache.get_time_left(
+                    metric, period.end, now
+                )
+            ):
+                logger.info(
+                    f"{metric} data was missing {period.end.isoformat()} when last requested. Not requesting again for {time_left}"
+                )
+                if allow_partial:
+                    missing_metrics.append(metric)
+                    continue
+                return None
+
             # Fetch this metric data
             response = self._fetcher_registry.fetch(metric, period)
 
@@ -60,6 +126,11 @@ class GarminService:
                 logger.info(
                     f"Empty response for {metric}. Summary will not be generated."
                 )
+                self._missing_data_cache.add(metric, period.end, now)
+                self._missing_data_stats.add(metric.value, is_missing=True)
+                if allow_partial:
+                    missing_metrics.append(metric)
+                    continue
                 return None
 
             dto = self._response_to_dto_converter_registry.convert(
@@ -73,9 +144,22 @@ class GarminService:
                 logger.info(
                     f"{metric} data did contain entry for the target end date: {period.end.isoformat()}. Summary will not be generated."
                 )
+                self._missing_data_cache.add(metric, period.end, now)
+                self._missing_data_stats.add(metric.value, is_missing=True)
+                if allow_partial:
+                    missing_metrics.append(metric)
+                    continue
                 return None
 
-            dtos.append(dto)
+            self._missing_data_stats.add(metric.value, is_missing=False)
+            self._ready_dtos[metric] = dto
+
+        # Metrics are presented in the configured order, regardless of fetch order
+        ready_metrics = [metric for metric in metric_ids if metric in self._ready_dtos]
+        if not ready_metrics:
+            logger.info("No metric data contains the target end date yet")
+            return None
+        dtos = [self._ready_dtos[metric] for metric in ready_metrics]
 
         # Iterate dtos and convert to models
         # TODO: Move to separate method, convert_to_models()
@@ -88,7 +172,32 @@ class GarminService:
         health_summary = metrics.HealthSummary(
             date=period.end,
             metrics=models,
+            missing_metrics=[
+                metric.value for metric in metric_ids if metric in missing_metrics
+            ],
         )
 
-        logger.info(f"Health summary for period created.")
+        # Data is no longer needed once the summary is created
+        self._ready_period = None
+        self._ready_dtos = {}
+
+        if missing_metrics:
+            logger.info(
+                f"Partial health summary for period created. Missing: {', '.join(health_summary.missing_metrics)}"
+            )
+        else:
+            logger.info(f"Health summary for period created.")
         return health_summary
+
+    # Metrics most likely to be missing the data of the day are requested first, such that an attempt is given up after as few requests as possible
+    # Metrics with equal probability are requested in the configured order
+    def _get_fetch_order(
+        self, metric_ids: Sequence[GarminMetricId]
+    ) -> list[GarminMetricId]:
+        return sorted(
+            metric_ids,
+            key=lambda metric: self._missing_data_stats.get_missing_probability(
+                metric.value
+            ),
+            reverse=True,
+        )
@@ -0,0 +1,35 @@
+import threading
+from datetime import date, datetime, timedelta
+
+from src.setup.garmin_metrid_ids import GarminMetricId
+
+
+# Remembers metrics that had no data for a day when last requested, such that requests within the time to live are skipped (e.g. repeated manual triggers)
+class MissingDataCache:
+    def __init__(self, ttl: timedelta):
+        super().__init__()
+        self._ttl = ttl
+        self._expires_at: dict[tuple[GarminMetricId, date], datetime] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: GarminMetricId, day: date, now: datetime) -> None:
+        if not self._ttl:
+            return
+        with self._lock:
+            # Forget expired entries, e.g. of previous days
+            self._expires_at = {
+                key: expires_at
+                for key, expires_at in self._expires_at.items()
+                if expires_at > now
+            }
+            self._expires_at[(metric, day)] = now + self._ttl
+
+    # Returns time until the metric may be requested again, or None if it may be requested now
+    def get_time_left(
+        self, metric: GarminMetricId, day: date, now: datetime
+    ) -> timedelta | None:
+        with self._lock:
+            expires_at = self._expires_at.get((metric, day))
+        if not expires_at or expires_at <= now:
+            return None
+        return expires_at - now
@@ -0,0 +1,99 @@
+import logging
+from datetime import date
+from typing import Any, Optional
+
+from src.domain.metrics import BaseMetric, HealthSummary, get_metric_key
+from src.domain.quantile_sketch import KllSketch
+from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
+from src.infra.storage.sketch_store import MetricSketches, QuantileSketchStore
+
+logger = logging.getLogger(__name__)
+
+MONTHS_IN_YEAR = 12
+MONTHS_TO_KEEP = 2 * MONTHS_IN_YEAR
+# Avoid presenting a rank based on too few days
+MIN_VALUES_FOR_RANK = 30
+
+
+# Keeps a quantile sketch of the daily values of each metric, such that the latest value can be ranked against the last year without loading the full history
+class PercentileService:
+    def __init__(self, store: QuantileSketchStore):
+        super().__init__()
+        self._store = store
+
+    # Adds daily values not seen before to the sketches and returns the percentile rank of the latest value of each metric within the last year, by metric key
+    # Metrics without enough data are left out
+    def update_percentile_ranks(self, summary: HealthSummary) -> dict[str, float]:
+        ranks: dict[str, float] = {}
+        for metric in summary.metrics:
+            metric_key = get_metric_key(metric)
+            sketches = self._add_new_values(metric, self._store.get(metric_key))
+            self._store.save(metric_key, sketches)
+
+            rank = self._get_rank(metric, sketches, summary.date)
+            if rank is not None:
+                ranks[metric_key] = rank
+        return ranks
+
+    def _add_new_values(
+        self, metric: BaseMetric[GarminResponseEntryDto, Any], sketches: MetricSketches
+    ) -> MetricSketches:
+        last_date = sketches.last_date
+        monthly = sketches.monthly
+        num_added = 0
+
+        for entry, value in zip(metric.entries, metric.numeric_values):
+            entry_date: date = entry.calendarDate
+            # Each day should only be counted once
+            if last_date and entry_date <= last_date:
+                continue
+            last_date = entry_date
+            if value is None:
+                continue
+
+            month = _to_month_key(entry_date)
+            monthly.setdefault(month, KllSketch()).update(value)
+            num_added += 1
+
+        logger.debug(f"Added {num_added} values to sketches of {type(metric).__name__}")
+
+        # Remove months no longer needed for any window
+        if last_date:
+            months_to_keep = _get_months_until(last_date, MONTHS_TO_KEEP)
+            monthly = {k: v for k, v in monthly.items() if k in months_to_keep}
+
+        return MetricSketches(last_date, monthly)
+
+    # Returns the percentile rank (0-100) of the latest value within the last year, or None if not enough data
+    def _get_rank(
+        self,
+        metric: BaseMetric[GarminResponseEntryDto, Any],
+        sketches: MetricSketches,
+        end_date: date,
+    ) -> Optional[float]:
+        latest = metric.numeric_values[-1]
+        if latest is None:
+            return None
+
+        months = _get_months_until(end_date, MONTHS_IN_YEAR)
+        year_sketch = KllSketch.merge_all(
+            [sketch for month, sketch in sketches.monthly.items() if month in months]
+        )
+        if year_sketch.n < MIN_VALUES_FOR_RANK:
+            return None
+
+        return year_sketch.rank(latest) * 100
+
+
+def _to_month_key(date: date) -> str:
+    return date.strftime("%Y-%m")
+
+
+# Returns the keys of the given number of months ending with the month of the given date
+def _get_months_until(end_date: date, num_months: int) -> set[str]:
+    months: set[str] = set()
+    year, month = end_date.year, end_date.month
+    for _ in range(num_months):
+        months.add(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
@@ -0,0 +1,71 @@
+import logging
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.consts import MINUTES_IN_HOUR
+from src.infra.storage.sync_time_store import SyncTimeStore
+
+logger = logging.getLogger(__name__)
+
+# Random delay used until enough sync times are registered
+MIN_WAIT_TIME_MINUTES = 30
+MAX_WAIT_TIME_MINUTES = 60
+MIN_SYNC_TIMES = 5
+MIN_RETRY_MINUTES = 5
+MAX_RETRY_MINUTES = 120
+# Share of the remaining days covered by each retry. Lower values poll more densely
+RETRY_QUANTILE = 0.2
+
+
+# Plans when to retry fetching the data of today, based on the times the data became available on previous days (i.e. when the watch usually syncs)
+# Retries are dense around the usual sync times and sparse outside them
+class RetryPlanner:
+    def __init__(self, store: SyncTimeStore):
+        super().__init__()
+        self._store = store
+        # Last time the data of today was fetched without being available
+        self._last_unavailable: Optional[datetime] = None
+
+    def register_unavailable(self, now: datetime) -> None:
+        self._last_unavailable = now
+
+    # The data became available between the last failed fetch and now, so the middle of that time is registered
+    # If the first fetch of the day succeeds, now is registered, i.e. the latest time the data may have become available
+    def register_available(self, now: datetime) -> None:
+        last_unavailable = self._last_unavailable
+        self._last_unavailable = None
+        minute = _to_minute_of_day(now)
+        if last_unavailable and last_unavailable.date() == now.date():
+            minute = (_to_minute_of_day(last_unavailable) + minute) // 2
+        self._store.add(now.date(), minute)
+
+    def get_retry_delay(self, now: datetime) -> timedelta:
+        sync_minutes = sorted(self._store.get_minutes())
+        if len(sync_minutes) < MIN_SYNC_TIMES:
+            return _get_random_delay()
+
+        current_minute = _to_minute_of_day(now)
+        # Days the data became available now or later. If none, data is later than usual, and the sync times tell nothing about when to retry
+        later_minutes = [minute for minute in sync_minutes if minute >= current_minute]
+        if not later_minutes:
+            logger.info("Data is later than on any registered day")
+            return _get_random_delay()
+
+        # Retry when the data would have been available on the given share of those days
+        idx = max(math.ceil(len(later_minutes) * RETRY_QUANTILE), 1) - 1
+        delay_minutes = later_minutes[idx] - current_minute
+        return timedelta(
+            minutes=min(max(delay_minutes, MIN_RETRY_MINUTES), MAX_RETRY_MINUTES)
+        )
+
+
+def _get_random_delay() -> timedelta:
+    return timedelta(
+        minutes=random.randrange(MIN_WAIT_TIME_MINUTES, MAX_WAIT_TIME_MINUTES)
+    )
+
+
+def _to_minute_of_day(time: datetime) -> int:
+    return time.hour * MINUTES_IN_HOUR + time.minute
@@ -1,45 +1,160 @@
+import hashlib
 import logging
-import random
-from datetime import date, datetime, time, timedelta
+import threading
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
 from typing import Callable, Optional
 
 from apscheduler.events import EVENT_JOB_ERROR  # type: ignore
 from apscheduler.events import JobExecutionEvent  # type: ignore
+from apscheduler.executors.pool import ThreadPoolExecutor  # type: ignore
 from apscheduler.job import Job  # type: ignore
 from apscheduler.schedulers.background import BlockingScheduler  # type: ignore
 from apscheduler.triggers.cron import CronTrigger  # type: ignore
 
 from src.application.garmin_service import GarminService
+from src.application.percentile_service import PercentileService
+from src.application.retry_planner import RetryPlanner
+from src.application.weekly_summary_service import WeeklySummaryService
 from src.domain.metrics import HealthSummary
+from src.domain.weekly_summary import WeeklySummary
+from src.infra.storage.delivery_ledger import (
+    DeliveryLedger,
+    DeliveryStatus,
+    SummaryType,
+)
+from src.infra.storage.sqlite_job_store import SqliteJobStore
 from src.infra.time_provider import TimeProvider  # type: ignore
+from src.setup.garmin_metrid_ids import GarminMetricId
 
 logger = logging.getLogger(__name__)
 
 
-MIN_WAIT_TIME_MINUTES = 30
-MAX_WAIT_TIME_MINUTES = 60
-
-
 class GarminSchedulerError(Exception):
     pass
 
 
+# Outcome of triggering the daily fetch job on demand
+class TriggerResult(Enum):
+    SCHEDULED = "scheduled"
+    ALREADY_RUNNING = "already_running"
+    ALREADY_SCHEDULED = "already_scheduled"  # Job is about to run anyway
+
+
+# Outcome of a run of the daily fetch job
+class _FetchResult(Enum):
+    NOT_AVAILABLE = "not_available"
+    PREPARED = "prepared"  # Held until notify time
+    PARTIALLY_DELIVERED = (
+        "partially_delivered"  # Missing metrics are sent when available
+    )
+    DELIVERED = "delivered"
+
+
+# Part of a daily summary recorded in the delivery ledger when a metric missing in the summary is sent
+def _late_metric_part(metric_id: str) -> str:
+    return f"late_{metric_id}"
+
+
+# Triggers within this time of the next run of the job are covered by that run
+TRIGGER_DEDUPLICATION_WINDOW = timedelta(seconds=5)
+# Small delay to allow scheduler to start
+STARTUP_DELAY = timedelta(seconds=2)
+# Metrics missing in a partial summary are polled at most this long after the partial summary deadline (and never after the day of the summary)
+LATE_METRICS_MAX_WAIT = timedelta(hours=6)
+
+# Scheduler running the jobs of this process
+# Stored jobs must refer to module level functions, so these forward to the scheduler
+_active_scheduler: Optional["GarminFetchDataScheduler"] = None
+
+
+def _run_garmin_fetch_summary_job(job_id: str, fetch_start_time: time) -> None:
+    _get_active_scheduler()._execute_job_wrapper(job_id, fetch_start_time)
+
+
+def _run_weekly_summary_job() -> None:
+    _get_active_scheduler()._execute_weekly_job_wrapper()
+
+
+def _get_active_scheduler() -> "GarminFetchDataScheduler":
+    if not _active_scheduler:
+        raise GarminSchedulerError("No scheduler is running the job")
+    return _active_scheduler
+
+
+# Offset of the start time of an account within the spread. Same for each run of the account, but differs between accounts
+# NB: Not using hash(), as it differs between processes
+def get_start_offset(account_id: str, spread: timedelta) -> timedelta:
+    digest = hashlib.sha256(account_id.encode()).digest()
+    share = int.from_bytes(digest[:8], "big") / 2**64
+    return timedelta(seconds=int(spread.total_seconds() * share))
+
+
 # Schedules data fetching from the garmin api
 class GarminFetchDataScheduler:
     def __init__(
         self,
         garmin_service: GarminService,
+        weekly_summary_service: WeeklySummaryService,
+        percentile_service: PercentileService,
+        delivery_ledger: DeliveryLedger,
+        retry_planner: RetryPlanner,
+        job_store: SqliteJobStore,
         time_provider: TimeProvider,
+        # Time before notify time the fetch job starts, such that accounts with the same notify time do not start at once. The summary is delivered at notify time
+        start_offset: timedelta,
+        # Time before notify time the fetch job starts. The summary is prepared ahead and delivered at notify time
+        prefetch_lead: timedelta,
+        # Time after notify time a summary is sent with the metrics available. If None, waits for all metrics
+        partial_summary_deadline: Optional[timedelta],
+        # Whether metrics missing in a partial summary are sent when available
+        send_late_metrics: bool,
+        max_concurrent_jobs: int,
         summary_ready_event: Callable[[HealthSummary], None],
+        # Raised when a summary is fetched before notify time, e.g. to render its plots ahead of delivery
+        summary_prepare_event: Callable[[HealthSummary], None],
+        late_metrics_ready_event: Callable[[HealthSummary], None],
+        weekly_summary_ready_event: Callable[[WeeklySummary], None],
         # NB: Exceptions in jobs are caught and logged by the scheduler
         # This callback is only used to notify the application of the exception if needed
         on_scheduler_exception: Optional[Callable[[Exception, str], None]],
     ):
         super().__init__()
         self._garmin_service = garmin_service
+        self._weekly_summary_service = weekly_summary_service
+        self._percentile_service = percentile_service
+        self._delivery_ledger = delivery_ledger
+        self._retry_planner = retry_planner
         self._time_provider = time_provider
+        self._start_offset = start_offset
+        self._prefetch_lead = prefetch_lead
+        self._partial_summary_deadline = partial_summary_deadline
+        self._send_late_metrics = send_late_metrics
         self._summary_ready_event = summary_ready_event
-        self._scheduler = BlockingScheduler(timezone="UTC")
+        self._summary_prepare_event = summary_prepare_event
+        self._late_metrics_ready_event = late_metrics_ready_event
+        self._weekly_summary_ready_event = weekly_summary_ready_event
+        # Date of a weekly summary waiting for the daily job to retain the data of that date
+        self._pending_weekly_summary_date: Optional[date] = None
+        self._fetch_job_id: Optional[str] = None
+        # Whether the daily fetch job is running. Used to deduplicate triggers
+        self._is_fetch_running = False
+        # Whether the next run of the fetch job delivers right away instead of holding a prefetched summary until notify time
+        self._is_delivery_requested = False
+        self._fetch_running_lock = threading.Lock()
+        # Daily and weekly jobs run on the same executor. They are serialized, such that the weekly summary never reads data (or the pending date) while the daily job updates it
+        self._summary_lock = threading.Lock()
+        # Time of day the daily summary is delivered (notify time)
+        self._delivery_time: Optional[time] = None
+        self._job_store = job_store
+        self._scheduler = BlockingScheduler(
+            timezone="UTC",
+            jobstores={"default": job_store},
+            executors={"default": ThreadPoolExecutor(max_concurrent_jobs)},
+            # Jobs waiting for a running job to complete are run late instead of being skipped
+            job_defaults={"misfire_grace_time": None},
+        )
         self.on_scheduler_exception = on_scheduler_exception
 
         # Add error listener
@@ -56,14 +171,43 @@ class GarminFetchDataScheduler:
             self._time_provider.now()
         )  # FIX: not using time zone speficied by user
 
-        if fetch_start_time <= current_time.time():
+        self._delivery_time = fetch_start_time
+        # The job starts ahead of notify time by the prefetch lead and the start offset. A summary fetched ahead is held until notify time
+        # Does not start the day before, as the job fetches the data of the current day
+        notify_time = datetime.combine(
+            current_time.date(), fetch_start_time, tzinfo=timezone.utc
+        )
+        lead = self._prefetch_lead + self._start_offset
+        since_midnight = notify_time - notify_time.replace(hour=0, minute=0, second=0)
+        if lead > since_midnight:
+            logger.warning(
+                f"Fetch job cannot start {lead} before notify time {notify_time.time()}, as it would start the day before. Starting at midnight instead"
+            )
+            lead = since_midnight
+        if lead:
+            fetch_start_time = (notify_time - lead).time()
+            logger.info(
+                f"Fetch job starts {lead} before notify time (prefetch lead {self._prefetch_lead}, start offset {self._start_offset}), starting at {fetch_start_time}"
+            )
+
+        stored_next_run_time = self._get_stored_next_run_time(
+            job_name, [job_name, fetch_start_time]
+        )
+        if stored_next_run_time:
+            # Continue where the previous run left off (e.g. a planned retry). A missed run is run once
+            next_run_time = max(stored_next_run_time, current_time + STARTUP_DELAY)
+            logger.info(
+                f"Continuing stored job '{job_name}', next run at {next_run_time}"
+            )
+        elif (
+            datetime.combine(current_time.date(), fetch_start_time, tzinfo=timezone.utc)
+            <= current_time
+        ):
             logger.info(
                 f"Current time {current_time.time()} has passed notify time {fetch_start_time}, running job immediately"
             )
             # Run immediately if we have passed the start time
-            next_run_time = current_time + timedelta(
-                seconds=2
-            )  # Small delay to allow scheduler to start
+            next_run_time = current_time + STARTUP_DELAY
         else:
             logger.info(
                 f"Current time {current_time.time()} has not passed notify time {fetch_start_time} yet, scheduling job as normal"
@@ -75,6 +219,31 @@ class GarminFetchDataScheduler:
             job_name=job_name,
             next_run_time=next_run_time,
         )
+        self._fetch_job_id = job_name
+
+    # Runs the daily fetch job right away (e.g. when the watch has synced), unless it is already running or about to run
+    # NB: Safe to call from other threads
+    def trigger_garmin_fetch_summary_job(self) -> TriggerResult:
+        if not self._fetch_job_id:
+            raise GarminSchedulerError("Trigger error: No fetch job added")
+
+        with self._fetch_running_lock:
+            if self._is_fetch_running:
+                logger.info("Fetch job triggered, but it is already running")
+                return TriggerResult.ALREADY_RUNNING
+
+            job: Job = self._scheduler.get_job(self._fetch_job_id)  # type: ignore
+            now = self._time_provider.now()
+            # NB: Jobs have no next run time until the scheduler is started (the trigger api starts first)
+            next_run_time = getattr(job, "next_run_time", None)
+            if next_run_time and next_run_time <= now + TRIGGER_DEDUPLICATION_WINDOW:
+                logger.info("Fetch job triggered, but it is about to run anyway")
+                return TriggerResult.ALREADY_SCHEDULED
+
+            logger.info("Fetch job triggered, running job now")
+            self._is_delivery_requested = True
+            job.modify(next_run_time=now)
+            return TriggerResult.SCHEDULED
 
     def _add_garmin_fetch_summary_job(
         self,
@@ -82,8 +251,9 @@ class GarminFetchDataScheduler:
         job_name: str,
         next_run_time: Optional[datetime],
     ):
+        # Replaces the stored job, such that changes to e.g. the notify time apply
         job = self._scheduler.add_job(
-            self._execute_job_wrapper,
+            _run_garmin_fetch_summary_job,
             "cron",
             hour=fetch_start_time.hour,
             minute=fetch_start_time.minute,
@@ -92,35 +262,279 @@ class GarminFetchDataScheduler:
             name=job_name,
             id=job_name,
             args=[job_name, fetch_start_time],
+            replace_existing=True,
         )
         if next_run_time:
             job.modify(next_run_time=next_run_time)
 
+    # Next run time of the stored job, if it was stored with the same args (i.e. same schedule)
+    def _get_stored_next_run_time(self, job_id: str, args: list) -> Optional[datetime]:
+        job_state = self._job_store.get_job_state(job_id)
+        if not job_state or list(job_state["args"]) != args:
+            return None
+        return job_state["next_run_time"]
+
+    # Add job executing each week at specified day and time
+    # The weekly summary is built from the data retained by the daily job, so no additional requests are made to Garmin
+    # NB: Start is not spread, as the summary waits for the daily job if its data is not fetched yet
+    def add_weekly_summary_job(
+        self,
+        day_of_week: str,  # E.g. 'mon', 'sun'
+        start_time: time,
+        job_name: str,
+    ):
+        self._scheduler.add_job(
+            _run_weekly_summary_job,
+            "cron",
+            day_of_week=day_of_week,
+            hour=start_time.hour,
+            minute=start_time.minute,
+            second=start_time.second,
+            timezone="UTC",
+            name=job_name,
+            id=job_name,
+            replace_existing=True,
+        )
+
     def _execute_job_wrapper(self, job_id: str, fetch_start_time: time) -> None:
-        current_date = self._time_provider.now().date()
-        is_success = self._execute_garmin_fetch_task(week_end=current_date)
+        with self._fetch_running_lock:
+            self._is_fetch_running = True
+            is_delivery_requested = self._is_delivery_requested
+            self._is_delivery_requested = False
+        try:
+            now = self._time_provider.now()
+            summary_date = now.date()
+            hold_until = None if is_delivery_requested else self._get_hold_until(now)
+            deadline = self._get_partial_summary_deadline(now)
+            with self._summary_lock:
+                result = self._execute_garmin_fetch_task(
+                    week_end=summary_date,
+                    hold_until=hold_until,
+                    allow_partial=deadline is not None and now >= deadline,
+                    is_triggered=is_delivery_requested,
+                )
+        finally:
+            with self._fetch_running_lock:
+                self._is_fetch_running = False
 
-        # Reschedule job if data was not found
-        if not is_success:
-            delay_until_retry = timedelta(
-                minutes=(random.randrange(MIN_WAIT_TIME_MINUTES, MAX_WAIT_TIME_MINUTES))
-            )
+        now = self._time_provider.now()
+        # Deliver the prepared summary at notify time
+        if result == _FetchResult.PREPARED and hold_until:
+            self._reschedule_job(fetch_start_time, job_id, hold_until - now)
+        # Reschedule job if data was not found. Retries before notify time (or the partial summary deadline) run at that time at the latest
+        elif result in (_FetchResult.NOT_AVAILABLE, _FetchResult.PARTIALLY_DELIVERED):
+            delay_until_retry = self._retry_planner.get_retry_delay(now)
+            for retry_before in (hold_until, deadline):
+                if retry_before and retry_before > now:
+                    delay_until_retry = min(delay_until_retry, retry_before - now)
+
+            # Stop polling late metrics, such that the job runs at its next scheduled time (i.e. the next day) instead of fetching the next day early
+            if result == _FetchResult.PARTIALLY_DELIVERED:
+                stop_at = self._get_late_metrics_stop_time(
+                    summary_date, deadline or now
+                )
+                if now + delay_until_retry >= stop_at:
+                    logger.info(
+                        f"Giving up on late metrics of {summary_date.isoformat()}, as the next retry would be after {stop_at}"
+                    )
+                    return
             self._reschedule_job(fetch_start_time, job_id, delay_until_retry)
 
-    # Return value determines if job was successful
-    def _execute_garmin_fetch_task(self, week_end: date) -> bool:
+    # Late metrics are polled until the end of the summary date, or until the max wait after the partial summary deadline has passed
+    def _get_late_metrics_stop_time(
+        self, summary_date: date, deadline: datetime
+    ) -> datetime:
+        end_of_day = datetime.combine(
+            summary_date + timedelta(days=1), time(), tzinfo=timezone.utc
+        )
+        return min(end_of_day, deadline + LATE_METRICS_MAX_WAIT)
+
+    # Notify time of today, if it has not passed yet (i.e. the job started ahead of it)
+    def _get_hold_until(self, now: datetime) -> Optional[datetime]:
+        if not self._delivery_time:
+            return None
+        delivery_time = datetime.combine(
+            now.date(), self._delivery_time, tzinfo=timezone.utc
+        )
+        return delivery_time if now < delivery_time else None
+
+    # Time of today after which a partial summary is sent, if enabled
+    def _get_partial_summary_deadline(self, now: datetime) -> Optional[datetime]:
+        if self._partial_summary_deadline is None or not self._delivery_time:
+            return None
+        delivery_time = datetime.combine(
+            now.date(), self._delivery_time, tzinfo=timezone.utc
+        )
+        return delivery_time + self._partial_summary_deadline
+
+    # If a hold time is provided, the summary is prepared and held until then instead of delivered
+    # If partial is allowed, the summary is created from the metrics available
+    # Triggered runs (e.g. by the trigger API) do not request data found missing by a recent run
+    def _execute_garmin_fetch_task(
+        self,
+        week_end: date,
+        hold_until: Optional[datetime] = None,
+        allow_partial: bool = False,
+        is_triggered: bool = False,
+    ) -> _FetchResult:
         logger.info("Started daily garmin fetch job")
 
-        health_summary = self._garmin_service.try_get_health_summary(end_date=week_end)
+        record = self._delivery_ledger.get(week_end, SummaryType.DAILY)
+        health_summary: Optional[HealthSummary] = record.summary if record else None
+        if record and record.status == DeliveryStatus.DELIVERED:
+            logger.info(
+                f"Health summary for {week_end.isoformat()} already delivered. Skipping"
+            )
+            # Keep the data for the weekly summary (e.g. after a restart)
+            if health_summary:
+                self._weekly_summary_service.retain(health_summary)
+                if self._send_late_metrics and health_summary.missing_metrics:
+                    return self._execute_late_metrics_task(
+                        health_summary, record.delivered_parts, is_triggered
+                    )
+            return _FetchResult.DELIVERED
+
+        # Hold a summary prepared by a previous run (e.g. before a restart) until notify time
+        if record and record.status == DeliveryStatus.PREPARED and health_summary:
+            if hold_until:
+                logger.info(
+                    f"Health summary for {week_end.isoformat()} already prepared, holding it until {hold_until}"
+                )
+                return _FetchResult.PREPARED
+            logger.info(
+                f"Delivering prepared health summary for {week_end.isoformat()}"
+            )
+            self._delivery_ledger.start(week_end, SummaryType.DAILY, health_summary)
+        # Resume a partially delivered summary without fetching it again
+        elif health_summary:
+            logger.info(
+                f"Resuming delivery of health summary for {week_end.isoformat()}"
+            )
+        else:
+            health_summary = self._garmin_service.try_get_health_summary(
+                end_date=week_end,
+                allow_partial=allow_partial,
+                skip_recently_missing=is_triggered,
+            )
+
+            # Handle summary not yet available
+            if not health_summary:
+                logger.info("Health summary not available yet")
+                self._retry_planner.register_unavailable(self._time_provider.now())
+                return _FetchResult.NOT_AVAILABLE
+            # Only a complete summary fetched when needed tells when the data of the day is usually available (i.e. not prefetched or partial)
+            if not hold_until and not health_summary.missing_metrics:
+                self._retry_planner.register_available(self._time_provider.now())
+
+            # Rank latest values against the last year
+            health_summary = replace(
+                health_summary,
+                percentile_ranks=self._percentile_service.update_percentile_ranks(
+                    health_summary
+                ),
+            )
 
-        # Handle summary not yet available
-        if not health_summary:
-            logger.info("Health summary not available yet")
-            return False
+            # The stored summary is delivered at notify time
+            if hold_until:
+                logger.info(f"Preparing health summary, holding it until {hold_until}")
+                self._delivery_ledger.prepare(
+                    week_end, SummaryType.DAILY, health_summary
+                )
+                self._summary_prepare_event(health_summary)
+                return _FetchResult.PREPARED
+            self._delivery_ledger.start(week_end, SummaryType.DAILY, health_summary)
 
         # Raise event when summary is available
         self._on_summary_ready(health_summary)
-        return True
+        self._delivery_ledger.complete(week_end, SummaryType.DAILY)
+
+        # Keep the data for the weekly summary and create it now if it has been waiting for this data
+        self._weekly_summary_service.retain(health_summary)
+        if self._pending_weekly_summary_date == week_end:
+            self._execute_weekly_summary_task()
+        if self._send_late_metrics and health_summary.missing_metrics:
+            return _FetchResult.PARTIALLY_DELIVERED
+        return _FetchResult.DELIVERED
+
+    # Sends the metrics missing in the delivered summary that have become available since
+    # NB: Late metrics are not retained for the weekly summary
+    def _execute_late_metrics_task(
+        self,
+        health_summary: HealthSummary,
+        delivered_parts: frozenset[str],
+        is_triggered: bool = False,
+    ) -> _FetchResult:
+        missing_metrics = [
+            metric
+            for metric in health_summary.missing_metrics
+            if _late_metric_part(metric) not in delivered_parts
+        ]
+        if not missing_metrics:
+            logger.info(f"All metrics of {health_summary.date.isoformat()} delivered")
+            return _FetchResult.DELIVERED
+
+        logger.info(f"Trying to get late metrics: {', '.join(missing_metrics)}")
+        late_summary = self._garmin_service.try_get_metrics(
+            health_summary.date,
+            [GarminMetricId(metric) for metric in missing_metrics],
+            skip_recently_missing=is_triggered,
+        )
+        if not late_summary:
+            logger.info("Late metrics not available yet")
+            return _FetchResult.PARTIALLY_DELIVERED
+
+        late_summary = replace(
+            late_summary,
+            percentile_ranks=self._percentile_service.update_percentile_ranks(
+                late_summary
+            ),
+        )
+        self._late_metrics_ready_event(late_summary)
+        self._delivery_ledger.add_delivered_parts(
+            health_summary.date,
+            SummaryType.DAILY,
+            [
+                _late_metric_part(metric)
+                for metric in missing_metrics
+                if metric not in late_summary.missing_metrics
+            ],
+        )
+        if late_summary.missing_metrics:
+            return _FetchResult.PARTIALLY_DELIVERED
+        return _FetchResult.DELIVERED
+
+    def _execute_weekly_job_wrapper(self) -> None:
+        with self._summary_lock:
+            self._execute_weekly_summary_task()
+
+    # NB: Called with the summary lock held
+    def _execute_weekly_summary_task(self) -> None:
+        logger.info("Started weekly summary job")
+        current_date = self._time_provider.now().date()
+
+        if self._delivery_ledger.is_delivered(current_date, SummaryType.WEEKLY):
+            logger.info(
+                f"Weekly summary for {current_date.isoformat()} already delivered. Skipping"
+            )
+            self._pending_weekly_summary_date = None
+            return
+
+        weekly_summary = self._weekly_summary_service.try_get_weekly_summary(
+            week_end=current_date
+        )
+
+        # Data for this week not fetched yet. Wait for the daily job instead of requesting Garmin
+        if not weekly_summary:
+            logger.info(
+                "Weekly summary not available yet. Will be created when the daily job succeeds"
+            )
+            self._pending_weekly_summary_date = current_date
+            return
+
+        self._pending_weekly_summary_date = None
+        self._delivery_ledger.start(current_date, SummaryType.WEEKLY, weekly_summary)
+        self._weekly_summary_ready_event(weekly_summary)
+        self._delivery_ledger.complete(current_date, SummaryType.WEEKLY)
 
     # Simply modify the next run time of the job. This will trigger the job at specified delay and then run as scheduled afterwards (unless rescheduled again etc..)
     def _reschedule_job(self, fetch_start_time: time, job_id: str, delay: timedelta):
@@ -145,7 +559,19 @@ class GarminFetchDataScheduler:
             # Raise exception event
             self.on_scheduler_exception(event.exception, event.traceback)  # type: ignore
 
+    # Removes stored jobs that were not added again, e.g. the weekly summary job if no longer configured or a job with a changed id
+    # NB: Must be called before the scheduler starts, as only the jobs added since are pending
+    def _remove_stale_jobs(self) -> None:
+        job_ids = {job.id for job in self._scheduler.get_jobs()}
+        for job_id in self._job_store.get_job_ids():
+            if job_id not in job_ids:
+                logger.info(f"Removing stored job '{job_id}', as it is no longer added")
+                self._job_store.remove_job(job_id)
+
     def run(self):
+        global _active_scheduler
+        _active_scheduler = self
+        self._remove_stale_jobs()
         logger.info("Starting scheduler with jobs:")
 
         self._scheduler.print_jobs()
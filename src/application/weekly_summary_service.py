@@ -0,0 +1,81 @@
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Optional
+
+from src.consts import DAYS_IN_WEEK
+from src.domain.common import DatePeriod
+from src.domain.metrics import HealthSummary
+from src.domain.weekly_summary import WeekAggregates, WeeklySummary, aggregate_week
+from src.infra.storage.delivery_ledger import (
+    DeliveryLedger,
+    DeliveryStatus,
+    SummaryType,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Builds end of week summaries from the data already fetched by the daily job
+# NB: Never requests Garmin. Each daily summary contains the last 4 weeks of data, so the most recent one covers both the current and the previous week
+# If no retained summary includes the end date (e.g. after a restart), the daily summary recorded in the delivery ledger is used once it is delivered
+class WeeklySummaryService:
+    def __init__(self, delivery_ledger: DeliveryLedger):
+        super().__init__()
+        self._delivery_ledger = delivery_ledger
+        self._retained_summary: Optional[HealthSummary] = None
+        # Aggregates already computed, by end date of the week. Allows reusing last week's aggregates as the previous week
+        self._week_aggregates: dict[date, WeekAggregates] = {}
+        self._lock = threading.Lock()
+
+    # Keep the most recent health summary created by the daily job
+    def retain(self, summary: HealthSummary) -> None:
+        with self._lock:
+            if self._retained_summary and self._retained_summary.date > summary.date:
+                return
+            self._retained_summary = summary
+
+    # Returns weekly summary for the week ending at the given date
+    # or None if no retained data includes the end date yet (i.e. daily job has not succeeded yet)
+    def try_get_weekly_summary(self, week_end: date) -> Optional[WeeklySummary]:
+        with self._lock:
+            if not self._retained_summary or self._retained_summary.date < week_end:
+                self._load_from_ledger(week_end)
+            if not self._retained_summary or self._retained_summary.date < week_end:
+                logger.info(
+                    f"No retained health summary includes {week_end.isoformat()} yet. Weekly summary will not be generated."
+                )
+                return None
+
+            current = self._get_week_aggregates(week_end)
+            if not current:
+                logger.info(f"No data registered for week ending {week_end}")
+                return None
+
+            previous = self._get_week_aggregates(week_end - timedelta(DAYS_IN_WEEK))
+
+            # Only the aggregates of this week are needed for next week's summary
+            self._week_aggregates = {week_end: current}
+
+            logger.info(f"Weekly summary for week ending {week_end} created.")
+            return WeeklySummary(current, previous)
+
+    def _load_from_ledger(self, week_end: date) -> None:
+        record = self._delivery_ledger.get(week_end, SummaryType.DAILY)
+        # A prepared (or pending) daily summary is still being delivered by the daily job, which retains it when done
+        if record and record.summary and record.status == DeliveryStatus.DELIVERED:
+            logger.info(
+                f"Using health summary for {week_end.isoformat()} recorded in the delivery ledger"
+            )
+            self._retained_summary = record.summary
+
+    def _get_week_aggregates(self, week_end: date) -> Optional[WeekAggregates]:
+        if aggregates := self._week_aggregates.get(week_end):
+            logger.debug(f"Reusing aggregates for week ending {week_end}")
+            return aggregates
+
+        summary = self._retained_summary
+        if not summary:
+            return None
+
+        return aggregate_week(DatePeriod.from_last_7_days(week_end), summary.metrics)
@@ -3,5 +3,8 @@ DAYS_IN_FOUR_WEEKS = 4 * DAYS_IN_WEEK
 DAYS_IN_YEAR = 365
 
 SECONDS_IN_MINUTE = 60
+MINUTES_IN_HOUR = 60
 SECONDS_IN_HOUR = 60 * SECONDS_IN_MINUTE
 SECONDS_IN_DAY = 24 * SECONDS_IN_HOUR
+
+BYTES_IN_MB = 1024 * 1024
@@ -1,12 +1,12 @@
 import datetime
 from abc import ABC, abstractmethod
 from copy import copy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
 from io import BytesIO
 
 # T = TypeVar("T")
-from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+from typing import Any, Callable, Generic, Mapping, Optional, Sequence, TypeVar
 
 from src.consts import DAYS_IN_WEEK
 from src.infra.garmin.dtos.garmin_bb_response import BbEntry, GarminBbResponse
@@ -61,6 +61,20 @@ class BaseMetric(ABC, Generic[L, R]):
         return self._selector(self.entries[-1])
         # return self.entries[-1]
 
+    # Selected value of each entry as a number, such that values can be aggregated regardless of metric type
+    # Durations are given in seconds. None if no value registered for the entry
+    @property
+    def numeric_values(self) -> Sequence[float | None]:
+        return [_to_number(self._selector(entry)) for entry in self._entries]
+
+
+def _to_number(value: Any) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
 
 class SimpleMetric(BaseMetric[L, float], ABC):
     def __init__(
@@ -93,43 +107,58 @@ class SimpleMetric(BaseMetric[L, float], ABC):
 
 
 # NB! There may be gaps in data if metric not registered for some reason (e.g. if not always wearing device during sleep)
+# NB! Selectors are module level functions (not lambdas), such that metrics can be pickled (e.g. stored for resuming a delivery)
+
+
+def _select_rhr(entry: RhrEntry):
+    return entry.values.restingHR
 
 
 class RhrMetrics(SimpleMetric[RhrEntry]):
     def __init__(self, rhr_data: GarminRhrResponse):
         entries = sorted(rhr_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(entries, lambda x: x.values.restingHR, is_higher_better=False)
+        super().__init__(entries, _select_rhr, is_higher_better=False)
+
+
+def _select_max_bb(entry: BbEntry):
+    return max(val for (time, val) in entry.bodyBatteryValuesArray)
 
 
 class BbMetrics(SimpleMetric[BbEntry]):
     def __init__(self, bb_data: GarminBbResponse):
         entries = sorted(bb_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(
-            entries, lambda x: max(val for (time, val) in x.bodyBatteryValuesArray)
-        )
+        super().__init__(entries, _select_max_bb)
+
+
+def _select_stress_level(entry: StressEntry):
+    return entry.values.overallStressLevel
 
 
 class StressMetrics(SimpleMetric[StressEntry]):
     def __init__(self, stress_data: GarminStressResponse):
         entries = sorted(stress_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(
-            entries, lambda x: x.values.overallStressLevel, is_higher_better=False
-        )
+        super().__init__(entries, _select_stress_level, is_higher_better=False)
+
+
+def _select_sleep_score(entry: SleepScoreEntry):
+    return entry.value
 
 
 class SleepScoreMetrics(SimpleMetric[SleepScoreEntry]):
     def __init__(self, sleep_data: GarminSleepScoreResponse):
         entries = sorted(sleep_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(entries, lambda x: x.value)
+        super().__init__(entries, _select_sleep_score)
+
+
+def _select_sleep_time(entry: SleepEntry) -> timedelta:
+    return timedelta(seconds=entry.values.totalSleepSeconds)
 
 
 class SleepMetrics(BaseMetric[SleepEntry, timedelta]):  # XXX: // SleepSummary
     def __init__(self, sleep_data: GarminSleepResponse):
         # Ensure sorted by date such that the most recent entry is last
         entries = sorted(sleep_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(
-            entries, lambda x: timedelta(seconds=x.values.totalSleepSeconds)
-        )
+        super().__init__(entries, _select_sleep_time)
 
     @property
     # Returns average sleep time for the sleep data period
@@ -165,13 +194,14 @@ class SleepMetrics(BaseMetric[SleepEntry, timedelta]):  # XXX: // SleepSummary
         return self.latest - timedelta(hours=hour)
 
 
+def _select_hrv(entry: HrvSummary) -> Optional[int]:
+    return entry.lastNightAvg if entry.lastNightAvg else None
+
+
 class HrvMetrics(BaseMetric[HrvSummary, Optional[int]]):
     def __init__(self, hrv_data: GarminHrvResponse) -> None:
         self._entries = sorted(hrv_data.entries, key=lambda x: x.calendarDate)
-        super().__init__(
-            self._entries,
-            lambda x: x.lastNightAvg if x.lastNightAvg else None,
-        )
+        super().__init__(self._entries, _select_hrv)
 
     @property
     # Get the most recent registered weekly hrv average
@@ -201,3 +231,17 @@ class HealthSummary:
     date: datetime.date
     # plots: Sequence[MetricPlot]
     metrics: Sequence[BaseMetric[GarminResponseEntryDto, Any]]
+    # Ids of the metrics without data for the date, if created without them (partial summary)
+    missing_metrics: Sequence[str] = ()
+    # Percentile rank (0-100) of the latest value of each metric compared to the last year, by metric key. Missing if not available
+    percentile_ranks: Mapping[str, float] = field(default_factory=dict)
+
+    def get_percentile_rank(
+        self, metric: BaseMetric[GarminResponseEntryDto, Any]
+    ) -> Optional[float]:
+        return self.percentile_ranks.get(get_metric_key(metric))
+
+
+# Identifies the type of a metric, e.g. in stored state
+def get_metric_key(metric: BaseMetric[GarminResponseEntryDto, Any]) -> str:
+    return type(metric).__name__
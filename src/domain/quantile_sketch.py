@@ -0,0 +1,113 @@
+import math
+import random
+from typing import Any, Sequence
+
+# KLL quantile sketch (Karnin, Lang, Liberty 2016)
+# Keeps a bounded number of values in a hierarchy of compactors, where a value at level h represents 2^h original values.
+# Sketches are mergeable, so sketches for separate windows (e.g. months) can be combined into a sketch for a larger window.
+
+# Max number of values kept at the top level. Larger k -> more accurate ranks
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2 / 3  # Capacity of each level compared to the level above
+
+
+class KllSketch:
+    def __init__(self, k: int = DEFAULT_K):
+        super().__init__()
+        self._k = k
+        self._compactors: list[list[float]] = [[]]
+        self._n = 0  # Number of values added to the sketch
+        self._random = random.Random()
+
+    @property
+    def n(self) -> int:
+        return self._n
+
+    def update(self, value: float) -> None:
+        self._compactors[0].append(value)
+        self._n += 1
+        self._compress()
+
+    # Merge other sketch into this sketch
+    def merge(self, other: "KllSketch") -> None:
+        while len(self._compactors) < len(other._compactors):
+            self._compactors.append([])
+        for level, compactor in enumerate(other._compactors):
+            self._compactors[level].extend(compactor)
+        self._n += other._n
+        self._compress()
+
+    # Returns the (approximate) fraction of added values that are less than or equal to the given value
+    def rank(self, value: float) -> float:
+        if self._n == 0:
+            raise ValueError("Cannot get rank of empty sketch")
+        weighted_count = sum(
+            2**level * sum(1 for item in compactor if item <= value)
+            for level, compactor in enumerate(self._compactors)
+        )
+        return min(weighted_count / self._n, 1.0)
+
+    # Returns the (approximate) value at the given fraction of the added values (0-1)
+    def quantile(self, fraction: float) -> float:
+        if self._n == 0:
+            raise ValueError("Cannot get quantile of empty sketch")
+        weighted_items = sorted(
+            (item, 2**level)
+            for level, compactor in enumerate(self._compactors)
+            for item in compactor
+        )
+        total_weight = sum(weight for _, weight in weighted_items)
+        cumulative_weight = 0
+        for item, weight in weighted_items:
+            cumulative_weight += weight
+            if cumulative_weight >= fraction * total_weight:
+                return item
+        return weighted_items[-1][0]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"k": self._k, "n": self._n, "compactors": self._compactors}
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> "KllSketch":
+        sketch = KllSketch(k=data["k"])
+        sketch._n = data["n"]
+        sketch._compactors = [list(compactor) for compactor in data["compactors"]]
+        return sketch
+
+    # Returns a new sketch combining all given sketches
+    @staticmethod
+    def merge_all(sketches: Sequence["KllSketch"], k: int = DEFAULT_K) -> "KllSketch":
+        merged = KllSketch(k)
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return max(math.ceil(self._k * _CAPACITY_DECAY**depth), 2)
+
+    def _size(self) -> int:
+        return sum(len(compactor) for compactor in self._compactors)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    # Compact the lowest full level until the sketch is within its size bound
+    def _compress(self) -> None:
+        while self._size() >= self._max_size():
+            for level, compactor in enumerate(self._compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1 >= len(self._compactors):
+                        self._compactors.append([])
+                    self._compactors[level + 1].extend(self._compact(compactor))
+                    break
+
+    # Sort the compactor and promote every other value (random offset) to the next level
+    # Leaves at most one value in the compactor if the number of values is odd
+    def _compact(self, compactor: list[float]) -> list[float]:
+        compactor.sort()
+        leftover = [compactor.pop()] if len(compactor) % 2 else []
+        offset = self._random.randint(0, 1)
+        promoted = compactor[offset::2]
+        compactor[:] = leftover
+        return promoted
@@ -0,0 +1,122 @@
+import datetime
+from dataclasses import dataclass
+from typing import Any, NamedTuple, Optional, Sequence
+
+from src.domain.common import DatePeriod
+from src.domain.metrics import BaseMetric, SleepMetrics, average_by
+from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
+
+
+class DayValue(NamedTuple):
+    date: datetime.date
+    value: float
+
+
+# Aggregated values of a single metric for a week
+class MetricWeekAggregate(NamedTuple):
+    metric_type: type[BaseMetric[GarminResponseEntryDto, Any]]
+    is_higher_better: bool
+    avg: float
+    best: DayValue
+    worst: DayValue
+    num_days: int  # Number of days in the week with a registered value
+
+
+# Share of total time in bed spent in each sleep stage (fractions summing to 1)
+class SleepStageDistribution(NamedTuple):
+    deep: float
+    light: float
+    rem: float
+    awake: float
+
+
+# Aggregates of all metrics for a single week
+@dataclass(frozen=True)
+class WeekAggregates:
+    period: DatePeriod
+    metrics: Sequence[MetricWeekAggregate]
+    stage_distribution: Optional[SleepStageDistribution]
+
+    def get(
+        self, metric_type: type[BaseMetric[GarminResponseEntryDto, Any]]
+    ) -> Optional[MetricWeekAggregate]:
+        for aggregate in self.metrics:
+            if aggregate.metric_type is metric_type:
+                return aggregate
+        return None
+
+
+# Represents data for an end of week summary
+@dataclass(frozen=True)
+class WeeklySummary:
+    current: WeekAggregates
+    previous: Optional[WeekAggregates]  # None if no data available for previous week
+
+
+# Aggregates the entries of each metric within the period
+# Returns None if none of the metrics have any values registered in the period
+def aggregate_week(
+    period: DatePeriod,
+    metrics: Sequence[BaseMetric[GarminResponseEntryDto, Any]],
+) -> Optional[WeekAggregates]:
+    aggregates: list[MetricWeekAggregate] = []
+    for metric in metrics:
+        aggregate = _aggregate_metric(period, metric)
+        if aggregate:
+            aggregates.append(aggregate)
+
+    if not aggregates:
+        return None
+
+    sleep = next((m for m in metrics if isinstance(m, SleepMetrics)), None)
+    stage_distribution = _get_stage_distribution(period, sleep) if sleep else None
+
+    return WeekAggregates(period, aggregates, stage_distribution)
+
+
+def _aggregate_metric(
+    period: DatePeriod, metric: BaseMetric[GarminResponseEntryDto, Any]
+) -> Optional[MetricWeekAggregate]:
+    day_values = [
+        DayValue(entry.calendarDate, value)
+        for entry, value in zip(metric.entries, metric.numeric_values)
+        if value is not None and period.start <= entry.calendarDate <= period.end
+    ]
+
+    # Metric not registered in this period
+    if not day_values:
+        return None
+
+    highest = max(day_values, key=lambda x: x.value)
+    lowest = min(day_values, key=lambda x: x.value)
+
+    return MetricWeekAggregate(
+        metric_type=type(metric),
+        is_higher_better=metric.is_higher_better,
+        avg=average_by(day_values, lambda x: x.value),
+        best=highest if metric.is_higher_better else lowest,
+        worst=lowest if metric.is_higher_better else highest,
+        num_days=len(day_values),
+    )
+
+
+def _get_stage_distribution(
+    period: DatePeriod, sleep: SleepMetrics
+) -> Optional[SleepStageDistribution]:
+    entries = [
+        entry
+        for entry in sleep.entries
+        if period.start <= entry.calendarDate <= period.end
+    ]
+    deep = sum(entry.values.deepSleepSeconds for entry in entries)
+    light = sum(entry.values.lightSleepSeconds for entry in entries)
+    rem = sum(entry.values.REMSleepSeconds for entry in entries)
+    awake = sum(entry.values.awakeSleepSeconds for entry in entries)
+
+    total = deep + light + rem + awake
+    if total == 0:
+        return None
+
+    return SleepStageDistribution(
+        deep=deep / total, light=light / total, rem=rem / total, awake=awake / total
+    )
@@ -1,24 +1,44 @@
 import logging
+from concurrent.futures import as_completed
 from io import BytesIO
-from typing import Callable, Sequence
+from typing import Any, Callable, Optional, Sequence
 
 from discord_webhook import DiscordEmbed
 
-from src.domain.metrics import HealthSummary
+import src.presentation.view_models as view_models
+from src.domain.metrics import BaseMetric, HealthSummary
+from src.domain.weekly_summary import WeeklySummary
 from src.infra.discord.discord_api_client import DiscordApiClient
+from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
+from src.infra.plotting.image_encoding import ImageBudget
+from src.infra.storage.delivery_ledger import DeliveryKey, DeliveryLedger, SummaryType
 from src.presentation.discord_messages import (
     DiscordErrorMessage,
     DiscordExceptionMessage,
+    DiscordPlotMessage,
+    DiscordWeeklySummaryMessage,
 )
 from src.presentation.view_models import (
     HealthSummaryViewModel,
     MetricPlot,
     MetricViewModel,
+    PendingPlot,
+    WeeklyMetricViewModel,
+    WeeklySummaryViewModel,
+)
+from src.setup.delivery_modes import DeliveryMode
+from src.setup.garmin_metrid_ids import GarminMetricId
+from src.setup.registry import (
+    ModelToVmConverterRegistry,
+    PlottingStrategy,
+    WeeklyAggregateToVmConverterRegistry,
 )
-from src.setup.registry import ModelToVmConverterRegistry, PlottingStrategy
 
 logger = logging.getLogger(__name__)
 
+# Part of a health summary recorded in the delivery ledger (besides plot ids)
+_EMBED_PART = "embed"
+
 # Adapts application requests to discord requests (DTOs)
 
 
@@ -29,48 +49,210 @@ class DiscordHealthSummaryAdapter:
         discord_client: DiscordApiClient,
         message_strategy: Callable[[HealthSummaryViewModel], DiscordEmbed],
         model_to_vm_converter: ModelToVmConverterRegistry,
+        weekly_to_vm_converter: WeeklyAggregateToVmConverterRegistry,
         plotting_strategies: Sequence[PlottingStrategy],
+        image_budget: ImageBudget,
+        delivery_ledger: DeliveryLedger,
+        delivery_mode: DeliveryMode = DeliveryMode.SEPARATE,
     ):
         super().__init__()
         self._client = discord_client
         self.message_strategy = message_strategy
         self._model_to_vm_converter = model_to_vm_converter
+        self._weekly_to_vm_converter = weekly_to_vm_converter
         self._plotting_strategies = plotting_strategies
+        self._image_budget = image_budget
+        self._delivery_ledger = delivery_ledger
+        self._delivery_mode = delivery_mode
 
     # Send health summary to discord webhook
+    # Plots start rendering before the embed is built. In separate mode, delivery is pipelined: The embed is sent first, and each plot is sent as soon as it is rendered.
+    # In combined mode, the embed and all plots are sent in a single request once every plot is rendered (i.e. one webhook request per summary)
+    # Parts already delivered for the summary (e.g. before a restart) are recorded in the ledger and not sent again. Neither are parts still queued in the outbox
     def send_health_summary(self, summary: HealthSummary) -> None:
+        record = self._delivery_ledger.get(summary.date, SummaryType.DAILY)
+        delivered_parts = (
+            record.delivered_parts if record else frozenset()
+        ) | self._get_queued_parts(summary)
+
+        # Start rendering plots for all strategies XXX: If config?
+        # NB: Plots already delivered are cached, so they are not rendered again
+        pending_plots: Sequence[PendingPlot] = []
+        for strategy in self._plotting_strategies:
+            pending_plot = strategy(summary.metrics)
+            if pending_plot and pending_plot.id not in delivered_parts:
+                pending_plots.append(pending_plot)
+
         # Turn into view models
         vms: Sequence[MetricViewModel] = []
         for metric in summary.metrics:
-            vm = self._model_to_vm_converter.convert(metric)
-            vms.append(vm)
+            vms.append(self._to_vm(summary, metric))
 
         summary_vm = HealthSummaryViewModel(
             summary.date,
             vms,
+            self._get_missing_metric_names(summary),
         )
 
         # Create discord message based on injected strategy
         discord_message = self.message_strategy(summary_vm)
-        logger.info(f"Sending health summary embed to discord")
-        self._client.send_message_embed(discord_message)
+        if self._delivery_mode == DeliveryMode.COMBINED:
+            self._send_combined(
+                summary,
+                discord_message if _EMBED_PART not in delivered_parts else None,
+                pending_plots,
+            )
+            return
 
-        # Create plots for all strategies XXX: If config?
-        plots: Sequence[MetricPlot] = []
-        for strategy in self._plotting_strategies:
-            plot = strategy(summary.metrics)
-            if plot:
-                plots.append(plot)
+        if _EMBED_PART not in delivered_parts:
+            logger.info(f"Sending health summary embed to discord")
+            self._client.send_message_embed(
+                discord_message, self._get_delivery_key(summary, [_EMBED_PART])
+            )
+            self._add_delivered_parts(summary, [_EMBED_PART])
+        else:
+            logger.info(f"Health summary embed already delivered")
+
+        # Send plots in the order they finish rendering
+        plots_by_future = {
+            pending_plot.data: pending_plot for pending_plot in pending_plots
+        }
+        for future in as_completed(plots_by_future):
+            plot = plots_by_future[future].result()
+            logger.info(f"Sending plot '{plot.id}' to discord")
+            self.send_plots([plot], self._get_delivery_key(summary, [plot.id]))
+            self._add_delivered_parts(summary, [plot.id])
+
+    # Renders the plots of the summary ahead of delivery (e.g. before notify time), such that they are taken from the plot cache when the summary is sent
+    def prepare_health_summary(self, summary: HealthSummary) -> None:
+        pending_plots = [
+            pending_plot
+            for strategy in self._plotting_strategies
+            if (pending_plot := strategy(summary.metrics))
+        ]
+        for pending_plot in pending_plots:
+            pending_plot.result()
+        logger.info(f"Rendered {len(pending_plots)} plots ahead of delivery")
+
+    # Plots are shown in the order of the plotting strategies, each in its own embed referencing the attached image
+    def _send_combined(
+        self,
+        summary: HealthSummary,
+        discord_message: Optional[DiscordEmbed],
+        pending_plots: Sequence[PendingPlot],
+    ) -> None:
+        plots = [pending_plot.result() for pending_plot in pending_plots]
+        if not discord_message and not plots:
+            logger.info(f"Health summary already delivered")
+            return
+
+        images = self._image_budget.fit([plot.data for plot in plots])
+        file_names = [plot.file_name for plot in plots]
+        embeds = ([discord_message] if discord_message else []) + [
+            DiscordPlotMessage(file_name) for file_name in file_names
+        ]
+        logger.info(
+            f"Sending health summary embed with {len(plots)} plots to discord in a single message"
+        )
+        parts = ([_EMBED_PART] if discord_message else []) + [plot.id for plot in plots]
+        self._client.send_message_embeds(
+            embeds, images, file_names, self._get_delivery_key(summary, parts)
+        )
+        self._add_delivered_parts(summary, parts)
+
+    # Send metrics missing in the health summary already sent, as an update to it
+    def send_late_metrics(self, summary: HealthSummary) -> None:
+        vms = [self._to_vm(summary, metric) for metric in summary.metrics]
+        summary_vm = HealthSummaryViewModel(
+            summary.date,
+            vms,
+            self._get_missing_metric_names(summary),
+            is_update=True,
+        )
+        logger.info(f"Sending {len(vms)} late metrics to discord")
+        self._client.send_message_embed(self.message_strategy(summary_vm))
+
+    def _to_vm(
+        self, summary: HealthSummary, metric: BaseMetric[GarminResponseEntryDto, Any]
+    ) -> MetricViewModel:
+        vm = self._model_to_vm_converter.convert(metric)
+        return vm._replace(
+            percentile_rank=view_models.format_percentile_rank(
+                summary.get_percentile_rank(metric)
+            )
+        )
+
+    def _get_missing_metric_names(self, summary: HealthSummary) -> list[str]:
+        return [
+            self._model_to_vm_converter.get_name(GarminMetricId(metric))
+            for metric in summary.missing_metrics
+        ]
+
+    # With the outbox, parts are recorded by the outbox dispatcher once actually delivered
+    def _add_delivered_parts(
+        self, summary: HealthSummary, parts: Sequence[str]
+    ) -> None:
+        if not self._client.uses_outbox:
+            self._delivery_ledger.add_delivered_parts(
+                summary.date, SummaryType.DAILY, parts
+            )
+
+    def _get_delivery_key(self, summary: HealthSummary, parts: Sequence[str]) -> str:
+        return DeliveryKey(summary.date, SummaryType.DAILY, tuple(parts)).serialize()
+
+    def _get_queued_parts(self, summary: HealthSummary) -> frozenset[str]:
+        keys = [
+            DeliveryKey.parse(delivery_key)
+            for delivery_key in self._client.get_queued_delivery_keys()
+        ]
+        return frozenset(
+            part
+            for key in keys
+            if key.summary_date == summary.date
+            and key.summary_type == SummaryType.DAILY
+            for part in key.parts
+        )
+
+    # Send end of week summary to discord webhook
+    def send_weekly_summary(self, summary: WeeklySummary) -> None:
+        current = summary.current
+        previous = summary.previous
+
+        vms: Sequence[WeeklyMetricViewModel] = []
+        for aggregate in current.metrics:
+            previous_aggregate = (
+                previous.get(aggregate.metric_type) if previous else None
+            )
+            vms.append(
+                self._weekly_to_vm_converter.convert(aggregate, previous_aggregate)
+            )
+
+        stage_distribution = (
+            view_models.stage_distribution_message(
+                current.stage_distribution,
+                previous.stage_distribution if previous else None,
+            )
+            if current.stage_distribution
+            else None
+        )
+
+        summary_vm = WeeklySummaryViewModel(
+            current.period.start, current.period.end, vms, stage_distribution
+        )
 
-        logger.info(f"Sending plots to discord")
-        self.send_plots(plots)
+        logger.info(f"Sending weekly summary embed to discord")
+        self._client.send_message_embed(DiscordWeeklySummaryMessage(summary_vm))
 
     # def send_image(self, image: BytesIO, name: str) -> None:
     #     self._client.send_image(image, name)
 
-    def send_plots(self, plots: Sequence[MetricPlot]) -> None:
+    # All plots are sent in a single message, so their total size must fit the message budget
+    def send_plots(
+        self, plots: Sequence[MetricPlot], delivery_key: Optional[str] = None
+    ) -> None:
+        images = self._image_budget.fit([plot.data for plot in plots])
         self._client.send_images(
-            [plot.data for plot in plots], [f"{plot.id}.png" for plot in plots]
+            images, [plot.file_name for plot in plots], delivery_key
         )
 
 
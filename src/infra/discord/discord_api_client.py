@@ -1,68 +1,176 @@
 import logging
-from io import BytesIO
-from typing import Sequence
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
 
 from discord_webhook import DiscordEmbed, DiscordWebhook
 
+from src.infra.discord.discord_webhook_request import (
+    get_retry_after,
+    post_webhook_message,
+)
+from src.infra.storage.discord_outbox import DiscordOutbox
 from src.infra.time_provider import TimeProvider
 
 logger = logging.getLogger(__name__)
 
+AVATAR_URL = "https://is2-ssl.mzstatic.com/image/thumb/Purple116/v4/66/ee/6a/66ee6ac7-8c44-0f33-757e-1024b3a7489c/AppIcon-0-1x_U007emarketing-0-6-0-sRGB-85-220.png/256x256bb.jpg"
+# Max number of embeds Discord accepts in a single message
+MAX_EMBEDS_PER_MESSAGE = 10
+# Delay before retrying a rate limited request, if Discord does not tell
+RATE_LIMIT_RETRY_SECONDS = 5
+
 
 class DiscordException(Exception):
     pass
 
 
 # Facade/Wraps the discord webhook client
+# Each message is sent to all webhooks (destinations). Embeds and attachments are shared, i.e. images are not copied for each destination
+# NB: The webhook clients of the discord library keep the state of a message, so new clients are created for each message. Safe to use from multiple threads
 class DiscordApiClient:
     def __init__(
         self,
-        webhook_url: str,
+        webhook_urls: Sequence[str],
         time_provider: TimeProvider,
         service_name: str,  # Username of discord message will be the service name
+        # If provided, messages are added to the outbox and delivered by background workers instead of being sent directly
+        outbox: Optional[DiscordOutbox] = None,
     ) -> None:
         super().__init__()
-        self._webhook_url = webhook_url
-
-        self._base_client = DiscordWebhook(
-            webhook_url,
-            rate_limit_retry=True,
-            username=service_name,
-            avatar_url="https://is2-ssl.mzstatic.com/image/thumb/Purple116/v4/66/ee/6a/66ee6ac7-8c44-0f33-757e-1024b3a7489c/AppIcon-0-1x_U007emarketing-0-6-0-sRGB-85-220.png/256x256bb.jpg",
-        )
+        if not webhook_urls:
+            raise ValueError("At least one webhook url is required")
+        self._webhook_urls = webhook_urls
 
+        self._service_name = service_name
         self._time_provider = time_provider
+        self._outbox = outbox
 
     def send_message_str(self, message: str) -> None:
-        self._base_client.set_content(message)
-        self._base_client.execute()
+        for base_client in self._create_message():
+            base_client.set_content(message)
+            base_client.execute()
 
-    def send_message_embed(self, embed: DiscordEmbed) -> None:
-        self._base_client.add_embed(embed)
-        self._execute()
+    # Delivery keys identify the content of a message, e.g. to record it as delivered once the outbox delivered it
+    def send_message_embed(
+        self, embed: DiscordEmbed, delivery_key: Optional[str] = None
+    ) -> None:
+        self._execute(self._create_message(embeds=[embed]), delivery_key)
 
         # Add time to footer?
         # embed.set_footer(text=f"{self._time_provider.get_current_time()}")
 
     # XXX: Rate limit on sending multiple images in a row using this method? -> For multi image use send_images
-    def send_image(self, image: BytesIO, name: str) -> None:
-        self._base_client.add_file(file=image.read(), filename=name)
-        self._execute()
+    def send_image(self, image: bytes, name: str) -> None:
+        self._execute(self._create_message(images=[image], names=[name]))
 
     # Attach multiple images to a single message
-    def send_images(self, images: Sequence[BytesIO], names: Sequence[str]) -> None:
-        for image, name in zip(images, names):
-            self._base_client.add_file(file=image.read(), filename=name)
-        self._execute()
+    def send_images(
+        self,
+        images: Sequence[bytes],
+        names: Sequence[str],
+        delivery_key: Optional[str] = None,
+    ) -> None:
+        self._execute(self._create_message(images=images, names=names), delivery_key)
 
-    # Executes current state of the client and resets it
-    def _execute(self) -> None:
+    # Send embeds and their attached images in a single (multipart) request
+    # Embeds can reference an attached image by its name, i.e. 'attachment://<name>'
+    def send_message_embeds(
+        self,
+        embeds: Sequence[DiscordEmbed],
+        images: Sequence[bytes] = (),
+        names: Sequence[str] = (),
+        delivery_key: Optional[str] = None,
+    ) -> None:
+        if len(embeds) > MAX_EMBEDS_PER_MESSAGE:
+            raise DiscordException(
+                f"Cannot send {len(embeds)} embeds in a single message. Max is {MAX_EMBEDS_PER_MESSAGE}"
+            )
+        self._execute(self._create_message(embeds, images, names), delivery_key)
+
+    # Messages are only queued if sent through the outbox, i.e. they are delivered later
+    @property
+    def uses_outbox(self) -> bool:
+        return self._outbox is not None
+
+    # Delivery keys of messages queued in the outbox, but not yet delivered
+    def get_queued_delivery_keys(self) -> set[str]:
+        return self._outbox.get_queued_delivery_keys() if self._outbox else set()
+
+    # A client for each destination, with the embeds and attachments of the message
+    def _create_message(
+        self,
+        embeds: Sequence[DiscordEmbed] = (),
+        images: Sequence[bytes] = (),
+        names: Sequence[str] = (),
+    ) -> list[DiscordWebhook]:
+        base_clients = []
+        for webhook_url in self._webhook_urls:
+            base_client = DiscordWebhook(
+                webhook_url,
+                rate_limit_retry=True,
+                username=self._service_name,
+                avatar_url=AVATAR_URL,
+            )
+            for embed in embeds:
+                base_client.add_embed(embed)
+            for image, name in zip(images, names):
+                base_client.add_file(file=image, filename=name)
+            base_clients.append(base_client)
+        return base_clients
+
+    # Multiple destinations are sent to concurrently
+    def _execute(
+        self, base_clients: Sequence[DiscordWebhook], delivery_key: Optional[str] = None
+    ) -> None:
+        if self._outbox:
+            self._add_to_outbox(self._outbox, base_clients[0], delivery_key)
+            return
+
+        if len(base_clients) == 1:
+            self._execute_base_client(base_clients[0])
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=len(base_clients), thread_name_prefix="discord-send"
+        ) as executor:
+            # Consume results, such that the first error is raised (after all destinations are attempted)
+            list(executor.map(self._execute_base_client, base_clients))
+
+    # Sent like the outbox sends messages, i.e. images are streamed into the request body without copies
+    # Rate limited requests are retried after the time requested by Discord (as the discord library does)
+    def _execute_base_client(self, base_client: DiscordWebhook) -> None:
+        files = [(file_name, data) for file_name, data in base_client.files.values()]
         try:
-            # base client keeps state -> remove embeds and attachments after sending
-            response = self._base_client.execute(remove_embeds=True)
-            self._base_client.clear_attachments()
+            response = post_webhook_message(base_client.url, base_client.json, files)
+            while response.status_code == 429:
+                retry_after = get_retry_after(response) or RATE_LIMIT_RETRY_SECONDS
+                logger.warning(
+                    f"Rate limited by Discord. Retrying in {retry_after:.1f} seconds"
+                )
+                time.sleep(retry_after)
+                response = post_webhook_message(
+                    base_client.url, base_client.json, files
+                )
             response.raise_for_status()
         except Exception as e:
             raise DiscordException(f"Error sending message to Discord: {e}") from e
 
         logger.info(f"Message successfully sent to Discord. Response: {response}")
+
+    # A message is added for each destination. The outbox stores each distinct image once
+    # NB: The message is the same for all destinations, so it is taken from the client of the first one
+    def _add_to_outbox(
+        self,
+        outbox: DiscordOutbox,
+        base_client: DiscordWebhook,
+        delivery_key: Optional[str],
+    ) -> None:
+        files = [(file_name, data) for file_name, data in base_client.files.values()]
+        outbox.put(
+            self._webhook_urls,
+            base_client.json,
+            files,
+            self._time_provider.now().timestamp(),
+            delivery_key,
+        )
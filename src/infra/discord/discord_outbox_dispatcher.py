@@ -0,0 +1,169 @@
+import logging
+import threading
+from typing import Callable, Optional
+
+import requests
+
+from src.consts import SECONDS_IN_MINUTE
+from src.infra.discord.discord_api_client import DiscordException
+from src.infra.discord.discord_rate_limits import DiscordRateLimiter
+from src.infra.discord.discord_webhook_request import (
+    get_retry_after,
+    post_webhook_message,
+)
+from src.infra.storage.discord_outbox import DiscordOutbox, OutboxMessage
+from src.infra.time_provider import TimeProvider
+
+logger = logging.getLogger(__name__)
+
+# Delay before the first retry of a failed delivery. Doubled for each failed attempt
+RETRY_BASE_DELAY_SECONDS = 5
+RETRY_MAX_DELAY_SECONDS = 15 * SECONDS_IN_MINUTE
+# Max time a worker sleeps before checking the outbox again (e.g. if a notification is missed)
+_MAX_IDLE_SECONDS = SECONDS_IN_MINUTE
+
+
+# Delivery failed, but may succeed if retried later
+class _RetryableDeliveryError(Exception):
+    pass
+
+
+# Background workers delivering the messages of the outbox to Discord
+# Failed deliveries are retried with exponential backoff
+# Messages are postponed (not counted as failed attempts) while the rate limit of their webhook is exhausted, or after the time requested by Discord if rate limited anyway (Retry-After)
+class DiscordOutboxDispatcher:
+    def __init__(
+        self,
+        outbox: DiscordOutbox,
+        rate_limiter: DiscordRateLimiter,
+        time_provider: TimeProvider,
+        num_workers: int,
+        max_attempts: int,
+        on_delivery_failed: Optional[Callable[[Exception, str], None]] = None,
+        # Called with the delivery key of a message once it is delivered to every destination
+        on_delivered: Optional[Callable[[str], None]] = None,
+    ):
+        super().__init__()
+        self._outbox = outbox
+        self._rate_limiter = rate_limiter
+        self._time_provider = time_provider
+        self._num_workers = num_workers
+        self._max_attempts = max_attempts
+        self._on_delivery_failed = on_delivery_failed
+        self._on_delivered = on_delivered
+        self._stop_event = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    def start(self) -> None:
+        logger.info(f"Starting {self._num_workers} discord delivery workers")
+        for idx in range(self._num_workers):
+            # Daemon, such that workers do not keep the program running when the scheduler stops
+            worker = threading.Thread(
+                target=self._run_worker, name=f"discord-delivery-{idx}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for worker in self._workers:
+            worker.join()
+
+    def _run_worker(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                message = self._outbox.claim_next(self._now())
+                if message:
+                    self._deliver(message)
+                else:
+                    self._outbox.wait(self._get_idle_seconds())
+            except Exception as e:
+                # Keep worker alive, e.g. if the outbox database is temporarily locked
+                logger.exception(f"Unexpected error in discord delivery worker: {e}")
+                self._stop_event.wait(RETRY_BASE_DELAY_SECONDS)
+
+    def _deliver(self, message: OutboxMessage) -> None:
+        delay = self._rate_limiter.acquire(message.webhook_url, self._now())
+        if delay > 0:
+            logger.info(
+                f"Rate limit of webhook exhausted. Postponing message {message.id} by {delay:.1f} seconds"
+            )
+            self._outbox.postpone(message.id, self._now() + delay)
+            return
+
+        try:
+            response = _post(message)
+            self._rate_limiter.update(
+                message.webhook_url, response.headers, self._now()
+            )
+            if response.status_code == 429:
+                retry_after = get_retry_after(response) or RETRY_BASE_DELAY_SECONDS
+                logger.warning(
+                    f"Rate limited by Discord. Postponing message {message.id} by {retry_after:.1f} seconds"
+                )
+                self._outbox.postpone(message.id, self._now() + retry_after)
+                return
+            _check_response(response)
+        except _RetryableDeliveryError as e:
+            attempts = message.attempts + 1
+            if attempts >= self._max_attempts:
+                self._fail(message, f"{e} (gave up after {attempts} attempts)")
+                return
+
+            delay = min(
+                RETRY_BASE_DELAY_SECONDS * 2**message.attempts,
+                RETRY_MAX_DELAY_SECONDS,
+            )
+            logger.warning(
+                f"Failed to deliver message {message.id} (attempt {attempts}): {e}. Retrying in {delay:.1f} seconds"
+            )
+            self._outbox.retry_later(message.id, self._now() + delay, str(e))
+            return
+        except DiscordException as e:
+            self._fail(message, str(e))
+            return
+
+        self._outbox.complete(message.id)
+        logger.info(f"Message {message.id} successfully delivered to Discord")
+        if (
+            self._on_delivered
+            and message.delivery_key
+            and message.delivery_key not in self._outbox.get_queued_delivery_keys()
+        ):
+            self._on_delivered(message.delivery_key)
+
+    def _fail(self, message: OutboxMessage, error: str) -> None:
+        logger.error(f"Failed to deliver message {message.id}: {error}")
+        self._outbox.fail(message.id, error)
+        if self._on_delivery_failed:
+            self._on_delivery_failed(
+                DiscordException(f"Failed to deliver message to Discord: {error}"), ""
+            )
+
+    def _get_idle_seconds(self) -> float:
+        next_attempt_time = self._outbox.get_next_attempt_time()
+        if next_attempt_time is None:
+            return _MAX_IDLE_SECONDS
+        return min(max(next_attempt_time - self._now(), 0), _MAX_IDLE_SECONDS)
+
+    def _now(self) -> float:
+        return self._time_provider.now().timestamp()
+
+
+def _post(message: OutboxMessage) -> requests.Response:
+    try:
+        return post_webhook_message(message.webhook_url, message.payload, message.files)
+    except requests.RequestException as e:
+        raise _RetryableDeliveryError(f"Request failed: {e}") from e
+
+
+def _check_response(response: requests.Response) -> None:
+    if response.status_code >= 500:
+        raise _RetryableDeliveryError(
+            f"Discord responded with status {response.status_code}"
+        )
+    if not response.ok:
+        # Client errors (e.g. invalid payload or webhook) will not succeed if retried
+        raise DiscordException(
+            f"Discord responded with status {response.status_code}: {response.text}"
+        )
@@ -0,0 +1,76 @@
+import logging
+import threading
+from typing import Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Rate limit bucket as last reported by Discord
+class _Bucket(NamedTuple):
+    remaining: int  # Requests left until reset
+    reset_at: float  # Time (seconds since epoch) the bucket is refilled
+
+
+# Tracks the rate limits of Discord from the response headers, such that requests can be delayed instead of being rejected (429)
+# Webhooks are mapped to the bucket reported by Discord, so webhooks sharing a bucket (e.g. same channel) share its limit
+# See https://discord.com/developers/docs/topics/rate-limits
+class DiscordRateLimiter:
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._bucket_ids: dict[str, str] = {}  # Bucket id by webhook url
+        self._buckets: dict[str, _Bucket] = {}
+        self._global_reset_at = 0.0
+
+    # Returns the seconds to wait before a request to the webhook may be sent
+    # If the request may be sent now, it is counted against the bucket (such that concurrent requests do not exceed the limit)
+    def acquire(self, webhook_url: str, now: float) -> float:
+        with self._lock:
+            if now < self._global_reset_at:
+                return self._global_reset_at - now
+
+            bucket_id = self._bucket_ids.get(webhook_url)
+            bucket = self._buckets.get(bucket_id) if bucket_id else None
+            # Unknown buckets are not limited until Discord reports them
+            if not bucket or now >= bucket.reset_at:
+                return 0
+            if bucket.remaining <= 0:
+                return bucket.reset_at - now
+
+            self._buckets[bucket_id] = bucket._replace(  # type: ignore
+                remaining=bucket.remaining - 1
+            )
+            return 0
+
+    # Updates the limits from the headers of a response to the webhook
+    def update(self, webhook_url: str, headers: Mapping[str, str], now: float) -> None:
+        with self._lock:
+            retry_after = _parse_float(headers.get("Retry-After"))
+            if headers.get("X-RateLimit-Global") == "true" and retry_after:
+                logger.warning(f"Global rate limit hit. Retry after {retry_after}s")
+                self._global_reset_at = now + retry_after
+                return
+
+            bucket_id = headers.get("X-RateLimit-Bucket")
+            remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+            reset_after = _parse_float(headers.get("X-RateLimit-Reset-After"))
+            if not bucket_id or remaining is None or reset_after is None:
+                return
+
+            # Retry after exceeds reset of the bucket if the limit is shared (e.g. by other applications)
+            if retry_after:
+                reset_after = max(reset_after, retry_after)
+            self._bucket_ids[webhook_url] = bucket_id
+            self._buckets[bucket_id] = _Bucket(int(remaining), now + reset_after)
+            logger.debug(
+                f"Rate limit bucket {bucket_id}: {int(remaining)} remaining, reset after {reset_after}s"
+            )
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,52 @@
+import json
+from typing import Any, Optional, Sequence
+
+import requests
+
+from src.infra.discord.multipart_body import MultipartBody, MultipartField
+
+REQUEST_TIMEOUT_SECONDS = 30
+
+
+# Sends a webhook message. Messages with files are sent as multipart with the json body as 'payload_json'
+# Files are streamed from their content without copying them into an encoded body (as the discord and request libraries do)
+def post_webhook_message(
+    webhook_url: str,
+    payload: dict[str, Any],
+    files: Sequence[tuple[str, bytes | memoryview]] = (),
+) -> requests.Response:
+    if not files:
+        return requests.post(webhook_url, json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
+
+    body = MultipartBody(
+        [
+            MultipartField(
+                "payload_json",
+                json.dumps(payload).encode(),
+                content_type="application/json",
+            )
+        ]
+        + [
+            MultipartField(f"files[{idx}]", data, file_name)
+            for idx, (file_name, data) in enumerate(files)
+        ]
+    )
+    return requests.post(
+        webhook_url,
+        data=body,
+        headers={"Content-Type": body.content_type},
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    )
+
+
+# Seconds to wait before retrying a rate limited request
+def get_retry_after(response: requests.Response) -> Optional[float]:
+    if retry_after := response.headers.get("Retry-After"):
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    try:
+        return float(response.json()["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,74 @@
+import mimetypes
+import secrets
+from collections import deque
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+# Size of the chunks read by the http client when sending the body
+CHUNK_SIZE = 64 * 1024
+
+
+class MultipartField(NamedTuple):
+    name: str
+    data: bytes | memoryview
+    file_name: Optional[str] = None  # If set, field is sent as a file
+    content_type: Optional[str] = None  # If None, guessed from the file name
+
+
+# Multipart form data body streamed in chunks directly from the content of the fields
+# Content is sliced with memoryviews, i.e. the body is never assembled in memory (as when the request library encodes the files)
+# Length is known up front, so the request is sent with a content length (not chunked)
+class MultipartBody:
+    def __init__(self, fields: Sequence[MultipartField]):
+        super().__init__()
+        boundary = secrets.token_hex(16)
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+        parts: list[memoryview] = []
+        for field in fields:
+            parts.append(memoryview(_field_header(boundary, field)))
+            parts.append(memoryview(field.data).cast("B"))
+            parts.append(memoryview(b"\r\n"))
+        parts.append(memoryview(f"--{boundary}--\r\n".encode()))
+
+        self._length = sum(part.nbytes for part in parts)
+        self._parts = deque(part for part in parts if part.nbytes)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while chunk := self.read(CHUNK_SIZE):
+            yield chunk
+
+    # Only the returned chunk is copied
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = sum(part.nbytes for part in self._parts)
+
+        chunks: list[memoryview] = []
+        while size > 0 and self._parts:
+            part = self._parts[0]
+            chunk = part[:size]
+            chunks.append(chunk)
+            size -= chunk.nbytes
+            if chunk.nbytes == part.nbytes:
+                self._parts.popleft()
+            else:
+                self._parts[0] = part[chunk.nbytes :]
+        return b"".join(chunks)
+
+
+def _field_header(boundary: str, field: MultipartField) -> bytes:
+    disposition = f'form-data; name="{field.name}"'
+    content_type = field.content_type
+    if field.file_name is not None:
+        disposition += f'; filename="{field.file_name}"'
+        content_type = (
+            content_type
+            or mimetypes.guess_type(field.file_name)[0]
+            or "application/octet-stream"
+        )
+    header = f"--{boundary}\r\nContent-Disposition: {disposition}\r\n"
+    if content_type:
+        header += f"Content-Type: {content_type}\r\n"
+    return f"{header}\r\n".encode()
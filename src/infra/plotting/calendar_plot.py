@@ -0,0 +1,105 @@
+import datetime
+from typing import Sequence
+
+import numpy as np
+import numpy.typing as npt
+from matplotlib.axes import Axes
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import Colormap, Normalize, to_rgba
+
+from src.consts import DAYS_IN_WEEK
+
+# Value of days missing in the data (i.e. gaps between registered dates)
+MISSING_VALUE = -1.0
+# Number of vertices used for each rounded corner of a cell
+_CORNER_RESOLUTION = 6
+
+
+# Arranges daily values in a grid with a row for each weekday (Monday first) and a column for each week
+# Days missing between the first and last date are set to MISSING_VALUE, cells outside the date range are nan
+def to_weekday_grid(
+    dates: Sequence[datetime.date], values: Sequence[float]
+) -> npt.NDArray[np.float64]:
+    first_date = dates[0]
+    day_offsets = np.array([(date - first_date).days for date in dates])
+
+    days = np.full(day_offsets[-1] + 1, MISSING_VALUE)
+    days[day_offsets] = values
+
+    start_day_idx = first_date.weekday()
+    num_weeks = (len(days) + start_day_idx - 1) // DAYS_IN_WEEK + 1
+    grid = np.full((num_weeks, DAYS_IN_WEEK), np.nan)
+    grid.flat[start_day_idx : start_day_idx + len(days)] = days
+
+    return grid.T
+
+
+# Draws every cell of a grid with the given shape as a single collection of rounded squares
+# Cells are colored by one vectorized colormap lookup, so draw and save time is independent of the number of cells (e.g. a year or more of days)
+# Gap and corner radius are in data units (fraction of a cell), such that cells keep their shape for any number of weeks
+class CalendarCells:
+    def __init__(
+        self,
+        ax: Axes,
+        shape: tuple[int, int],
+        colormap: Colormap,
+        norm: Normalize,
+        missing_color: str,
+        gap: float = 0.15,
+        corner_radius: float = 0.15,
+    ):
+        super().__init__()
+        self._shape = shape
+        self._colormap = colormap
+        self._norm = norm
+        self._missing_color = to_rgba(missing_color)
+
+        # Cells in row-major order of the grid. First weekday is drawn at the top
+        num_days, num_weeks = shape
+        day_idx, week_idx = np.indices(shape).reshape(2, -1)
+        offsets = np.column_stack((week_idx, num_days - 1 - day_idx))
+        vertices = (
+            _rounded_square(gap, corner_radius)[np.newaxis, :, :]
+            + offsets[:, np.newaxis, :]
+        )
+
+        self._cells = PolyCollection(vertices, linewidths=0)  # type: ignore
+        ax.add_collection(self._cells)
+        ax.set_xlim(0, num_weeks)
+        ax.set_ylim(0, num_days)
+
+    # Only colors are changed, the cells are kept. Cells outside the period (nan) are transparent
+    def set_values(self, grid: npt.NDArray[np.float64]) -> None:
+        if grid.shape != self._shape:
+            raise ValueError(
+                f"Grid shape {grid.shape} does not match calendar shape {self._shape}"
+            )
+        values = grid.ravel()
+        colors = self._colormap(self._norm(values))
+        colors[values == MISSING_VALUE] = self._missing_color
+        colors[np.isnan(values)] = (0, 0, 0, 0)
+        self._cells.set_facecolor(colors)
+
+
+# Vertices of a square with rounded corners, centered in the unit square
+def _rounded_square(gap: float, radius: float) -> npt.NDArray[np.float64]:
+    low = gap / 2 + radius
+    high = 1 - gap / 2 - radius
+    corners = [
+        ((high, low), -np.pi / 2),  # Bottom right
+        ((high, high), 0),  # Top right
+        ((low, high), np.pi / 2),  # Top left
+        ((low, low), np.pi),  # Bottom left
+    ]
+    arcs: list[npt.NDArray[np.float64]] = []
+    for (center_x, center_y), start_angle in corners:
+        angles = np.linspace(start_angle, start_angle + np.pi / 2, _CORNER_RESOLUTION)
+        arcs.append(
+            np.column_stack(
+                (
+                    center_x + radius * np.cos(angles),
+                    center_y + radius * np.sin(angles),
+                )
+            )
+        )
+    return np.concatenate(arcs)
@@ -0,0 +1,57 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+TTemplate = TypeVar("TTemplate", bound="FigureTemplate")  # type: ignore
+
+# Max number of templates kept by each cache (i.e. number of distinct plot configurations)
+DEFAULT_MAX_TEMPLATES = 8
+
+
+# Figure skeleton (layout, axes, legends, formatters, colorbars) built and laid out once for a plot configuration
+# Later renders with the same configuration only update the data of the existing artists
+class FigureTemplate(ABC, Generic[T]):
+    def __init__(self, figure: Figure):
+        super().__init__()
+        self.figure = figure
+        # Figure is mutated by each render, so only a single render may use the template at a time
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def update(self, data: T) -> None:
+        pass
+
+
+# Least recently used templates by configuration key
+class FigureTemplateCache(Generic[TTemplate]):
+    def __init__(self, max_size: int = DEFAULT_MAX_TEMPLATES):
+        super().__init__()
+        self._max_size = max_size
+        self._templates: OrderedDict[Hashable, TTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Returns the template for the configuration, building it if not cached
+    def get(self, key: Hashable, build: Callable[[], TTemplate]) -> TTemplate:
+        with self._lock:
+            if template := self._templates.get(key):
+                self._templates.move_to_end(key)
+                return template
+
+        # Build outside the lock, such that templates for other configurations are not blocked while building
+        logger.debug(f"Building figure template for configuration: {key}")
+        template = build()
+
+        with self._lock:
+            # Keep the template of any concurrent build for the same configuration
+            template = self._templates.setdefault(key, template)
+            self._templates.move_to_end(key)
+            if len(self._templates) > self._max_size:
+                self._templates.popitem(last=False)
+            return template
@@ -0,0 +1,122 @@
+import logging
+from io import BytesIO
+from typing import NamedTuple, Sequence
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from src.setup.image_formats import ImageFormat
+
+logger = logging.getLogger(__name__)
+
+# NB: Pillow is always installed as a dependency of matplotlib
+
+
+class ImageEncoding(NamedTuple):
+    format: ImageFormat = ImageFormat.PNG
+    dpi: int = 100
+    png_compress_level: int = 6  # 0 (none) - 9 (smallest)
+    quantize_colors: int = 0  # Number of colors in png palette. If 0, no quantization
+    quality: int = 85  # Webp/jpeg quality 1-100
+
+
+# Step of the degradation ladder used when images exceed the byte budget
+class _Degradation(NamedTuple):
+    encoding: ImageEncoding
+    scale: float  # Factor to scale the image size with
+
+
+# Draws the figure and encodes it with the given settings
+def encode_figure(fig: Figure, encoding: ImageEncoding) -> bytes:
+    fig.set_dpi(encoding.dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    image = Image.frombuffer(
+        "RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+    )
+    return encode_image(image, encoding)
+
+
+def encode_image(image: Image.Image, encoding: ImageEncoding) -> bytes:
+    # Plots are opaque, so alpha channel is not needed
+    image = image.convert("RGB")
+    buffer = BytesIO()
+    match encoding.format:
+        case ImageFormat.PNG:
+            if encoding.quantize_colors:
+                image = image.quantize(
+                    encoding.quantize_colors, method=Image.Quantize.FASTOCTREE
+                )
+            image.save(buffer, "PNG", compress_level=encoding.png_compress_level)
+        case ImageFormat.WEBP:
+            image.save(buffer, "WEBP", quality=encoding.quality, method=4)
+        case ImageFormat.JPEG:
+            image.save(buffer, "JPEG", quality=encoding.quality, optimize=True)
+    return buffer.getvalue()
+
+
+# Keeps the total size of images sent in a single message within a budget (e.g. Discord's attachment limit)
+# Images exceeding the budget are re-encoded with gradually lower quality until they fit
+class ImageBudget:
+    def __init__(self, encoding: ImageEncoding, max_bytes: int):
+        super().__init__()
+        self._encoding = encoding
+        self._max_bytes = max_bytes
+
+    def fit(self, images: Sequence[bytes]) -> list[bytes]:
+        total_bytes = sum(len(image) for image in images)
+        if total_bytes <= self._max_bytes:
+            return list(images)
+
+        logger.info(
+            f"Images ({total_bytes} bytes) exceed budget of {self._max_bytes} bytes. Degrading quality."
+        )
+        # Decode once, each step encodes from the original images
+        decoded = [Image.open(BytesIO(image)).convert("RGB") for image in images]
+
+        degraded = list(images)
+        for step in self._get_degradations():
+            degraded = [
+                encode_image(_scale(image, step.scale), step.encoding)
+                for image in decoded
+            ]
+            total_bytes = sum(len(image) for image in degraded)
+            if total_bytes <= self._max_bytes:
+                logger.info(f"Images fit budget with {total_bytes} bytes: {step}")
+                return degraded
+
+        logger.warning(
+            f"Images ({total_bytes} bytes) still exceed budget of {self._max_bytes} bytes at lowest quality"
+        )
+        return degraded
+
+    # Least destructive steps first: Fewer colors (png) or lower quality (webp/jpeg), then smaller images
+    def _get_degradations(self) -> list[_Degradation]:
+        encoding = self._encoding
+        match encoding.format:
+            case ImageFormat.PNG:
+                current_colors = encoding.quantize_colors or 257
+                reduced = [
+                    encoding._replace(quantize_colors=colors, png_compress_level=9)
+                    for colors in (256, 64)
+                    if colors < current_colors
+                ]
+            case ImageFormat.WEBP | ImageFormat.JPEG:
+                reduced = [
+                    encoding._replace(quality=quality)
+                    for quality in (70, 50)
+                    if quality < encoding.quality
+                ]
+
+        lowest = reduced[-1] if reduced else encoding
+        return [_Degradation(step, 1.0) for step in reduced] + [
+            _Degradation(lowest, scale) for scale in (0.75, 0.5)
+        ]
+
+
+def _scale(image: Image.Image, scale: float) -> Image.Image:
+    if scale == 1.0:
+        return image
+    size = (round(image.width * scale), round(image.height * scale))
+    return image.resize(size, Image.Resampling.LANCZOS)
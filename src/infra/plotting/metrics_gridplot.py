@@ -1,12 +1,13 @@
 from datetime import date
-from typing import Any, NamedTuple, Sequence
+from typing import Any, Hashable, NamedTuple, Sequence
 
 import numpy as np
 import numpy.typing as npt
-from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.text import Text
 
 from src.consts import SECONDS_IN_HOUR
 from src.domain.metrics import (
@@ -19,6 +20,7 @@ from src.domain.metrics import (
     StressMetrics,
 )
 from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
+from src.infra.plotting.figure_templates import FigureTemplate
 from src.utils import get_moving_average
 
 PLOT_SIZE = (8, 9)
@@ -33,33 +35,84 @@ class _GridPlotMetric(NamedTuple):
         return sum([val for val in self.values if val]) / len(self.values)
 
 
-# Creates subplot for each metric in a single figure
-def plot(
+# Compact plotting data (plain dates and numbers), such that it can be sent to a render worker process
+class GridPlotData(NamedTuple):
+    dates: Sequence[date]
+    metrics: Sequence[_GridPlotMetric]
+
+
+def to_plot_data(
     metrics_data: Sequence[BaseMetric[GarminResponseEntryDto, Any]],
-) -> Figure:
+) -> GridPlotData:
     # Just get the dates from one of the metrics (they should all be the same)
     dates = [entry.calendarDate for entry in metrics_data[0].entries]
-    weekdays = [date.strftime("%a") for date in dates]
+    return GridPlotData(dates, _transform(metrics_data))
 
-    plot_metrics = _transform(metrics_data)
 
-    fig = plt.figure(figsize=PLOT_SIZE)
-
-    COLS = 2
-    ROWS = (
-        len(plot_metrics) // COLS
-        if len(plot_metrics) % COLS == 0
-        else len(plot_metrics) // COLS + 1
+# Plots with same metrics and number of days share the figure layout
+def template_key(data: GridPlotData) -> Hashable:
+    return (
+        tuple((metric.name, metric.color) for metric in data.metrics),
+        len(data.dates),
     )
 
-    for idx, plot_metric in enumerate(plot_metrics, start=1):
-        ax = plt.subplot(ROWS, COLS, idx)
-        _add_subplot(dates, weekdays, plot_metric, ax)
 
-    plt.suptitle(f"Health Metrics (Last {len(dates)} days)", fontsize=16)
-    plt.tight_layout()
+# Artists of a metric subplot that are updated with new data
+class _SubplotArtists(NamedTuple):
+    ax: Axes
+    values_line: Line2D
+    latest_markers: Sequence[Line2D]
+    avg_line: Line2D
+    avg_label: Text
+
+
+# Creates subplot for each metric in a single figure
+class GridPlotTemplate(FigureTemplate[GridPlotData]):
+    def __init__(self, data: GridPlotData):
+        super().__init__(Figure(figsize=PLOT_SIZE))
+        dates = data.dates
+        weekdays = [date.strftime("%a") for date in dates]
+
+        plot_metrics = data.metrics
+
+        COLS = 2
+        ROWS = (
+            len(plot_metrics) // COLS
+            if len(plot_metrics) % COLS == 0
+            else len(plot_metrics) // COLS + 1
+        )
+
+        self._subplots: list[_SubplotArtists] = []
+        for idx, plot_metric in enumerate(plot_metrics, start=1):
+            ax = self.figure.add_subplot(ROWS, COLS, idx)
+            self._subplots.append(_add_subplot(dates, weekdays, plot_metric, ax))
+
+        self.figure.suptitle(f"Health Metrics (Last {len(dates)} days)", fontsize=16)
+        self.figure.tight_layout()
+
+    # Replace the values of each subplot. Layout is kept from when the template was built
+    def update(self, data: GridPlotData) -> None:
+        dates = data.dates
+        weekdays = [date.strftime("%a") for date in dates]
+
+        for subplot, plot_metric in zip(self._subplots, data.metrics):
+            # None values are not drawn (nan)
+            values = np.array(plot_metric.values, dtype=float)
+            subplot.values_line.set_data(dates, values)
+            for marker in subplot.latest_markers:
+                marker.set_data([dates[-1]], [values[-1]])
+
+            avg_value = plot_metric.get_avg()
+            subplot.avg_line.set_ydata([avg_value, avg_value])
+            subplot.avg_label.set_text(f"Average: {avg_value:.1f}")
+
+            subplot.ax.set_xticks(dates, weekdays)  # type: ignore
+            subplot.ax.relim()
+            subplot.ax.autoscale_view()
 
-    return fig
+
+def plot(data: GridPlotData) -> Figure:
+    return GridPlotTemplate(data).figure
 
 
 def _add_subplot(
@@ -67,21 +120,21 @@ def _add_subplot(
     weekdays: Sequence[str],
     plot_metric: _GridPlotMetric,
     ax: Axes,
-):
+) -> _SubplotArtists:
     # _plot_with_colormap(plot_metric, dates, ax)
 
     # Plot metric values as line chart
-    ax.plot(dates, plot_metric.values, color=plot_metric.color, linestyle="-", marker="o", markersize=8)  # type: ignore
+    (values_line,) = ax.plot(dates, plot_metric.values, color=plot_metric.color, linestyle="-", marker="o", markersize=8)  # type: ignore
 
     # Format latest metric on chart such that marker is larger and has a black outline
     latest_date = dates[-1]
     latest_val = plot_metric.values[-1]
-    ax.plot(latest_date, latest_val, color=plot_metric.color, marker="o", linestyle="", markersize=12)  # type: ignore
-    ax.plot(latest_date, latest_val, color=plot_metric.color, marker="o", markeredgewidth=2, markeredgecolor="black", linestyle="", markersize=12)  # type: ignore
+    (latest_marker,) = ax.plot(latest_date, latest_val, color=plot_metric.color, marker="o", linestyle="", markersize=12)  # type: ignore
+    (latest_outline,) = ax.plot(latest_date, latest_val, color=plot_metric.color, marker="o", markeredgewidth=2, markeredgecolor="black", linestyle="", markersize=12)  # type: ignore
 
     # Add horizontal line with the metric average
     avg_value = plot_metric.get_avg()
-    ax.axhline(
+    avg_line = ax.axhline(
         y=avg_value, color="gray", linestyle="--", label=f"Average: {avg_value:.1f}"
     )
 
@@ -95,11 +148,19 @@ def _add_subplot(
     # Configure chart
     ax.set_title(plot_metric.name)
     ax.set_xticks(dates, weekdays)  # type: ignore
-    ax.legend()
+    legend = ax.legend()
     # ax.grid(True)
     # make grid lines more transparent
     ax.grid(alpha=0.50)
 
+    return _SubplotArtists(
+        ax,
+        values_line,
+        [latest_marker, latest_outline],
+        avg_line,
+        avg_label=legend.get_texts()[0],
+    )
+
 
 def _add_background_plot(
     plot_metric: _GridPlotMetric, ax: Axes, plot_metric_full: _GridPlotMetric
@@ -114,7 +175,7 @@ def _add_background_plot(
     padding = (
         val_range * 0.2
     )  # Adjust padding of foreground plot. Larger values will ensure more of the background plot is visible
-    plt.ylim(
+    ax.set_ylim(
         min_val - padding,
         max_val + padding,
     )
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the appearance of the plots change, such that images rendered by an older version are not reused
+PLOT_CACHE_VERSION = 1
+_FILE_SUFFIX = ".img"
+
+
+# Returns a key identifying the rendered image by the render function, its (plain data) input and image encoding
+# NB: Plotting data and encoding only contain dates, numbers, strings and enums, so the repr is deterministic
+def get_cache_key(render: Callable[..., bytes], data: Any, encoding: Any) -> str:
+    content = f"{PLOT_CACHE_VERSION}|{render.__module__}.{render.__qualname__}|{data!r}|{encoding!r}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+# Least recently used images bounded by their total size in bytes
+class _SizeBoundedLru:
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self._max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def touch(self, key: str) -> None:
+        self._sizes.move_to_end(key)
+
+    # Returns the keys evicted to make room for the entry
+    def add(self, key: str, size: int) -> list[str]:
+        if key in self._sizes:
+            self._total_bytes -= self._sizes.pop(key)
+        self._sizes[key] = size
+        self._total_bytes += size
+
+        evicted: list[str] = []
+        while self._total_bytes > self._max_bytes and self._sizes:
+            evicted_key, evicted_size = self._sizes.popitem(last=False)
+            self._total_bytes -= evicted_size
+            evicted.append(evicted_key)
+        return evicted
+
+    def remove(self, key: str) -> None:
+        if key in self._sizes:
+            self._total_bytes -= self._sizes.pop(key)
+
+
+# Content addressed cache of rendered plot images, in memory and (optionally) on disk
+# Both levels are size bounded and evict the least recently used images
+class PlotCache:
+    def __init__(
+        self,
+        memory_max_bytes: int,
+        disk_max_bytes: int,
+        dir_path: Optional[Path] = None,
+    ):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._memory_lru = _SizeBoundedLru(memory_max_bytes)
+        self._memory: dict[str, bytes] = {}
+        self._dir_path = dir_path
+        self._disk_lru = _SizeBoundedLru(disk_max_bytes)
+        if dir_path:
+            self._load_disk_index(dir_path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory_lru:
+                self._memory_lru.touch(key)
+                return self._memory[key]
+
+            image = self._read_from_disk(key)
+            if image is not None:
+                self._add_to_memory(key, image)
+            return image
+
+    def put(self, key: str, image: bytes) -> None:
+        with self._lock:
+            self._add_to_memory(key, image)
+            self._write_to_disk(key, image)
+
+    def _add_to_memory(self, key: str, image: bytes) -> None:
+        self._memory[key] = image
+        for evicted_key in self._memory_lru.add(key, len(image)):
+            del self._memory[evicted_key]
+
+    def _file_path(self, dir_path: Path, key: str) -> Path:
+        return dir_path / f"{key}{_FILE_SUFFIX}"
+
+    def _read_from_disk(self, key: str) -> Optional[bytes]:
+        if not self._dir_path or key not in self._disk_lru:
+            return None
+
+        file_path = self._file_path(self._dir_path, key)
+        try:
+            image = file_path.read_bytes()
+        except OSError as e:
+            logger.warning(f"Failed to read cached plot '{file_path}': {e}")
+            self._disk_lru.remove(key)
+            return None
+
+        self._disk_lru.touch(key)
+        # Modification time is used as last access time when the cache is loaded on startup
+        os.utime(file_path)
+        return image
+
+    # Write to temporary file first, such that a cached image is never half written
+    def _write_to_disk(self, key: str, image: bytes) -> None:
+        if not self._dir_path:
+            return
+
+        file_path = self._file_path(self._dir_path, key)
+        tmp_path = file_path.with_suffix(".tmp")
+        try:
+            tmp_path.write_bytes(image)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            logger.warning(f"Failed to write cached plot '{file_path}': {e}")
+            return
+
+        for evicted_key in self._disk_lru.add(key, len(image)):
+            self._file_path(self._dir_path, evicted_key).unlink(missing_ok=True)
+
+    # Index the images already on disk, least recently used first
+    def _load_disk_index(self, dir_path: Path) -> None:
+        dir_path.mkdir(mode=0o700, exist_ok=True)
+        files = [
+            (file_path, file_path.stat())
+            for file_path in dir_path.glob(f"*{_FILE_SUFFIX}")
+        ]
+        files.sort(key=lambda file: file[1].st_mtime)
+        for file_path, stat in files:
+            for evicted_key in self._disk_lru.add(file_path.stem, stat.st_size):
+                self._file_path(dir_path, evicted_key).unlink(missing_ok=True)
+        logger.info(f"Loaded {len(files)} cached plots from '{dir_path}'")
@@ -1,25 +1,123 @@
 import logging
+import multiprocessing
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
 from io import BytesIO
-from typing import Any, Sequence
+from typing import Any, Callable, Optional, Sequence, TypeVar
 
-import matplotlib
-import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 
-matplotlib.use("agg")
-
 import src.infra.plotting.metrics_gridplot as metrics_gridplot
 import src.infra.plotting.sleep_analysis_plot as sleep_analysis_plot
 from src.domain.metrics import BaseMetric, SleepMetrics, SleepScoreMetrics
 from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
+from src.infra.plotting.figure_templates import FigureTemplate, FigureTemplateCache
+from src.infra.plotting.image_encoding import ImageEncoding, encode_figure
+from src.infra.plotting.plot_cache import PlotCache, get_cache_key
+from src.setup.image_formats import ImageFormat
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# Renders plots on a pool of worker processes, such that independent plots are rendered concurrently on separate cores
+# and the calling thread is not blocked while rendering. Render functions only receive compact plotting data and return encoded image bytes
+# NB: Figures are created without pyplot (no global figure state), so rendering in a thread pool is also safe
+# If a cache is provided, plots with the same data as a previous render are returned without rendering
+class PlotRenderer:
+    def __init__(
+        self,
+        num_workers: int,
+        use_threads: bool = False,
+        cache: Optional[PlotCache] = None,
+        encoding: ImageEncoding = ImageEncoding(),
+    ):
+        super().__init__()
+        self._cache = cache
+        self._encoding = encoding
+        # Renders in progress by cache key, such that identical plots requested concurrently are only rendered once
+        self._pending: dict[str, Future[bytes]] = {}
+        self._pending_lock = threading.Lock()
+        # If no workers, plots are rendered on the calling thread
+        self._executor: Optional[Executor] = None
+        if num_workers > 0 and use_threads:
+            logger.info(f"Starting plot renderer with {num_workers} worker threads")
+            self._executor = ThreadPoolExecutor(
+                max_workers=num_workers, thread_name_prefix="plot-renderer"
+            )
+        elif num_workers > 0:
+            logger.info(f"Starting plot renderer with {num_workers} worker processes")
+            # Spawn (instead of fork) to avoid copying the state of the threads in the scheduler process
+            self._executor = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    @property
+    def image_format(self) -> ImageFormat:
+        return self._encoding.format
+
+    # Render function must be defined at module level, such that it can be sent to a worker process
+    def submit(
+        self, render: Callable[[T, ImageEncoding], bytes], data: T
+    ) -> Future[bytes]:
+        if not self._cache:
+            return self._render(render, data)
+
+        cache = self._cache
+        key = get_cache_key(render, data, self._encoding)
+        with self._pending_lock:
+            if pending := self._pending.get(key):
+                logger.debug(f"Plot {key} is already being rendered")
+                return pending
+
+            if image := cache.get(key):
+                logger.info(f"Using cached plot {key}")
+                future: Future[bytes] = Future()
+                future.set_result(image)
+                return future
+
+            future = self._render(render, data)
+            self._pending[key] = future
+
+        def on_rendered(rendered: Future[bytes]):
+            if not rendered.exception():
+                cache.put(key, rendered.result())
+            with self._pending_lock:
+                self._pending.pop(key, None)
+
+        future.add_done_callback(on_rendered)
+        return future
+
+    def _render(
+        self, render: Callable[[T, ImageEncoding], bytes], data: T
+    ) -> Future[bytes]:
+        if self._executor:
+            return self._executor.submit(render, data, self._encoding)
+
+        future: Future[bytes] = Future()
+        try:
+            future.set_result(render(data, self._encoding))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
 
 def create_metrics_gridplot(
     metrics: Sequence[BaseMetric[GarminResponseEntryDto, Any]],
+    renderer: PlotRenderer,
     period_len: int | None = None,
-) -> BytesIO:
+) -> Future[bytes]:
     logger.info("Creating metrics gridplot")
 
     # TODO: Return None if no data
@@ -29,26 +127,63 @@ def create_metrics_gridplot(
     if len(metrics) == 0:
         raise ValueError("No metrics to plot")
 
-    fig = metrics_gridplot.plot(metrics)
-    buf = save_plot_to_buffer(fig)
-    return buf
+    data = metrics_gridplot.to_plot_data(metrics)
+    return renderer.submit(render_metrics_gridplot, data)
 
 
 def create_sleep_analysis_plot(
     sleep: SleepMetrics,
     sleep_score: SleepScoreMetrics,
     ma_window_size: int,
-) -> BytesIO:
+    renderer: PlotRenderer,
+) -> Future[bytes]:
     logger.info("Creating sleep analysis plot")
-    fig = sleep_analysis_plot.plot(sleep, sleep_score, ma_window_size)
-    buf = save_plot_to_buffer(fig)
-    return buf
+    data = sleep_analysis_plot.to_plot_data(sleep, sleep_score, ma_window_size)
+    return renderer.submit(render_sleep_analysis_plot, data)
+
+
+# Figure templates of the current process (i.e. each render worker process keeps its own templates)
+_gridplot_templates: FigureTemplateCache[
+    metrics_gridplot.GridPlotTemplate
+] = FigureTemplateCache()
+_sleep_analysis_templates: FigureTemplateCache[
+    sleep_analysis_plot.SleepPlotTemplate
+] = FigureTemplateCache()
+
+
+# Executed by render workers
+def render_metrics_gridplot(
+    data: metrics_gridplot.GridPlotData, encoding: ImageEncoding
+) -> bytes:
+    template = _gridplot_templates.get(
+        metrics_gridplot.template_key(data),
+        lambda: metrics_gridplot.GridPlotTemplate(data),
+    )
+    return _render_template(template, data, encoding)
+
+
+# Executed by render workers
+def render_sleep_analysis_plot(
+    data: sleep_analysis_plot.SleepPlotData, encoding: ImageEncoding
+) -> bytes:
+    template = _sleep_analysis_templates.get(
+        sleep_analysis_plot.template_key(data),
+        lambda: sleep_analysis_plot.SleepPlotTemplate(data),
+    )
+    return _render_template(template, data, encoding)
+
+
+def _render_template(
+    template: FigureTemplate[T], data: T, encoding: ImageEncoding
+) -> bytes:
+    with template.lock:
+        template.update(data)
+        return encode_figure(template.figure, encoding)
 
 
 # Convert matplotlib figure to bytes
-def save_plot_to_buffer(fig: Figure):
-    buf = BytesIO()
-    fig.savefig(buf, format="png")
+# Figure is drawn on its own Agg canvas. As the figure is never registered with pyplot, it is freed as soon as it is no longer referenced
+def save_plot_to_buffer(fig: Figure, encoding: ImageEncoding = ImageEncoding()):
+    buf = BytesIO(encode_figure(fig, encoding))
     buf.seek(0)
-    plt.close(fig)
     return buf
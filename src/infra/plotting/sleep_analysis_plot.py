@@ -1,23 +1,29 @@
 import datetime
 import logging
 from enum import Enum
-from typing import Any, Callable, NamedTuple, Optional, Sequence
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Sequence
 
 import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
 import numpy as np
 import numpy.typing as npt
-from matplotlib import pyplot as plt
+from matplotlib import colormaps
 from matplotlib.axes import Axes
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PolyCollection
 from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.container import BarContainer
 from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
-from matplotlib.patches import FancyBboxPatch
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from matplotlib.text import Text
 from mpl_toolkits.axes_grid1 import make_axes_locatable  # type: ignore
 
 from src.consts import DAYS_IN_FOUR_WEEKS, DAYS_IN_WEEK, SECONDS_IN_HOUR
 from src.domain.metrics import SleepMetrics, SleepScoreMetrics
 from src.infra.garmin.dtos.garmin_sleep_response import SleepEntry
+from src.infra.plotting import calendar_plot
+from src.infra.plotting.figure_templates import FigureTemplate
 from src.utils import get_moving_average
 
 logger = logging.getLogger(__name__)
@@ -78,84 +84,159 @@ class SleepEachDay(NamedTuple):
         )
 
 
+# Sleep score for each day
+class SleepScores(NamedTuple):
+    dates: Sequence[datetime.date]
+    values: Sequence[float]
+
+
+# Compact plotting data (plain dates and numbers), such that it can be sent to a render worker process
+class SleepPlotData(NamedTuple):
+    sleep: SleepEachDay
+    sleep_score: SleepScores
+    ma_window_size: int  # Window size of moving average
+
+
+def to_plot_data(
+    sleep: SleepMetrics,
+    sleep_score: SleepScoreMetrics,
+    ma_window_size: int,
+) -> SleepPlotData:
+    return SleepPlotData(
+        sleep=_transform_sleep_stages(sleep, ma_window_size),
+        sleep_score=SleepScores(
+            dates=[entry.calendarDate for entry in sleep_score.entries],
+            values=[entry.value for entry in sleep_score.entries],
+        ),
+        ma_window_size=ma_window_size,
+    )
+
+
+# Plots with same number of days in each chart share the figure layout
+def template_key(data: SleepPlotData) -> Hashable:
+    return (
+        len(data.sleep.dates[-DAYS_IN_WEEK:]),
+        len(data.sleep.dates[-DAYS_IN_FOUR_WEEKS:]),
+        len(data.sleep_score.dates[-DAYS_IN_WEEK:]),
+        _to_waffle_grid(data.sleep_score).shape,
+        data.ma_window_size,
+    )
+
+
 # Create plot with 3 subplots:
 # Row 1 (1 plot): Sleep stages for the last 7 days
 # Row 2 (2 plots):
 # - 7-day moving average stacked area chart for each sleep stage for the last 4 weeks
 # - Sleep score waffle chart for the last 4 weeks
-def plot(
-    sleep: SleepMetrics,
-    sleep_score: SleepScoreMetrics,
-    ma_window_size: int,  # Window size of moving average
-) -> Figure:
-    fig = plt.figure(figsize=PLOT_SIZE)
-    gs = GridSpec(2, 2, width_ratios=[1, 0.5], height_ratios=[3, 2])  # type: ignore
-    week_plot = plt.subplot(gs[0, :])  # merge columns in this row
-    four_weeks_plot = plt.subplot(gs[1, 0])
-    waffle_plot = plt.subplot(gs[1, 1])
-
-    sleep_plotting_data = _transform_sleep_stages(sleep, ma_window_size)
-
-    # Chart 1 - Sleep stages for the last 7 days
-    week_data = sleep_plotting_data.get_last_n(DAYS_IN_WEEK)
-    plot_daily_stages(week_plot, week_data)
-    score_plot: Axes = week_plot.twinx()  # type: ignore
-    plot_scores_dot(score_plot, sleep_score, limit=DAYS_IN_WEEK)
-
-    # Chart 2 - 7-day moving average stacked area chart for each sleep stage for the last 4 weeks
-    four_weeks_data = sleep_plotting_data.get_last_n(DAYS_IN_FOUR_WEEKS)
-    plot_moving_avg_stages(four_weeks_plot, four_weeks_data)
-    plot_scores_line(
-        four_weeks_plot,
-        sleep_score,
-        ma_window_size,
-        limit=DAYS_IN_FOUR_WEEKS,
-    )
+class SleepPlotTemplate(FigureTemplate[SleepPlotData]):
+    def __init__(self, data: SleepPlotData):
+        super().__init__(Figure(figsize=PLOT_SIZE))
+        sleep_score = data.sleep_score
+        ma_window_size = data.ma_window_size
+
+        fig = self.figure
+        gs = GridSpec(2, 2, figure=fig, width_ratios=[1, 0.5], height_ratios=[3, 2])  # type: ignore
+        week_plot = fig.add_subplot(gs[0, :])  # merge columns in this row
+        four_weeks_plot = fig.add_subplot(gs[1, 0])
+        waffle_plot = fig.add_subplot(gs[1, 1])
+
+        sleep_plotting_data = data.sleep
+
+        # Chart 1 - Sleep stages for the last 7 days
+        week_data = sleep_plotting_data.get_last_n(DAYS_IN_WEEK)
+        self._daily_stages = plot_daily_stages(week_plot, week_data)
+        score_plot: Axes = week_plot.twinx()  # type: ignore
+        (self._scores_dot,) = plot_scores_dot(
+            score_plot, sleep_score, limit=DAYS_IN_WEEK
+        )
 
-    # Chart 3 - Sleep score waffle chart for the last 4 weeks
-    _plot_waffle_chart_sleep_score(waffle_plot, sleep_score)
-    # _plot_waffle_chart_sleep_duration(waffle_plot, dto_sleep_duration)
-
-    handles, labels = week_plot.get_legend_handles_labels()
-    handles_score, labels_score = score_plot.get_legend_handles_labels()
-    week_plot.legend(
-        handles + handles_score,
-        labels + labels_score,
-        fontsize="small",
-        loc="upper left",
-    )
+        # Chart 2 - 7-day moving average stacked area chart for each sleep stage for the last 4 weeks
+        four_weeks_data = sleep_plotting_data.get_last_n(DAYS_IN_FOUR_WEEKS)
+        self._moving_avg_stages = plot_moving_avg_stages(
+            four_weeks_plot, four_weeks_data
+        )
+        self._scores_line = plot_scores_line(
+            four_weeks_plot,
+            sleep_score,
+            ma_window_size,
+            limit=DAYS_IN_FOUR_WEEKS,
+        )
+
+        # Chart 3 - Sleep score waffle chart for the last 4 weeks
+        self._waffle_plot = waffle_plot
+        self._waffle_cells = _plot_waffle_chart_sleep_score(waffle_plot, sleep_score)
+        # _plot_waffle_chart_sleep_duration(waffle_plot, dto_sleep_duration)
+
+        handles, labels = week_plot.get_legend_handles_labels()
+        handles_score, labels_score = score_plot.get_legend_handles_labels()
+        legend = week_plot.legend(
+            handles + handles_score,
+            labels + labels_score,
+            fontsize="small",
+            loc="upper left",
+        )
+        # Average is the only legend entry depending on the data
+        self._avg_label = legend.get_texts()[handles.index(self._daily_stages.avg_line)]
+
+        fig.tight_layout()
+
+    # Replace the data of each chart. Layout is kept from when the template was built
+    def update(self, data: SleepPlotData) -> None:
+        sleep_score = data.sleep_score
+
+        week_data = data.sleep.get_last_n(DAYS_IN_WEEK)
+        _update_daily_stages(self._daily_stages, week_data)
+        self._avg_label.set_text(f"Average: {week_data.avg_total_sleep:.1f}")
+        _update_line(
+            self._scores_dot,
+            sleep_score.dates[-DAYS_IN_WEEK:],
+            sleep_score.values[-DAYS_IN_WEEK:],
+        )
+
+        four_weeks_data = data.sleep.get_last_n(DAYS_IN_FOUR_WEEKS)
+        _update_moving_avg_stages(self._moving_avg_stages, four_weeks_data)
+        _update_line(
+            self._scores_line,
+            sleep_score.dates[-DAYS_IN_FOUR_WEEKS:],
+            get_moving_average(
+                sleep_score.values[-DAYS_IN_FOUR_WEEKS:], data.ma_window_size
+            ),
+        )
 
-    fig.tight_layout()
+        self._waffle_cells.set_values(_to_waffle_grid(sleep_score))
+        self._waffle_plot.set_title(_waffle_title(sleep_score))
 
-    return fig
+
+def plot(data: SleepPlotData) -> Figure:
+    return SleepPlotTemplate(data).figure
 
 
 def plot_scores_line(
     full_plot: Axes,
-    sleep_score: SleepScoreMetrics,
+    sleep_score: SleepScores,
     ma_window_size: int,
     limit: int,
 ):
     # Get plot with sleep score on its own y-axis
     score_plot_ma: Axes = full_plot.twinx()  # type: ignore
 
-    score_plot_ma.plot(
-        [entry.calendarDate for entry in sleep_score.entries[-limit:]],  # type: ignore
-        get_moving_average(  # type: ignore
-            [entry.value for entry in sleep_score.entries[-limit:]], ma_window_size
-        ),
+    (line,) = score_plot_ma.plot(
+        sleep_score.dates[-limit:],  # type: ignore
+        get_moving_average(sleep_score.values[-limit:], ma_window_size),  # type: ignore
         color="black",
         label="Sleep Score",
     )
 
     score_plot_ma.set_ylabel("Sleep Score (0-100)", color="black")
 
+    return line
+
 
-def plot_scores_dot(score_plot: Axes, sleep_score: SleepScoreMetrics, limit: int):
+def plot_scores_dot(score_plot: Axes, sleep_score: SleepScores, limit: int):
     # Plot sleep score with its own y-axis
     line = score_plot.plot(
-        [entry.calendarDate for entry in sleep_score.entries[-limit:]],  # type: ignore
-        [entry.value for entry in sleep_score.entries[-limit:]],  # type: ignore
+        sleep_score.dates[-limit:],  # type: ignore
+        sleep_score.values[-limit:],  # type: ignore
         color="black",
         label="Sleep Score",
         marker="o",
@@ -168,11 +249,22 @@ def plot_scores_dot(score_plot: Axes, sleep_score: SleepScoreMetrics, limit: int
     return line
 
 
-def plot_daily_stages(week_plot: Axes, plotting_data: SleepEachDay):
+# Artists of the daily sleep stages chart that are updated with new data
+class DailyStagesArtists(NamedTuple):
+    ax: Axes
+    stage_bars: Sequence[BarContainer]
+    avg_line: Line2D
+    bar_labels: list[Text]
+
+
+def plot_daily_stages(
+    week_plot: Axes, plotting_data: SleepEachDay
+) -> DailyStagesArtists:
     # Keep track of current bottom of each bar
     bar_bottoms = [0] * len(plotting_data.dates)
 
     # Iterate each stage and plot all bars i.e. all days for that stage
+    stage_bars: list[BarContainer] = []
     for segment in plotting_data.sleep_stages:
         bar = week_plot.bar(
             x=plotting_data.dates,  # type: ignore
@@ -183,6 +275,7 @@ def plot_daily_stages(week_plot: Axes, plotting_data: SleepEachDay):
             # alpha=ALPHA,
             # width=bar_width,
         )
+        stage_bars.append(bar)
         # Add current segment values to the bar buttoms
         bar_bottoms = [sum(x) for x in zip(bar_bottoms, segment.values)]
 
@@ -190,7 +283,7 @@ def plot_daily_stages(week_plot: Axes, plotting_data: SleepEachDay):
     week_plot.axhline(y=8, color="r", linestyle="--", label="8-hour Target")
 
     # Add average line
-    week_plot.axhline(
+    avg_line = week_plot.axhline(
         y=plotting_data.avg_total_sleep,
         color="gray",
         linestyle="--",
@@ -198,8 +291,7 @@ def plot_daily_stages(week_plot: Axes, plotting_data: SleepEachDay):
     )
 
     # Add bar value to the top of each bar
-    bars = week_plot.containers  # type: ignore
-    week_plot.bar_label(bars[-1], fmt="%.1f")  # type: ignore
+    bar_labels = week_plot.bar_label(stage_bars[-1], fmt="%.1f")
 
     # Set the formatter for x-axis to display both day name and day/month
     formatter = mdates.DateFormatter("%A\n%d/%m")
@@ -211,9 +303,49 @@ def plot_daily_stages(week_plot: Axes, plotting_data: SleepEachDay):
 
     week_plot.grid(axis="y", alpha=0.5, linestyle="--")
 
+    return DailyStagesArtists(week_plot, stage_bars, avg_line, bar_labels)
+
+
+def _update_daily_stages(artists: DailyStagesArtists, plotting_data: SleepEachDay):
+    # Bars are positioned by date number (days), centered on the date
+    x = mdates.date2num(plotting_data.dates)  # type: ignore
+    bar_bottoms = np.zeros(len(plotting_data.dates))
+    for bars, segment in zip(artists.stage_bars, plotting_data.sleep_stages):
+        for rect, x_val, bottom, height in zip(bars, x, bar_bottoms, segment.values):
+            rect.set_x(x_val - rect.get_width() / 2)
+            rect.set_y(bottom)
+            rect.set_height(height)
+            # Autoscaling adds no margin beyond the bottom of a bar (sticky edge). Move it with the bar, such that the limits match a fresh render
+            rect.sticky_edges.y[:] = [bottom]
+        bar_bottoms = bar_bottoms + np.array(segment.values)
 
-def plot_moving_avg_stages(plot: Axes, plotting_data: SleepEachDay):
-    plot.stackplot(
+    artists.avg_line.set_ydata(
+        [plotting_data.avg_total_sleep, plotting_data.avg_total_sleep]
+    )
+
+    # Bar labels show the total of the stacked bars
+    for label in artists.bar_labels:
+        label.remove()
+    artists.bar_labels[:] = artists.ax.bar_label(artists.stage_bars[-1], fmt="%.1f")
+
+    artists.ax.relim()
+    artists.ax.autoscale_view()
+
+
+# Replaces line data and rescales the axes of the line. None values are not drawn
+def _update_line(
+    line: Line2D, dates: Sequence[datetime.date], values: Sequence[float | None]
+):
+    line.set_data(dates, np.array(values, dtype=float))
+    ax = line.axes
+    ax.relim()
+    ax.autoscale_view()
+
+
+def plot_moving_avg_stages(
+    plot: Axes, plotting_data: SleepEachDay
+) -> list[PolyCollection]:
+    stacks = plot.stackplot(
         # x axis is dates that where moving average is not None (i.e. not the first n days). We use the first segment, but should be the same for all
         [date for date, ma in zip(plotting_data.dates, plotting_data.sleep_stages[0].values_ma) if ma],  # type: ignore
         # y axis is the list of not None moving averages for each segment
@@ -234,6 +366,50 @@ def plot_moving_avg_stages(plot: Axes, plotting_data: SleepEachDay):
     fmt = mdates.DateFormatter("%d/%m")
     plot.xaxis.set_major_formatter(fmt)
 
+    return stacks
+
+
+# Replaces the stacked areas of the moving average chart. Areas are redrawn from the cumulative sum of the stages
+def _update_moving_avg_stages(
+    stacks: Sequence[PolyCollection], plotting_data: SleepEachDay
+):
+    has_ma = [bool(ma) for ma in plotting_data.sleep_stages[0].values_ma]
+    x = mdates.date2num(  # type: ignore
+        [date for date, keep in zip(plotting_data.dates, has_ma) if keep]
+    )
+    stage_values = np.array(
+        [
+            [val_ma for val_ma in segment.values_ma if val_ma]
+            for segment in plotting_data.sleep_stages
+        ],
+        dtype=float,
+    ).reshape(len(plotting_data.sleep_stages), len(x))
+    tops = np.cumsum(stage_values, axis=0)
+    bottoms = np.vstack((np.zeros(len(x)), tops[:-1]))
+
+    for stack, bottom, top in zip(stacks, bottoms, tops):
+        # Polygon along the top of the area and back along the bottom
+        stack.set_verts(
+            [
+                np.concatenate(
+                    (
+                        np.column_stack((x, top)),
+                        np.column_stack((x[::-1], bottom[::-1])),
+                    )
+                )
+            ]
+        )
+
+    # Areas (collections) are not included when recomputing data limits, so replace limits directly
+    ax = stacks[0].axes
+    ax.ignore_existing_data_limits = True
+    ax.update_datalim(
+        np.column_stack(
+            (np.concatenate((x, x)), np.concatenate((bottoms[0], tops[-1])))
+        )
+    )
+    ax.autoscale_view()
+
 
 # Tranform into suitable plotting data
 def _transform_sleep_stages(sleep: SleepMetrics, window_size: int) -> SleepEachDay:
@@ -295,32 +471,23 @@ def _transform_sleep_stages(sleep: SleepMetrics, window_size: int) -> SleepEachD
     )
 
 
-def _plot_waffle_chart_sleep_score(ax: Axes, model: SleepScoreMetrics):
-    # For any days missing in in the data, set sleep score to -1 (handled when creating the plot)
-    sleep_scores_lst: list[float] = []
-    for i, entry in enumerate(model.entries):
-        if i > 0:
-            # If there is a gap between two dates, fill it with -1
-            days_between = (entry.calendarDate - model.entries[i - 1].calendarDate).days
-            if days_between > 1:
-                sleep_scores_lst.extend([-1] * (days_between - 1))
-        sleep_scores_lst.append(entry.value)
-
-    # Create array of sleep scores
-    sleep_scores = np.array(
-        sleep_scores_lst,
-        dtype=float,
-    )
+# Each row represents all values for a particular weekday in the waffle chart (a sleep score, -1 if missing or nan)
+def _to_waffle_grid(model: SleepScores) -> npt.NDArray[np.float64]:
+    return calendar_plot.to_weekday_grid(model.dates, model.values)
 
-    start_day_idx = model.entries[0].calendarDate.weekday()
 
-    # Each array in weekday_rows represents all values for a particular weekday in the waffle chart (a sleep score or nan)
-    weekday_rows: npt.NDArray[np.float64] = _create_weekday_rows(
-        sleep_scores, start_day_idx
-    )
+def _waffle_title(model: SleepScores) -> str:
+    num_days = (model.dates[-1] - model.dates[0]).days + 1
+    return f"Sleep Scores (Last {num_days} Days)"
+
+
+def _plot_waffle_chart_sleep_score(
+    ax: Axes, model: SleepScores
+) -> calendar_plot.CalendarCells:
+    weekday_rows = _to_waffle_grid(model)
 
     # XXX: RdYlBu produces very distinct colors, I think this is the best one
-    colormap: LinearSegmentedColormap = plt.cm.RdYlBu  # type: ignore
+    colormap: LinearSegmentedColormap = colormaps["RdYlBu"]  # type: ignore
 
     # XXX: This colormap produces less distinct colors
     # colors_solid_red_yellow_green = [(1, 0.2, 0), (1, 1, 0), (0, 0.8, 0)]  # Solid R -> Solid Y -> Solid G
@@ -330,46 +497,33 @@ def _plot_waffle_chart_sleep_score(ax: Axes, model: SleepScoreMetrics):
     # ax.set_facecolor("lightgrey")  # type: ignore
     # ax.set_facecolor("#F0F0F0")  # type: ignore
 
-    padding = 0.4  # Determines the border radius of the rectangles
-    linewidth = 4  # Determines padding between rectangles (as border width)
+    gap = 0.15  # Space between rectangles (fraction of a cell)
+    corner_radius = 0.15  # Border radius of the rectangles (fraction of a cell)
     color_background = "white"
-    edgecolor = color_background  # Color of line
 
     # Create a custom normalization with the range of sleep scores (0 to 100)
     score_norm = Normalize(vmin=0, vmax=100, clip=True)  # Norm between 0 and 1
-    for week_num in range(weekday_rows.shape[1]):
-        for day_num in range(weekday_rows.shape[0]):
-            sleep_score: float = weekday_rows[day_num, week_num]
-            # Check if the value is not nan before drawing rectangle
-            if not np.isnan(sleep_score):
-                # Get color from colormap
-                square_color = colormap(score_norm(sleep_score))  # type: ignore
-
-                # White if sleep score is -1 (missing data)
-                if sleep_score == -1:
-                    square_color = "white"
-
-                rect = FancyBboxPatch(
-                    # Calc xy coordinates of square
-                    (week_num + padding / 2, DAYS_IN_WEEK - 1 - day_num + padding / 2),
-                    1 - padding,
-                    1 - padding,
-                    boxstyle="round,pad=" + str(padding / 2),
-                    facecolor=square_color,
-                    edgecolor=edgecolor,
-                    linewidth=linewidth,
-                )
-                ax.add_patch(rect)
+    # Missing days (-1) are white, cells outside the period (nan) are transparent
+    cells = calendar_plot.CalendarCells(
+        ax,
+        weekday_rows.shape,  # type: ignore
+        colormap,
+        score_norm,
+        missing_color="white",
+        gap=gap,
+        corner_radius=corner_radius,
+    )
+    cells.set_values(weekday_rows)
 
-    # Set axis limits and labels
-    ax.set_xlim(0, weekday_rows.shape[1])
-    ax.set_ylim(0, weekday_rows.shape[0])
+    # Set axis labels
+    num_weeks = weekday_rows.shape[1]
     ax.set_xlabel("Weeks")
-    ax.set_title(f"Sleep Scores (Last {len(sleep_scores)} Days)")
+    ax.set_title(_waffle_title(model))
 
-    # set x ticks such that they are in the middle of the week
-    ax.set_xticks(np.arange(0.5, weekday_rows.shape[1] + 0.5, 1))
-    ax.set_xticklabels(np.arange(1, weekday_rows.shape[1] + 1, 1))
+    # set x ticks such that they are in the middle of the week. Only label some of the weeks if many weeks
+    tick_step = max(num_weeks // 10, 1)
+    ax.set_xticks(np.arange(0.5, num_weeks + 0.5, tick_step))
+    ax.set_xticklabels(np.arange(1, num_weeks + 1, tick_step))
 
     # Remove border
     ax.spines["top"].set_visible(False)
@@ -394,7 +548,7 @@ def _plot_waffle_chart_sleep_score(ax: Axes, model: SleepScoreMetrics):
     # Adjust colorbar width with increased size
     divider = make_axes_locatable(ax)
     cax = divider.append_axes("right", size="10%", pad=0.2)  # size = Width of colorbar
-    cbar = plt.colorbar(plt.cm.ScalarMappable(cmap=colormap, norm=score_norm), cax=cax)  # type: ignore
+    cbar = cax.figure.colorbar(ScalarMappable(cmap=colormap, norm=score_norm), cax=cax)  # type: ignore
     cbar.set_label("Sleep Score (0-100)")
 
     # Set custom ticks and labels on the colorbar
@@ -409,19 +563,7 @@ def _plot_waffle_chart_sleep_score(ax: Axes, model: SleepScoreMetrics):
     # Adjust aspect ratio such that each rectangle is square shaped
     ax.set_aspect("equal")
 
-
-#
-def _create_weekday_rows(sleep_data: npt.NDArray[np.float64], start_day_idx: int):
-    num_weeks = (len(sleep_data) + start_day_idx) // DAYS_IN_WEEK
-    adjusted_weeks = np.full((num_weeks + 1, DAYS_IN_WEEK), np.nan)
-
-    day_indices = np.arange(len(sleep_data)) + start_day_idx
-    week_indices = day_indices // DAYS_IN_WEEK
-    day_positions = day_indices % DAYS_IN_WEEK
-
-    adjusted_weeks[week_indices, day_positions] = sleep_data
-
-    return adjusted_weeks.T
+    return cells
 
 
 # XXX: Waffle chart for sleep duration not used ATM. -> Refactor to use same code as sleep score if needed
@@ -454,7 +596,7 @@ def _plot_waffle_chart_sleep_duration(plot: Axes, dto: SleepMetrics):
     transition_point = 8.0
 
     # Get the RdYlBu colormap
-    rdylbu = plt.cm.RdYlBu  # type: ignore
+    rdylbu = colormaps["RdYlBu"]
 
     # Extract colors that correspond to 0 to 8 hours from the RdYlBu colormap
     colors_for_0_to_8 = rdylbu(np.linspace(0, 1, int(256 * (transition_point / 12.0))))  # type: ignore
@@ -483,7 +625,7 @@ def _plot_waffle_chart_sleep_duration(plot: Axes, dto: SleepMetrics):
                 sleep_duration
             ):  # Check if the value is not nan before drawing rectangle
                 color = final_cmap(new_norm(sleep_duration))  # type: ignore
-                rect = plt.Rectangle(  # type: ignore
+                rect = Rectangle(
                     (week, 6 - day),
                     1,
                     1,
@@ -507,7 +649,7 @@ def _plot_waffle_chart_sleep_duration(plot: Axes, dto: SleepMetrics):
     plot.grid(False)
 
     # Add colorbar with the final colormap and normalization
-    cbar = plt.colorbar(plt.cm.ScalarMappable(cmap=final_cmap, norm=new_norm), ax=plot)
+    cbar = plot.figure.colorbar(ScalarMappable(cmap=final_cmap, norm=new_norm), ax=plot)  # type: ignore
     cbar.set_label("Sleep Duration (hours)")
 
     # Set custom ticks and labels on the colorbar
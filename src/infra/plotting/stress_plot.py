@@ -3,7 +3,6 @@ from enum import Enum
 from typing import NamedTuple, Sequence
 
 import matplotlib.dates as mdates
-from matplotlib import pyplot as plt
 from matplotlib.axes import Axes
 from matplotlib.figure import Figure
 
@@ -110,8 +109,8 @@ def plot(
     # Keep track of current bottom of each bar
     bar_bottoms = [0] * len(plotting_data.dates)
 
-    fig, ax = plt.subplots()
-    ax: Axes
+    fig = Figure()
+    ax: Axes = fig.add_subplot()
 
     # Iterate each stress segment and plot all bars for that segment
     for segment in plotting_data.stress_segments:
@@ -134,4 +133,4 @@ def plot(
     fmt = mdates.DateFormatter("%d/%m")
     ax.xaxis.set_major_formatter(fmt)
 
-    return plot
+    return fig
@@ -0,0 +1,190 @@
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+from datetime import date
+from enum import Enum
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    account_id TEXT NOT NULL,
+    summary_date TEXT NOT NULL,
+    summary_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    summary BLOB,
+    delivered_parts TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (account_id, summary_date, summary_type)
+);
+"""
+
+
+class SummaryType(Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+
+
+class DeliveryStatus(Enum):
+    PREPARED = "prepared"  # Summary created ahead of notify time, held until then
+    PENDING = "pending"  # Summary created, but not all parts delivered
+    DELIVERED = "delivered"
+
+
+class DeliveryRecord(NamedTuple):
+    status: DeliveryStatus
+    # Summary as created, such that delivery can resume without fetching it again
+    summary: Optional[Any]
+    delivered_parts: frozenset[str]  # E.g. embed and plot ids
+
+
+# Identifies the parts of a summary sent in a message, such that they can be recorded as delivered once the message is actually delivered (e.g. by the outbox)
+class DeliveryKey(NamedTuple):
+    summary_date: date
+    summary_type: SummaryType
+    parts: tuple[str, ...]
+
+    def serialize(self) -> str:
+        return json.dumps(
+            [self.summary_date.isoformat(), self.summary_type.value, self.parts]
+        )
+
+    @staticmethod
+    def parse(key: str) -> "DeliveryKey":
+        summary_date, summary_type, parts = json.loads(key)
+        return DeliveryKey(
+            date.fromisoformat(summary_date), SummaryType(summary_type), tuple(parts)
+        )
+
+
+# Records the summaries delivered for each account and date (sqlite), such that a summary is never delivered twice (e.g. if restarted after notify time)
+# and a partially delivered summary is resumed from the stored summary instead of fetching and rendering it again
+# If no file path is provided, the ledger is only kept in memory
+class DeliveryLedger:
+    def __init__(self, account_id: str, file_path: Optional[Path] = None):
+        super().__init__()
+        self._account_id = account_id
+        self._connection = sqlite3.connect(
+            file_path or ":memory:", check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def get(
+        self, summary_date: date, summary_type: SummaryType
+    ) -> Optional[DeliveryRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, summary, delivered_parts FROM deliveries WHERE account_id = ? AND summary_date = ? AND summary_type = ?",
+                self._key(summary_date, summary_type),
+            ).fetchone()
+        if not row:
+            return None
+
+        status, summary, delivered_parts = row
+        return DeliveryRecord(
+            DeliveryStatus(status),
+            self._load_summary(summary) if summary else None,
+            frozenset(json.loads(delivered_parts)),
+        )
+
+    def is_delivered(self, summary_date: date, summary_type: SummaryType) -> bool:
+        record = self.get(summary_date, summary_type)
+        return record is not None and record.status == DeliveryStatus.DELIVERED
+
+    # Records the summary before its delivery starts. If already recorded, the summary is replaced, and its delivered parts are kept
+    # Only the most recent summary of each type is kept, older (delivered) records only keep their status
+    def start(
+        self, summary_date: date, summary_type: SummaryType, summary: Any
+    ) -> None:
+        self._record(summary_date, summary_type, summary, DeliveryStatus.PENDING)
+
+    # Records a summary held until notify time, such that it is delivered without fetching it again (e.g. after a restart)
+    def prepare(
+        self, summary_date: date, summary_type: SummaryType, summary: Any
+    ) -> None:
+        self._record(summary_date, summary_type, summary, DeliveryStatus.PREPARED)
+
+    def add_delivered_parts(
+        self, summary_date: date, summary_type: SummaryType, parts: Iterable[str]
+    ) -> None:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT delivered_parts FROM deliveries WHERE account_id = ? AND summary_date = ? AND summary_type = ?",
+                self._key(summary_date, summary_type),
+            ).fetchone()
+            if not row:
+                return
+            delivered_parts = set(json.loads(row[0])) | set(parts)
+            self._connection.execute(
+                "UPDATE deliveries SET delivered_parts = ? WHERE account_id = ? AND summary_date = ? AND summary_type = ?",
+                (
+                    json.dumps(sorted(delivered_parts)),
+                    *self._key(summary_date, summary_type),
+                ),
+            )
+
+    # Records the parts of a delivered message, identified by its serialized delivery key
+    def add_delivered(self, delivery_key: str) -> None:
+        key = DeliveryKey.parse(delivery_key)
+        self.add_delivered_parts(key.summary_date, key.summary_type, key.parts)
+
+    def complete(self, summary_date: date, summary_type: SummaryType) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE deliveries SET status = ? WHERE account_id = ? AND summary_date = ? AND summary_type = ?",
+                (
+                    DeliveryStatus.DELIVERED.value,
+                    *self._key(summary_date, summary_type),
+                ),
+            )
+        logger.info(
+            f"Recorded {summary_type.value} summary for {summary_date.isoformat()} as delivered"
+        )
+
+    # The status of an existing record only changes from prepared to pending
+    def _record(
+        self,
+        summary_date: date,
+        summary_type: SummaryType,
+        summary: Any,
+        status: DeliveryStatus,
+    ) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE deliveries SET summary = NULL WHERE account_id = ? AND summary_date < ? AND summary_type = ? AND status = ?",
+                (
+                    *self._key(summary_date, summary_type),
+                    DeliveryStatus.DELIVERED.value,
+                ),
+            )
+            self._connection.execute(
+                """
+                INSERT INTO deliveries (account_id, summary_date, summary_type, status, summary) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (account_id, summary_date, summary_type) DO UPDATE SET summary = excluded.summary,
+                    status = CASE WHEN status = ? THEN excluded.status ELSE status END
+                """,
+                (
+                    *self._key(summary_date, summary_type),
+                    status.value,
+                    pickle.dumps(summary),
+                    DeliveryStatus.PREPARED.value,
+                ),
+            )
+
+    def _key(
+        self, summary_date: date, summary_type: SummaryType
+    ) -> tuple[str, str, str]:
+        return (self._account_id, summary_date.isoformat(), summary_type.value)
+
+    # A summary stored by an incompatible version is ignored (i.e. it is fetched again)
+    def _load_summary(self, summary: bytes) -> Optional[Any]:
+        try:
+            return pickle.loads(summary)
+        except Exception as e:
+            logger.warning(f"Failed to load stored summary: {e}")
+            return None
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    webhook_url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    delivery_key TEXT
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    message_id INTEGER NOT NULL REFERENCES messages(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    blob_hash TEXT NOT NULL REFERENCES blobs(hash),
+    PRIMARY KEY (message_id, position)
+);
+CREATE INDEX IF NOT EXISTS messages_by_status ON messages(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS attachments_by_blob ON attachments(blob_hash);
+"""
+
+_PENDING = "pending"
+_SENDING = "sending"
+_FAILED = "failed"
+
+
+# Webhook request waiting to be delivered
+class OutboxMessage(NamedTuple):
+    id: int
+    webhook_url: str
+    payload: dict[str, Any]  # Json body of the webhook request
+    files: list[tuple[str, bytes]]  # File name and content of each attachment
+    attempts: int  # Number of failed delivery attempts
+    # Identifies the content of the message, e.g. the summary parts it delivers. Shared by the messages of each destination
+    delivery_key: Optional[str]
+
+
+# Durable queue of webhook requests (sqlite), such that messages survive Discord outages and restarts
+# Messages to the same webhook are delivered in the order they were added
+# Attachment content is stored once by its hash, such that an image sent to multiple webhooks is only stored once
+# If no file path is provided, the queue is only kept in memory
+class DiscordOutbox:
+    def __init__(self, file_path: Optional[Path] = None):
+        super().__init__()
+        # A single connection shared by all threads. Sqlite serializes writes anyway
+        self._connection = sqlite3.connect(
+            file_path or ":memory:", check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        # Notified when a message is added
+        self._message_added = threading.Condition(self._lock)
+        self._setup(file_path)
+
+    # Adds a message for each webhook. Returns the message ids
+    def put(
+        self,
+        webhook_urls: Sequence[str],
+        payload: dict[str, Any],
+        files: Sequence[tuple[str, bytes]],
+        now: float,
+        delivery_key: Optional[str] = None,
+    ) -> list[int]:
+        payload_json = json.dumps(payload)
+        blob_hashes = [hashlib.sha256(data).hexdigest() for _, data in files]
+        message_ids: list[int] = []
+        with self._lock, self._transaction():
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+                [(blob_hash, data) for blob_hash, (_, data) in zip(blob_hashes, files)],
+            )
+            for webhook_url in webhook_urls:
+                cursor = self._connection.execute(
+                    "INSERT INTO messages (webhook_url, payload, next_attempt_at, delivery_key) VALUES (?, ?, ?, ?)",
+                    (webhook_url, payload_json, now, delivery_key),
+                )
+                message_id: int = cursor.lastrowid  # type: ignore
+                self._connection.executemany(
+                    "INSERT INTO attachments (message_id, position, file_name, blob_hash) VALUES (?, ?, ?, ?)",
+                    [
+                        (message_id, position, file_name, blob_hash)
+                        for position, ((file_name, _), blob_hash) in enumerate(
+                            zip(files, blob_hashes)
+                        )
+                    ],
+                )
+                message_ids.append(message_id)
+            self._message_added.notify_all()
+        logger.info(f"Added messages {message_ids} with {len(files)} files to outbox")
+        return message_ids
+
+    # Claims the oldest message due for delivery, skipping webhooks with an earlier message still pending or being sent
+    def claim_next(self, now: float) -> Optional[OutboxMessage]:
+        with self._lock, self._transaction():
+            row = self._connection.execute(
+                """
+                SELECT id, webhook_url, payload, attempts, delivery_key FROM messages AS m
+                WHERE status = ? AND next_attempt_at <= ? AND NOT EXISTS (
+                    SELECT 1 FROM messages AS earlier
+                    WHERE earlier.webhook_url = m.webhook_url AND earlier.id < m.id AND earlier.status IN (?, ?)
+                )
+                ORDER BY id LIMIT 1
+                """,
+                (_PENDING, now, _PENDING, _SENDING),
+            ).fetchone()
+            if not row:
+                return None
+
+            message_id, webhook_url, payload, attempts, delivery_key = row
+            self._connection.execute(
+                "UPDATE messages SET status = ? WHERE id = ?", (_SENDING, message_id)
+            )
+            files = self._connection.execute(
+                """
+                SELECT file_name, data FROM attachments JOIN blobs ON blobs.hash = attachments.blob_hash
+                WHERE message_id = ? ORDER BY position
+                """,
+                (message_id,),
+            ).fetchall()
+        return OutboxMessage(
+            message_id, webhook_url, json.loads(payload), files, attempts, delivery_key
+        )
+
+    # Delivered messages are removed, including content no longer attached to any message
+    def complete(self, message_id: int) -> None:
+        with self._lock, self._transaction():
+            blob_hashes = self._connection.execute(
+                "SELECT blob_hash FROM attachments WHERE message_id = ?", (message_id,)
+            ).fetchall()
+            self._connection.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+            self._connection.executemany(
+                """
+                DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (
+                    SELECT 1 FROM attachments WHERE attachments.blob_hash = blobs.hash
+                )
+                """,
+                blob_hashes,
+            )
+
+    def retry_later(self, message_id: int, next_attempt_at: float, error: str) -> None:
+        with self._lock, self._transaction():
+            self._connection.execute(
+                "UPDATE messages SET status = ?, attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (_PENDING, next_attempt_at, error, message_id),
+            )
+            self._message_added.notify_all()
+
+    # Delays the message without counting it as a failed attempt (e.g. if rate limited)
+    def postpone(self, message_id: int, next_attempt_at: float) -> None:
+        with self._lock, self._transaction():
+            self._connection.execute(
+                "UPDATE messages SET status = ?, next_attempt_at = ? WHERE id = ?",
+                (_PENDING, next_attempt_at, message_id),
+            )
+            self._message_added.notify_all()
+
+    # Failed messages are kept for inspection, but never retried. Later messages to the same webhook are no longer blocked
+    def fail(self, message_id: int, error: str) -> None:
+        with self._lock, self._transaction():
+            self._connection.execute(
+                "UPDATE messages SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (_FAILED, error, message_id),
+            )
+
+    # Blocks until a message is added or the timeout (seconds) expires
+    def wait(self, timeout: float) -> None:
+        with self._message_added:
+            self._message_added.wait(timeout)
+
+    # Delivery keys of messages not yet delivered to every destination (failed messages excluded)
+    def get_queued_delivery_keys(self) -> set[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT delivery_key FROM messages WHERE delivery_key IS NOT NULL AND status IN (?, ?)",
+                (_PENDING, _SENDING),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    # Time of the earliest pending delivery attempt, if any
+    def get_next_attempt_time(self) -> Optional[float]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MIN(next_attempt_at) FROM messages WHERE status = ?",
+                (_PENDING,),
+            ).fetchone()
+        return row[0]
+
+    def _transaction(self) -> sqlite3.Connection:
+        # Connection context manager commits, or rolls back on exception
+        self._connection.execute("BEGIN")
+        return self._connection
+
+    def _setup(self, file_path: Optional[Path]) -> None:
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        if file_path:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(_SCHEMA)
+        # Outboxes created before delivery keys were added
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(messages)")
+        ]
+        if "delivery_key" not in columns:
+            self._connection.execute(
+                "ALTER TABLE messages ADD COLUMN delivery_key TEXT"
+            )
+
+        # Messages being sent when the program stopped are sent again
+        cursor = self._connection.execute(
+            "UPDATE messages SET status = ? WHERE status = ?", (_PENDING, _SENDING)
+        )
+        num_pending = self._connection.execute(
+            "SELECT COUNT(*) FROM messages WHERE status = ?", (_PENDING,)
+        ).fetchone()[0]
+        if file_path:
+            logger.info(
+                f"Loaded outbox from '{file_path}' with {num_pending} pending messages ({cursor.rowcount} interrupted)"
+            )
@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of previous outcomes for each new outcome, such that recent days count more (e.g. if the watch or sleep habits change)
+DECAY = 0.95
+
+
+# Persists, for each metric, how often requested data was missing the target day as json
+# Counts decay exponentially. If no file path is provided, counts are only kept in memory
+class MissingDataStatsStore:
+    def __init__(self, file_path: Optional[Path] = None):
+        super().__init__()
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        # Decayed number of requests and of requests with missing data by metric key
+        self._data: dict[str, dict[str, float]] = self._load()
+
+    # Estimated probability (Laplace smoothed) that the data of the metric is missing when requested. 0.5 if never requested
+    def get_missing_probability(self, metric_key: str) -> float:
+        with self._lock:
+            counts = self._data.get(metric_key, {})
+            return (counts.get("missing", 0) + 1) / (counts.get("requests", 0) + 2)
+
+    def add(self, metric_key: str, is_missing: bool) -> None:
+        with self._lock:
+            counts = self._data.get(metric_key, {})
+            self._data[metric_key] = {
+                "requests": counts.get("requests", 0) * DECAY + 1,
+                "missing": counts.get("missing", 0) * DECAY + int(is_missing),
+            }
+            self._persist()
+
+    def _load(self) -> dict[str, dict[str, float]]:
+        if not self._file_path or not self._file_path.exists():
+            return {}
+
+        logger.info(f"Loading missing data statistics from '{self._file_path}'")
+        with open(self._file_path, "r") as f:
+            return json.load(f)
+
+    # Write to temporary file first, such that the file is never left half written
+    def _persist(self) -> None:
+        if not self._file_path:
+            return
+
+        tmp_path = self._file_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self._file_path)
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from src.domain.quantile_sketch import KllSketch
+
+logger = logging.getLogger(__name__)
+
+
+# Quantile sketches of a single metric, one per month such that any window of months can be merged
+class MetricSketches(NamedTuple):
+    last_date: Optional[date]  # Most recent date added to the sketches
+    monthly: dict[str, KllSketch]  # Key is month formatted as YYYY-MM
+
+
+# Persists quantile sketches for each metric as json
+# If no file path is provided, sketches are only kept in memory
+class QuantileSketchStore:
+    def __init__(self, file_path: Optional[Path] = None):
+        super().__init__()
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = self._load()
+
+    def get(self, metric_key: str) -> MetricSketches:
+        with self._lock:
+            metric_data = self._data.get(metric_key)
+            if not metric_data:
+                return MetricSketches(last_date=None, monthly={})
+
+            last_date = metric_data.get("last_date")
+            return MetricSketches(
+                last_date=date.fromisoformat(last_date) if last_date else None,
+                monthly={
+                    month: KllSketch.from_dict(sketch)
+                    for month, sketch in metric_data["monthly"].items()
+                },
+            )
+
+    def save(self, metric_key: str, sketches: MetricSketches) -> None:
+        with self._lock:
+            self._data[metric_key] = {
+                "last_date": sketches.last_date.isoformat()
+                if sketches.last_date
+                else None,
+                "monthly": {
+                    month: sketch.to_dict()
+                    for month, sketch in sketches.monthly.items()
+                },
+            }
+            self._persist()
+
+    def _load(self) -> dict[str, Any]:
+        if not self._file_path or not self._file_path.exists():
+            return {}
+
+        logger.info(f"Loading quantile sketches from '{self._file_path}'")
+        with open(self._file_path, "r") as f:
+            return json.load(f)
+
+    # Write to temporary file first, such that the file is never left half written
+    def _persist(self) -> None:
+        if not self._file_path:
+            return
+
+        tmp_path = self._file_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self._file_path)
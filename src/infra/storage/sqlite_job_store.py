@@ -0,0 +1,165 @@
+import logging
+import pickle
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from apscheduler.job import Job  # type: ignore
+from apscheduler.jobstores.base import BaseJobStore  # type: ignore
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp  # type: ignore
+from apscheduler.util import utc_timestamp_to_datetime
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    account_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    next_run_time REAL,
+    job_state BLOB NOT NULL,
+    PRIMARY KEY (account_id, id)
+);
+CREATE INDEX IF NOT EXISTS jobs_next_run_time ON jobs (account_id, next_run_time);
+"""
+
+
+# Stores the scheduler jobs of an account (sqlite), such that next run times (e.g. a planned retry) survive a restart
+# Same format as the job stores of apscheduler (pickled job state), which requires jobs to refer to module level functions
+# If no file path is provided, jobs are only kept in memory
+class SqliteJobStore(BaseJobStore):
+    def __init__(self, account_id: str, file_path: Optional[Path] = None):
+        super().__init__()
+        self._account_id = account_id
+        self._connection = sqlite3.connect(
+            file_path or ":memory:", check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    # State of a stored job as persisted (e.g. args and next run time), without restoring the job
+    # Available before the scheduler is started
+    def get_job_state(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT job_state FROM jobs WHERE account_id = ? AND id = ?",
+                (self._account_id, job_id),
+            ).fetchone()
+        if not row:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Failed to load stored job '{job_id}': {e}")
+            return None
+
+    # Ids of the stored jobs, without restoring the jobs
+    def get_job_ids(self) -> list[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id FROM jobs WHERE account_id = ?", (self._account_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def lookup_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT job_state FROM jobs WHERE account_id = ? AND id = ?",
+                (self._account_id, job_id),
+            ).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now: datetime) -> list[Job]:
+        return self._get_jobs(
+            "AND next_run_time <= ?", (datetime_to_utc_timestamp(now),)
+        )
+
+    def get_next_run_time(self) -> Optional[datetime]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MIN(next_run_time) FROM jobs WHERE account_id = ?",
+                (self._account_id,),
+            ).fetchone()
+        return utc_timestamp_to_datetime(row[0])
+
+    def get_all_jobs(self) -> list[Job]:
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job: Job) -> None:
+        try:
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT INTO jobs (account_id, id, next_run_time, job_state) VALUES (?, ?, ?, ?)",
+                    (self._account_id, job.id, *self._serialize(job)),
+                )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job: Job) -> None:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET next_run_time = ?, job_state = ? WHERE account_id = ? AND id = ?",
+                (*self._serialize(job), self._account_id, job.id),
+            )
+        if cursor.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id: str) -> None:
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "DELETE FROM jobs WHERE account_id = ? AND id = ?",
+                (self._account_id, job_id),
+            )
+        if cursor.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM jobs WHERE account_id = ?", (self._account_id,)
+            )
+
+    def _serialize(self, job: Job) -> tuple[Optional[float], bytes]:
+        return (
+            datetime_to_utc_timestamp(job.next_run_time),
+            pickle.dumps(job.__getstate__(), pickle.HIGHEST_PROTOCOL),
+        )
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        state = pickle.loads(job_state)
+        state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    # Jobs ordered by next run time (paused jobs last). Jobs that cannot be restored (e.g. stored by an incompatible version) are removed
+    def _get_jobs(self, condition: str = "", params: tuple = ()) -> list[Job]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id, job_state FROM jobs WHERE account_id = ? {condition} ORDER BY next_run_time",
+                (self._account_id, *params),
+            ).fetchall()
+
+        jobs = []
+        failed_job_ids = []
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except Exception:
+                logger.exception(f"Unable to restore job '{job_id}'. Removing it")
+                failed_job_ids.append(job_id)
+
+        if failed_job_ids:
+            with self._lock, self._connection:
+                self._connection.executemany(
+                    "DELETE FROM jobs WHERE account_id = ? AND id = ?",
+                    [(self._account_id, job_id) for job_id in failed_job_ids],
+                )
+        return jobs
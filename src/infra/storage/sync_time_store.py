@@ -0,0 +1,54 @@
+import json
+import logging
+import os
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of most recent days kept
+MAX_DAYS = 60
+
+
+# Persists the time of day (minutes after midnight, UTC) the data of each day became available as json
+# If no file path is provided, times are only kept in memory
+class SyncTimeStore:
+    def __init__(self, file_path: Optional[Path] = None):
+        super().__init__()
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._data: dict[str, int] = self._load()  # Minute of day by date
+
+    def get_minutes(self) -> list[int]:
+        with self._lock:
+            return list(self._data.values())
+
+    # Only the first time registered for a date is kept
+    def add(self, day: date, minute_of_day: int) -> None:
+        with self._lock:
+            if day.isoformat() in self._data:
+                return
+            self._data[day.isoformat()] = minute_of_day
+            for old_day in sorted(self._data)[:-MAX_DAYS]:
+                del self._data[old_day]
+            self._persist()
+
+    def _load(self) -> dict[str, int]:
+        if not self._file_path or not self._file_path.exists():
+            return {}
+
+        logger.info(f"Loading sync times from '{self._file_path}'")
+        with open(self._file_path, "r") as f:
+            return json.load(f)
+
+    # Write to temporary file first, such that the file is never left half written
+    def _persist(self) -> None:
+        if not self._file_path:
+            return
+
+        tmp_path = self._file_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self._file_path)
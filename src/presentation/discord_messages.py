@@ -1,13 +1,17 @@
 import enum
 import logging
-from datetime import date
 from typing import Sequence
 
 from discord_webhook import DiscordEmbed
 from table2ascii import Alignment, PresetStyle, table2ascii
 
 import src.presentation.view_models as view_models
-from src.presentation.view_models import HealthSummaryViewModel, MetricViewModel
+from src.presentation.view_models import (
+    HealthSummaryViewModel,
+    MetricViewModel,
+    WeeklyMetricViewModel,
+    WeeklySummaryViewModel,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -34,13 +38,26 @@ class DiscordExceptionMessage(DiscordEmbed):
 
 # Health summary discord dto/message
 class DiscordMessageBase(DiscordEmbed):
-    def __init__(self, date: date, description: str):
-        title = f"Garmin Health Metrics, {date.strftime('%d-%m-%Y')}"
+    def __init__(self, summary: HealthSummaryViewModel, description: str):
+        title = f"Garmin Health Metrics, {summary.date.strftime('%d-%m-%Y')}"
+        if summary.is_update:
+            title += " (update)"
         super().__init__(
             title=title,
             description=description,
             color=0x10A5E1,
         )
+        if summary.missing_metrics:
+            self.set_footer(
+                text=f"Not available yet: {', '.join(summary.missing_metrics)}"
+            )
+
+
+# Embed showing a plot attached to the same message
+class DiscordPlotMessage(DiscordEmbed):
+    def __init__(self, file_name: str):
+        super().__init__(color=0x10A5E1)
+        self.set_image(url=f"attachment://{file_name}")
 
 
 # Creates a discord message with metrics in a table
@@ -49,12 +66,14 @@ class DiscordMessageTable(DiscordMessageBase):
         view_models = summary.metrics
         style = PresetStyle.borderless
 
-        header = ["", "Value", "Δ Avg", "Week Avg", "Metric", "Δ Target"]
+        # Year percentile is the rank of the latest value within the last year
+        header = ["", "Value", "Δ Avg", "Week Avg", "Year %", "Metric", "Δ Target"]
         alignments = [
             Alignment.RIGHT,
             Alignment.RIGHT,
             Alignment.RIGHT,
             Alignment.RIGHT,
+            Alignment.RIGHT,
             Alignment.LEFT,
             Alignment.LEFT,
         ]
@@ -65,7 +84,7 @@ class DiscordMessageTable(DiscordMessageBase):
         table = table2ascii(header, body, style=style, alignments=alignments)
 
         table = f"```{table}```"
-        super().__init__(summary.date, table)
+        super().__init__(summary, table)
 
     def to_table_row(self, view_model: MetricViewModel) -> Sequence[str]:
         return [
@@ -73,6 +92,7 @@ class DiscordMessageTable(DiscordMessageBase):
             f"{view_model.latest}{view_model.out_of_max}",
             f"{view_model.diff_to_avg} {view_model.diff_to_avg_emoji}",
             f"{view_model.week_avg}{view_model.out_of_max}",
+            view_model.percentile_rank,
             view_model.name,
             # Avoid including target name. Will result in too long table row messing up the table
             f"{view_model.diff_to_target.diff}"
@@ -92,7 +112,7 @@ class DiscordMessageLines(DiscordMessageBase):
             if i % 2 == 1:
                 lines += "\n"
         lines = f"```{lines}```"
-        super().__init__(summary.date, lines)
+        super().__init__(summary, lines)
 
     def to_line(self, view_model: MetricViewModel) -> str:
         diff_to_target_str = (
@@ -100,7 +120,29 @@ class DiscordMessageLines(DiscordMessageBase):
             if view_model.diff_to_target
             else ""
         )
-        return f"```{view_model.icon} {view_model.name}: {view_model.latest}{view_model.out_of_max} - (weekly avg: {view_model.week_avg}{view_model.out_of_max}, Δ avg: {view_model.diff_to_avg}{diff_to_target_str})```"
+        percentile_str = (
+            f", year percentile: {view_model.percentile_rank}"
+            if view_model.percentile_rank
+            else ""
+        )
+        return f"```{view_model.icon} {view_model.name}: {view_model.latest}{view_model.out_of_max} - (weekly avg: {view_model.week_avg}{view_model.out_of_max}, Δ avg: {view_model.diff_to_avg}{diff_to_target_str}{percentile_str})```"
+
+
+# Creates a discord message with the weekly aggregates of each metric in a list
+class DiscordWeeklySummaryMessage(DiscordEmbed):
+    def __init__(self, summary: WeeklySummaryViewModel):
+        title = f"Garmin Weekly Summary, {summary.start_date.strftime('%d-%m-%Y')} - {summary.end_date.strftime('%d-%m-%Y')}"
+        lines = "".join(self.to_line(view_model) for view_model in summary.metrics)
+        if summary.stage_distribution:
+            lines += f"```🛌 Sleep Stages: {summary.stage_distribution}```"
+        super().__init__(
+            title=title,
+            description=f"```{lines}```",
+            color=0x10A5E1,
+        )
+
+    def to_line(self, view_model: WeeklyMetricViewModel) -> str:
+        return f"```{view_model.icon} {view_model.name}: {view_model.week_avg}{view_model.out_of_max} avg - (Δ prev week: {view_model.diff_to_prev_week} {view_model.diff_to_prev_week_emoji}, best: {view_model.best}, worst: {view_model.worst})```"
 
 
 # XXX: Not used atm. Maybe relevant if we change the table style
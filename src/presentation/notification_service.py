@@ -2,6 +2,7 @@ import logging
 from typing import Protocol
 
 from src.domain.metrics import HealthSummary
+from src.domain.weekly_summary import WeeklySummary
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +12,15 @@ class HealthSummaryAdapter(Protocol):
     def send_health_summary(self, summary: HealthSummary) -> None:
         ...
 
+    def prepare_health_summary(self, summary: HealthSummary) -> None:
+        ...
+
+    def send_late_metrics(self, summary: HealthSummary) -> None:
+        ...
+
+    def send_weekly_summary(self, summary: WeeklySummary) -> None:
+        ...
+
 
 class ErrorAdapter(Protocol):
     def send_exception(self, exception: Exception, stack_trace: str) -> None:
@@ -27,6 +37,18 @@ class HealthSummaryNotificationService:
         logger.info(f"Handling event: Health summary ready")
         self._health_summary_adapter.send_health_summary(summary)
 
+    def on_summary_prepare(self, summary: HealthSummary) -> None:
+        logger.info(f"Handling event: Health summary prepare")
+        self._health_summary_adapter.prepare_health_summary(summary)
+
+    def on_late_metrics_ready(self, summary: HealthSummary) -> None:
+        logger.info(f"Handling event: Late metrics ready")
+        self._health_summary_adapter.send_late_metrics(summary)
+
+    def on_weekly_summary_ready(self, summary: WeeklySummary) -> None:
+        logger.info(f"Handling event: Weekly summary ready")
+        self._health_summary_adapter.send_weekly_summary(summary)
+
 
 class ErrorNotificationService:
     def __init__(self, error_adapter: ErrorAdapter):
@@ -0,0 +1,91 @@
+import hmac
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from src.application.scheduler_service import TriggerResult
+
+logger = logging.getLogger(__name__)
+
+
+# Local http api triggering a fetch of today's summary right away, e.g. from a phone automation after the watch has synced
+# POST /trigger: Runs the fetch job now. Triggers while the job is running (or about to run) are deduplicated
+# GET /health: Returns 200 if the api is running
+class TriggerApi:
+    def __init__(
+        self,
+        trigger: Callable[[], TriggerResult],
+        host: str,
+        port: int,
+        # If provided, requests must include it as bearer token
+        token: Optional[str] = None,
+    ):
+        super().__init__()
+        self._trigger = trigger
+        self._token = token
+        self._server = ThreadingHTTPServer((host, port), self._create_handler())
+        # Daemon, such that the server does not keep the program running when the scheduler stops
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="trigger-api", daemon=True
+        )
+
+    def start(self) -> None:
+        host, port = self._server.server_address[:2]
+        logger.info(f"Starting trigger api on {host}:{port}")
+        self._thread.start()
+
+    def stop(self) -> None:
+        # NB: Shutdown waits for the server loop, so only if started
+        if self._thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+
+    def _is_authorized(self, authorization: Optional[str]) -> bool:
+        if not self._token:
+            return True
+        # Constant time comparison to avoid leaking the token through timing
+        return hmac.compare_digest(authorization or "", f"Bearer {self._token}")
+
+    def _create_handler(self) -> type[BaseHTTPRequestHandler]:
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path != "/health":
+                    self._send_json(404, {"error": "Not found"})
+                    return
+                self._send_json(200, {"status": "ok"})
+
+            def do_POST(self) -> None:
+                if self.path != "/trigger":
+                    self._send_json(404, {"error": "Not found"})
+                    return
+                if not api._is_authorized(self.headers.get("Authorization")):
+                    self._send_json(401, {"error": "Unauthorized"})
+                    return
+
+                try:
+                    result = api._trigger()
+                except Exception as e:
+                    logger.exception(f"Failed to trigger fetch job: {e}")
+                    self._send_json(500, {"error": str(e)})
+                    return
+
+                status_code = 202 if result == TriggerResult.SCHEDULED else 200
+                self._send_json(status_code, {"result": result.value})
+
+            def _send_json(self, status_code: int, body: dict[str, Any]) -> None:
+                content = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(f"{self.address_string()} - {format % args}")
+
+        return Handler
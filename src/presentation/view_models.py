@@ -1,14 +1,19 @@
+from concurrent.futures import Future
 from datetime import date, timedelta
-from io import BytesIO
-from typing import NamedTuple, Optional, Sequence
+from typing import Callable, NamedTuple, Optional, Sequence
 
 from src.domain.metrics import HrvMetrics, SimpleMetric, SleepMetrics
+from src.domain.weekly_summary import MetricWeekAggregate, SleepStageDistribution
 from src.infra.garmin.dtos.garmin_response import GarminResponseEntryDto
 
 
 class HealthSummaryViewModel(NamedTuple):
     date: date
     metrics: Sequence["MetricViewModel"]
+    # Names of the metrics not available yet (partial summary)
+    missing_metrics: Sequence[str] = ()
+    # Whether the summary only contains metrics missing in the summary already sent
+    is_update: bool = False
 
 
 class DiffToTarget(NamedTuple):
@@ -18,7 +23,23 @@ class DiffToTarget(NamedTuple):
 
 class MetricPlot(NamedTuple):
     id: str
-    data: BytesIO
+    data: bytes  # encoded image
+    file_extension: str = "png"
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.id}.{self.file_extension}"
+
+
+# Plot still being rendered
+class PendingPlot(NamedTuple):
+    id: str
+    data: Future[bytes]
+    file_extension: str = "png"
+
+    # Waits for rendering to complete
+    def result(self) -> MetricPlot:
+        return MetricPlot(self.id, self.data.result(), self.file_extension)
 
 
 class MetricViewModel(NamedTuple):
@@ -30,6 +51,25 @@ class MetricViewModel(NamedTuple):
     week_avg: str
     out_of_max: str = ""
     diff_to_target: DiffToTarget | None = None
+    percentile_rank: str = ""  # Rank of latest value within the last year
+
+
+class WeeklySummaryViewModel(NamedTuple):
+    start_date: date
+    end_date: date
+    metrics: Sequence["WeeklyMetricViewModel"]
+    stage_distribution: str | None = None
+
+
+class WeeklyMetricViewModel(NamedTuple):
+    name: str
+    icon: str
+    week_avg: str
+    diff_to_prev_week: str
+    diff_to_prev_week_emoji: str
+    best: str
+    worst: str
+    out_of_max: str = ""
 
 
 # Generic builder for SimpleMetric subtypes
@@ -112,6 +152,82 @@ def sleep_message(name: str, icon: str, sleep_metrics: SleepMetrics) -> MetricVi
     )
 
 
+# Generic builder for the aggregates of a metric for a week
+def weekly_metric_message(
+    name: str,
+    icon: str,
+    current: MetricWeekAggregate,
+    previous: Optional[MetricWeekAggregate],
+    format_value: Callable[[float, bool], str] | None = None,
+    with_max_val: Optional[int] = None,
+) -> WeeklyMetricViewModel:
+    format_value = format_value or format_number
+    out_of_max_str = f"/{with_max_val}" if with_max_val is not None else ""
+
+    # No data for previous week to compare to
+    diff_str = "N/A"
+    diff_emoji = ""
+    if previous:
+        diff = current.avg - previous.avg
+        diff_str = format_value(diff, True)
+        diff_emoji = _get_diff_emoji(current.is_higher_better, round(diff))
+
+    def day_value_str(value: float, date: date) -> str:
+        return f"{format_value(value, False)}{out_of_max_str} ({date.strftime('%a')})"
+
+    return WeeklyMetricViewModel(
+        name=name,
+        icon=icon,
+        week_avg=format_value(current.avg, False),
+        diff_to_prev_week=diff_str,
+        diff_to_prev_week_emoji=diff_emoji,
+        best=day_value_str(current.best.value, current.best.date),
+        worst=day_value_str(current.worst.value, current.worst.date),
+        out_of_max=out_of_max_str,
+    )
+
+
+# Builder for the share of each sleep stage, including change in percentage points since previous week
+def stage_distribution_message(
+    current: SleepStageDistribution, previous: Optional[SleepStageDistribution]
+) -> str:
+    names = ["Deep", "Light", "REM", "Awake"]
+    parts: list[str] = []
+    for idx, name in enumerate(names):
+        share = round(current[idx] * 100)
+        part = f"{name} {share}%"
+        if previous:
+            diff = share - round(previous[idx] * 100)
+            part += f" ({_value_to_signed_str(diff) if diff else '±0'})"
+        parts.append(part)
+    return ", ".join(parts)
+
+
+# Formats a numeric metric value
+def format_number(value: float, should_include_sign: bool = False) -> str:
+    if should_include_sign:
+        return _value_to_signed_str(round(value))
+    return str(round(value))
+
+
+# Formats a metric value given in seconds as a duration
+def format_seconds(value: float, should_include_sign: bool = False) -> str:
+    return _format_timedelta(timedelta(seconds=value), should_include_sign)
+
+
+# E.g. 90 -> "90th"
+def format_percentile_rank(rank: Optional[float]) -> str:
+    if rank is None:
+        return ""
+    rounded = round(rank)
+    suffix = (
+        "th"
+        if 11 <= rounded % 100 <= 13
+        else {1: "st", 2: "nd", 3: "rd"}.get(rounded % 10, "th")
+    )
+    return f"{rounded}{suffix}"
+
+
 def _value_to_signed_str(value: float) -> str:
     return f"{_get_sign(value)}{abs(value)}"
 
@@ -7,14 +7,18 @@ from pathlib import Path
 from typing import Any, Optional, Sequence
 from zoneinfo import ZoneInfo
 
-from pydantic import Field, validator
+from pydantic import BaseModel, Field, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from tzlocal import get_localzone
 
 import src.presentation.login_prompt as login
 from src import utils
+from src.setup.delivery_modes import DeliveryMode
 from src.setup.garmin_metrid_ids import GarminMetricId
+from src.setup.image_formats import ImageFormat
 from src.setup.message_formats import MessageFormat
+from src.setup.render_executors import RenderExecutor
+from src.setup.weekdays import Weekday
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,60 @@ class Credentials(BaseSettings):
     password: str = Field(default_factory=login.prompt_password)
 
 
+# Size limits of the rendered plot cache in megabytes. Disk cache is only used if a state directory is provided
+class PlotCacheConfig(BaseModel):
+    memory_mb: float = Field(default=32, ge=0)
+    disk_mb: float = Field(default=256, ge=0)
+
+
+# Encoding of rendered plots, and max total size of the plots sent in a single message
+class ImageEncodingConfig(BaseModel):
+    format: ImageFormat = ImageFormat.PNG
+    dpi: int = Field(default=100, gt=0)
+    png_compress_level: int = Field(default=6, ge=0, le=9)
+    # Number of colors in png palette. If 0, no quantization
+    quantize_colors: int = Field(default=0, ge=0, le=256)
+    quality: int = Field(default=85, ge=1, le=100)  # Webp/jpeg quality
+    # Discord rejects messages with attachments larger than 10 MB (without boost)
+    max_message_mb: float = Field(default=8, gt=0)
+
+
+# Delivery of discord messages through a durable outbox. If no workers, messages are sent directly by the scheduler job
+# Outbox is persisted in the state directory, if provided
+class OutboxConfig(BaseModel):
+    # Defaults to the number of webhook urls if a state directory is provided, such that all destinations are delivered to concurrently, else 0 (an outbox only kept in memory does not survive a restart)
+    workers: Optional[int] = Field(default=None, ge=0)
+    # Max delivery attempts of a message before it is discarded
+    max_attempts: int = Field(default=10, ge=1)
+
+
+# Local http api triggering a fetch right away. Disabled if no port
+class TriggerApiConfig(BaseModel):
+    port: Optional[int] = Field(default=None, ge=1, le=65535)
+    # Only reachable from this machine by default
+    host: str = "127.0.0.1"
+    # If provided, requests must include the header 'Authorization: Bearer <token>'
+    token: Optional[str] = None
+
+
+# Limits the load when several accounts (bot instances) use the same notify time
+class SchedulerConfig(BaseModel):
+    # Fetch job starts at a fixed time (derived from the account) within this many minutes before notify time. The summary is delivered at notify time. If 0, starts at notify time
+    start_spread_minutes: float = Field(default=0, ge=0)
+    # Max number of jobs running at the same time. Other jobs wait until a job completes
+    max_concurrent_jobs: int = Field(default=10, ge=1)
+    # Minutes before notify time the data is fetched and plots are rendered, such that the summary is delivered right at notify time. If 0, fetches at notify time
+    prefetch_lead_minutes: float = Field(default=0, ge=0)
+
+
+# Sending a summary without the metrics still missing some time after notify time, e.g. if a metric is never synced
+class PartialSummaryConfig(BaseModel):
+    # Minutes after notify time the summary is sent with the metrics available. If None, waits until all metrics are available
+    deadline_minutes: Optional[float] = Field(default=None, ge=0)
+    # Whether metrics missing in a partial summary are sent as an update when available (same day)
+    send_late_metrics: bool = False
+
+
 # Reads from environment variables
 class Config(BaseSettings):
     model_config = SettingsConfigDict(env_nested_delimiter="__")
@@ -37,12 +95,31 @@ class Config(BaseSettings):
         min_length=1, default_factory=lambda: [metric for metric in GarminMetricId]
     )
     webhook_url: str  # XXX: Should be type DiscordUrl
+    # Additional destinations. Summaries are rendered once and sent to all webhooks
+    webhook_urls: Sequence[str] = Field(default_factory=list)
     credentials: Credentials = Field(default_factory=Credentials)
     time_zone: str = Field(default_factory=lambda: get_localzone().key)  # type: ignore
     notify_time_of_day: time
     session_file_path: Optional[Path] = None
+    state_dir_path: Optional[Path] = None
     webhook_error_url: Optional[str] = None  # XXX: Should be type DiscordUrl
     message_format: MessageFormat
+    # Day to send an end of week summary (at notify time). If None, no weekly summary is sent
+    weekly_summary_day: Optional[Weekday] = None
+    # Number of worker processes rendering plots. If 0, plots are rendered in the scheduler thread
+    render_workers: int = Field(default=2, ge=0)
+    # Whether render workers are processes or threads
+    render_executor: RenderExecutor = RenderExecutor.PROCESS
+    plot_cache: PlotCacheConfig = Field(default_factory=PlotCacheConfig)
+    image_encoding: ImageEncodingConfig = Field(default_factory=ImageEncodingConfig)
+    # Whether the summary embed and plots are sent as separate messages (as soon as each is ready) or in a single message
+    delivery_mode: DeliveryMode = DeliveryMode.SEPARATE
+    outbox: OutboxConfig = Field(default_factory=OutboxConfig)
+    # Minutes a metric found missing the data of a day is not requested again by triggered fetches. Scheduled fetches always request it
+    missing_data_ttl_minutes: float = Field(default=3, ge=0)
+    trigger_api: TriggerApiConfig = Field(default_factory=TriggerApiConfig)
+    scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig)
+    partial_summary: PartialSummaryConfig = Field(default_factory=PartialSummaryConfig)
 
     @validator("metrics", pre=True)
     def validate_metrics(
@@ -60,6 +137,22 @@ class Config(BaseSettings):
         notify_time = _get_notify_time(notify_time, time_zone)
         return notify_time
 
+    # Day of the weekly summary in UTC, such that it matches the notify time (converted to UTC)
+    # E.g. monday 00:30 in UTC+2 is sunday 22:30 in UTC
+    @validator("weekly_summary_day")
+    def create_weekly_summary_day(
+        cls, weekly_summary_day: Optional[Weekday], values: dict[str, Any]
+    ) -> Optional[Weekday]:
+        notify_time: Optional[time] = values.get("notify_time_of_day")
+        if not weekly_summary_day or not notify_time:
+            return weekly_summary_day
+
+        day_shift = _get_utc_day_shift(notify_time, values["time_zone"])
+        weekdays = list(Weekday)
+        return weekdays[
+            (weekdays.index(weekly_summary_day) + day_shift) % len(weekdays)
+        ]
+
     @validator("session_file_path")
     def create_session_file_path(
         cls, session_file_path: Optional[Path], values: dict[str, Any]
@@ -72,6 +165,32 @@ class Config(BaseSettings):
         _ensure_dir_created_with_permissions(session_dir)
         return session_file_path
 
+    @validator("state_dir_path")
+    def create_state_dir_path(cls, state_dir_path: Optional[Path]) -> Path | None:
+        if not state_dir_path:
+            logger.warn("No state directory path provided. State is kept in memory.")
+            return None
+        state_dir = Path(state_dir_path).resolve()
+        _ensure_dir_created_with_permissions(state_dir)
+        return state_dir
+
+    # All destinations of the summaries, without duplicates
+    def get_webhook_urls(self) -> list[str]:
+        return list(dict.fromkeys([self.webhook_url, *self.webhook_urls]))
+
+    def get_outbox_workers(self) -> int:
+        if self.outbox.workers is None:
+            return len(self.get_webhook_urls()) if self.state_dir_path else 0
+        if self.outbox.workers > 0 and not self.state_dir_path:
+            logger.warn(
+                "No state directory path provided. Queued discord messages are lost on restart."
+            )
+        return self.outbox.workers
+
+    # Path of a file in the state directory, or None if state should only be kept in memory
+    def get_state_file_path(self, file_name: str) -> Path | None:
+        return self.state_dir_path / file_name if self.state_dir_path else None
+
 
 # Parses the time and converts it to UTC
 def _get_notify_time(time_obj: time, time_zone_str: str) -> time:
@@ -89,6 +208,18 @@ def _get_notify_time(time_obj: time, time_zone_str: str) -> time:
     return utc_dt.time()
 
 
+# Days between the local date and the UTC date at the given UTC time (-1, 0 or 1)
+def _get_utc_day_shift(utc_time: time, time_zone_str: str) -> int:
+    utc_dt = datetime.now(tz=ZoneInfo("UTC")).replace(
+        hour=utc_time.hour,
+        minute=utc_time.minute,
+        second=utc_time.second,
+        microsecond=utc_time.microsecond,
+    )
+    local_dt = utc_dt.astimezone(ZoneInfo(time_zone_str))
+    return (utc_dt.date() - local_dt.date()).days
+
+
 def get_config() -> Config:
     # Read config into environment
     utils.load_env()
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class DeliveryMode(Enum):
+    SEPARATE = "separate"
+    COMBINED = "combined"
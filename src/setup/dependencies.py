@@ -1,21 +1,42 @@
+from datetime import timedelta
 from typing import Callable, NamedTuple, Optional
 
 from garminconnect import Garmin  # type: ignore
 
 from src.application.garmin_service import GarminService
-from src.application.scheduler_service import GarminFetchDataScheduler
+from src.application.missing_data_cache import MissingDataCache
+from src.application.percentile_service import PercentileService
+from src.application.retry_planner import RetryPlanner
+from src.application.scheduler_service import (
+    GarminFetchDataScheduler,
+    get_start_offset,
+)
+from src.application.weekly_summary_service import WeeklySummaryService
+from src.consts import BYTES_IN_MB
 from src.infra.discord.discord_api_adapter import (
     DiscordErrorAdapter,
     DiscordHealthSummaryAdapter,
 )
 from src.infra.discord.discord_api_client import DiscordApiClient
+from src.infra.discord.discord_outbox_dispatcher import DiscordOutboxDispatcher
+from src.infra.discord.discord_rate_limits import DiscordRateLimiter
 from src.infra.garmin.garmin_api_adapter import GarminApiAdapter
 from src.infra.garmin.garmin_api_client import GarminApiClient
+from src.infra.plotting.image_encoding import ImageBudget, ImageEncoding
+from src.infra.plotting.plot_cache import PlotCache
+from src.infra.plotting.plotting_service import PlotRenderer
+from src.infra.storage.delivery_ledger import DeliveryLedger
+from src.infra.storage.discord_outbox import DiscordOutbox
+from src.infra.storage.missing_data_stats_store import MissingDataStatsStore
+from src.infra.storage.sketch_store import QuantileSketchStore
+from src.infra.storage.sqlite_job_store import SqliteJobStore
+from src.infra.storage.sync_time_store import SyncTimeStore
 from src.infra.time_provider import TimeProvider
 from src.presentation.notification_service import (
     ErrorNotificationService,
     HealthSummaryNotificationService,
 )
+from src.presentation.trigger_api import TriggerApi
 from src.setup.config import Config
 from src.setup.registry_setup import (
     build_fetcher_registry,
@@ -24,7 +45,9 @@ from src.setup.registry_setup import (
     build_to_dto_converter_registry,
     build_to_model_converter_registry,
     build_to_vm_converter_registry,
+    build_to_weekly_vm_converter_registry,
 )
+from src.setup.render_executors import RenderExecutor
 
 # TODO: Use DI framework
 
@@ -38,7 +61,10 @@ class Dependencies(NamedTuple):
     summary_adapter: DiscordHealthSummaryAdapter
     summary_notifier: HealthSummaryNotificationService
     scheduler: GarminFetchDataScheduler
+    plot_renderer: PlotRenderer
     error_handler: Optional[Callable[[Exception, str], None]]
+    outbox_dispatcher: Optional[DiscordOutboxDispatcher]
+    trigger_api: Optional[TriggerApi]
 
 
 def resolve(app_config: Config) -> Dependencies:
@@ -57,7 +83,27 @@ def resolve(app_config: Config) -> Dependencies:
     to_dto_converter_registry = build_to_dto_converter_registry()
     to_model_converter_registry = build_to_model_converter_registry()
     to_vm_converter_registry = build_to_vm_converter_registry()
-    plotting_strategies = build_plotting_strategies()
+    to_weekly_vm_converter_registry = build_to_weekly_vm_converter_registry()
+    plot_cache = PlotCache(
+        memory_max_bytes=int(app_config.plot_cache.memory_mb * BYTES_IN_MB),
+        disk_max_bytes=int(app_config.plot_cache.disk_mb * BYTES_IN_MB),
+        dir_path=app_config.get_state_file_path("plot_cache"),
+    )
+    encoding_config = app_config.image_encoding
+    image_encoding = ImageEncoding(
+        format=encoding_config.format,
+        dpi=encoding_config.dpi,
+        png_compress_level=encoding_config.png_compress_level,
+        quantize_colors=encoding_config.quantize_colors,
+        quality=encoding_config.quality,
+    )
+    plot_renderer = PlotRenderer(
+        app_config.render_workers,
+        use_threads=app_config.render_executor == RenderExecutor.THREAD,
+        cache=plot_cache,
+        encoding=image_encoding,
+    )
+    plotting_strategies = build_plotting_strategies(plot_renderer)
     message_strategy = build_message_strategy(app_config.message_format)
 
     garmin_service = GarminService(
@@ -66,17 +112,43 @@ def resolve(app_config: Config) -> Dependencies:
         to_dto_converter_registry,
         to_model_converter_registry,
         metrics_to_include=app_config.metrics,
+        time_provider=time_provider,
+        missing_data_cache=MissingDataCache(
+            timedelta(minutes=app_config.missing_data_ttl_minutes)
+        ),
+        missing_data_stats=MissingDataStatsStore(
+            app_config.get_state_file_path("missing_data_stats.json")
+        ),
     )
 
+    outbox_workers = app_config.get_outbox_workers()
+    outbox = (
+        DiscordOutbox(app_config.get_state_file_path("outbox.sqlite3"))
+        if outbox_workers > 0
+        else None
+    )
     discord_client = DiscordApiClient(
-        app_config.webhook_url, time_provider, service_name="garmin-connect-bot"
+        app_config.get_webhook_urls(),
+        time_provider,
+        service_name="garmin-connect-bot",
+        outbox=outbox,
+    )
+
+    # Account is identified by its Garmin login
+    delivery_ledger = DeliveryLedger(
+        app_config.credentials.email,
+        app_config.get_state_file_path("deliveries.sqlite3"),
     )
 
     health_summary_adapter = DiscordHealthSummaryAdapter(
         discord_client,
         message_strategy,
         to_vm_converter_registry,
+        to_weekly_vm_converter_registry,
         plotting_strategies,
+        ImageBudget(image_encoding, int(encoding_config.max_message_mb * BYTES_IN_MB)),
+        delivery_ledger,
+        app_config.delivery_mode,
     )
 
     health_summary_notification_service = HealthSummaryNotificationService(
@@ -87,7 +159,7 @@ def resolve(app_config: Config) -> Dependencies:
     error_handler = None
     if webhook_error_url := app_config.webhook_error_url:
         error_client = DiscordApiClient(
-            webhook_error_url, time_provider, service_name="garmin-connect-bot"
+            [webhook_error_url], time_provider, service_name="garmin-connect-bot"
         )
 
         error_adapter = DiscordErrorAdapter(
@@ -97,12 +169,70 @@ def resolve(app_config: Config) -> Dependencies:
         error_service = ErrorNotificationService(error_adapter)
         error_handler = error_service.on_exception
 
+    # Errors are sent directly (not through the outbox), such that delivery failures can be reported
+    outbox_dispatcher = (
+        DiscordOutboxDispatcher(
+            outbox,
+            DiscordRateLimiter(),
+            time_provider,
+            outbox_workers,
+            app_config.outbox.max_attempts,
+            on_delivery_failed=error_handler,
+            # Summary parts are recorded as delivered once actually delivered, not when queued
+            on_delivered=delivery_ledger.add_delivered,
+        )
+        if outbox
+        else None
+    )
+
+    weekly_summary_service = WeeklySummaryService(delivery_ledger)
+    percentile_service = PercentileService(
+        QuantileSketchStore(app_config.get_state_file_path("percentiles.json"))
+    )
+
+    scheduler_config = app_config.scheduler
+    partial_summary_config = app_config.partial_summary
     scheduler = GarminFetchDataScheduler(
         garmin_service,
+        weekly_summary_service,
+        percentile_service,
+        delivery_ledger,
+        RetryPlanner(SyncTimeStore(app_config.get_state_file_path("sync_times.json"))),
+        SqliteJobStore(
+            app_config.credentials.email,
+            app_config.get_state_file_path("scheduler_jobs.sqlite3"),
+        ),
         time_provider,
+        get_start_offset(
+            app_config.credentials.email,
+            timedelta(minutes=scheduler_config.start_spread_minutes),
+        ),
+        timedelta(minutes=scheduler_config.prefetch_lead_minutes),
+        (
+            timedelta(minutes=partial_summary_config.deadline_minutes)
+            if partial_summary_config.deadline_minutes is not None
+            else None
+        ),
+        partial_summary_config.send_late_metrics,
+        scheduler_config.max_concurrent_jobs,
         summary_ready_event=health_summary_notification_service.on_summary_ready,
+        summary_prepare_event=health_summary_notification_service.on_summary_prepare,
+        late_metrics_ready_event=health_summary_notification_service.on_late_metrics_ready,
+        weekly_summary_ready_event=health_summary_notification_service.on_weekly_summary_ready,
         on_scheduler_exception=error_handler if error_handler else None,
     )
+    trigger_api_config = app_config.trigger_api
+    trigger_api = (
+        TriggerApi(
+            scheduler.trigger_garmin_fetch_summary_job,
+            trigger_api_config.host,
+            trigger_api_config.port,
+            trigger_api_config.token,
+        )
+        if trigger_api_config.port
+        else None
+    )
+
     return Dependencies(
         time_provider,
         garmin_client,
@@ -112,5 +242,8 @@ def resolve(app_config: Config) -> Dependencies:
         health_summary_adapter,
         health_summary_notification_service,
         scheduler,
+        plot_renderer,
         error_handler,
+        outbox_dispatcher,
+        trigger_api,
     )
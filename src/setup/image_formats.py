@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+# Value is also used as file extension
+class ImageFormat(Enum):
+    PNG = "png"
+    WEBP = "webp"
+    JPEG = "jpeg"
@@ -1,8 +1,9 @@
 from enum import Enum
-from typing import Any, Callable, Generic, NamedTuple, Sequence, TypeVar
+from typing import Any, Callable, Generic, NamedTuple, Optional, Sequence, TypeVar
 
 from src.domain.common import DatePeriod
 from src.domain.metrics import BaseMetric
+from src.domain.weekly_summary import MetricWeekAggregate
 from src.infra.garmin.dtos.garmin_response import (
     GarminResponseDto,
     GarminResponseEntryDto,
@@ -12,7 +13,11 @@ from src.infra.garmin.garmin_api_client import (
     GarminEndpoint,
     JsonResponseType,
 )
-from src.presentation.view_models import MetricPlot, MetricViewModel
+from src.presentation.view_models import (
+    MetricViewModel,
+    PendingPlot,
+    WeeklyMetricViewModel,
+)
 from src.setup.garmin_metrid_ids import GarminMetricId
 
 # TODO: Create all registries from generic registry class
@@ -90,8 +95,9 @@ DtoToModelConverterRegistry = Registry[
 ]
 
 
+# Converts a model to a view model, given the display name of the metric
 ModelToVmConverter = Callable[
-    [BaseMetric[GarminResponseEntryDto, Any]], MetricViewModel
+    [str, BaseMetric[GarminResponseEntryDto, Any]], MetricViewModel
 ]
 
 
@@ -99,15 +105,21 @@ class ModelToVmConverterRegistry:
     def __init__(self):
         super().__init__()
         self._converters: dict[
-            type[BaseMetric[GarminResponseEntryDto, Any]], ModelToVmConverter
+            type[BaseMetric[GarminResponseEntryDto, Any]],
+            tuple[str, ModelToVmConverter],
         ] = {}
+        # Display name by metric id, e.g. to list the metrics missing in a summary
+        self._names: dict[GarminMetricId, str] = {}
 
     def register(
         self,
+        metric_id: GarminMetricId,
         key: type[BaseMetric[GarminResponseEntryDto, Any]],
+        name: str,
         converter: ModelToVmConverter,
     ):
-        self._converters[key] = converter
+        self._converters[key] = (name, converter)
+        self._names[metric_id] = name
 
     def convert(
         self, instance: BaseMetric[GarminResponseEntryDto, Any]
@@ -115,13 +127,47 @@ class ModelToVmConverterRegistry:
         instance_type = type(instance)
         if instance_type not in self._converters:
             raise ValueError(f"No converter found for {instance_type}")
-        func = self._converters[instance_type]
-        return func(instance)
+        name, func = self._converters[instance_type]
+        return func(name, instance)
+
+    def get_name(self, metric_id: GarminMetricId) -> str:
+        if metric_id not in self._names:
+            raise ValueError(f"No name found for {metric_id}")
+        return self._names[metric_id]
+
+
+# Converts the aggregates of a metric for the current week (and previous week if available) to a view model
+WeeklyAggregateToVmConverter = Callable[
+    [MetricWeekAggregate, Optional[MetricWeekAggregate]], WeeklyMetricViewModel
+]
+
+
+class WeeklyAggregateToVmConverterRegistry:
+    def __init__(self):
+        super().__init__()
+        self._converters: dict[
+            type[BaseMetric[GarminResponseEntryDto, Any]], WeeklyAggregateToVmConverter
+        ] = {}
+
+    def register(
+        self,
+        key: type[BaseMetric[GarminResponseEntryDto, Any]],
+        converter: WeeklyAggregateToVmConverter,
+    ):
+        self._converters[key] = converter
+
+    def convert(
+        self, current: MetricWeekAggregate, previous: Optional[MetricWeekAggregate]
+    ) -> WeeklyMetricViewModel:
+        if current.metric_type not in self._converters:
+            raise ValueError(f"No converter found for {current.metric_type}")
+        func = self._converters[current.metric_type]
+        return func(current, previous)
 
 
-# Given a list of models, return a plot if required metrics are available, otherwise None
+# Given a list of models, start rendering a plot if required metrics are available, otherwise None
 PlottingStrategy = Callable[
-    [Sequence[BaseMetric[GarminResponseEntryDto, Any]]], MetricPlot | None
+    [Sequence[BaseMetric[GarminResponseEntryDto, Any]]], PendingPlot | None
 ]
 
 DtoToModelConverter = Callable[
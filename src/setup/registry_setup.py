@@ -26,6 +26,7 @@ from src.infra.garmin.garmin_api_client import (
     JsonResponseType,
 )
 from src.infra.plotting.plotting_service import (
+    PlotRenderer,
     create_metrics_gridplot,
     create_sleep_analysis_plot,
 )
@@ -113,32 +114,42 @@ def build_to_vm_converter_registry() -> ModelToVmConverterRegistry:
     reg = ModelToVmConverterRegistry()
 
     reg.register(
+        GarminMetricId.SLEEP,
         SleepMetrics,
-        lambda model: view_models.sleep_message(
-            "Sleep", "💤", cast(SleepMetrics, model)
+        "Sleep",
+        lambda name, model: view_models.sleep_message(
+            name, "💤", cast(SleepMetrics, model)
         ),
     )
     reg.register(
+        GarminMetricId.SLEEP_SCORE,
         SleepScoreMetrics,
-        lambda model: view_models.metric_message(
-            "Sleep Score", "😴", cast(SleepScoreMetrics, model), 100
+        "Sleep Score",
+        lambda name, model: view_models.metric_message(
+            name, "😴", cast(SleepScoreMetrics, model), 100
         ),
     )
     reg.register(
+        GarminMetricId.RHR,
         RhrMetrics,
+        "Resting HR",
         # NB: Regular heart emoji messes up the table formatting.
-        lambda model: view_models.metric_message(
-            "Resting HR", "💗", cast(RhrMetrics, model)
+        lambda name, model: view_models.metric_message(
+            name, "💗", cast(RhrMetrics, model)
         ),
     )
     reg.register(
+        GarminMetricId.HRV,
         HrvMetrics,
-        lambda model: view_models.hrv_message("HRV", "💓", cast(HrvMetrics, model)),
+        "HRV",
+        lambda name, model: view_models.hrv_message(name, "💓", cast(HrvMetrics, model)),
     )
     reg.register(
+        GarminMetricId.BB,
         BbMetrics,
-        lambda model: view_models.metric_message(
-            "Body Battery",
+        "Body Battery",
+        lambda name, model: view_models.metric_message(
+            name,
             "⚡",
             cast(BbMetrics, model),
             100
@@ -146,9 +157,54 @@ def build_to_vm_converter_registry() -> ModelToVmConverterRegistry:
         ),
     )
     reg.register(
+        GarminMetricId.STRESS,
         StressMetrics,
-        lambda model: view_models.metric_message(
-            "Stress Level", "🤯", cast(StressMetrics, model), 100
+        "Stress Level",
+        lambda name, model: view_models.metric_message(
+            name, "🤯", cast(StressMetrics, model), 100
+        ),
+    )
+
+    return reg
+
+
+def build_to_weekly_vm_converter_registry() -> WeeklyAggregateToVmConverterRegistry:
+    reg = WeeklyAggregateToVmConverterRegistry()
+
+    reg.register(
+        SleepMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "Sleep", "💤", current, previous, format_value=view_models.format_seconds
+        ),
+    )
+    reg.register(
+        SleepScoreMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "Sleep Score", "😴", current, previous, with_max_val=100
+        ),
+    )
+    reg.register(
+        RhrMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "Resting HR", "💗", current, previous
+        ),
+    )
+    reg.register(
+        HrvMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "HRV", "💓", current, previous
+        ),
+    )
+    reg.register(
+        BbMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "Body Battery", "⚡", current, previous, with_max_val=100
+        ),
+    )
+    reg.register(
+        StressMetrics,
+        lambda current, previous: view_models.weekly_metric_message(
+            "Stress Level", "🤯", current, previous, with_max_val=100
         ),
     )
 
@@ -174,11 +230,11 @@ def build_to_dto_converter(
 
 
 # Build available plotting strategies.
-# Each strategy checks for presence of required metrics and returns a plot if required metrics for that strategy are present
-def build_plotting_strategies() -> Sequence[PlottingStrategy]:
+# Each strategy checks for presence of required metrics and starts rendering a plot if required metrics for that strategy are present
+def build_plotting_strategies(renderer: PlotRenderer) -> Sequence[PlottingStrategy]:
     def build_sleep_plot(
         metrics: Sequence[BaseMetric[GarminResponseEntryDto, Any]]
-    ) -> MetricPlot | None:
+    ) -> PendingPlot | None:
         # Ensure sleep and sleep score metrics are present for this plot
         sleep = find_first_of_type(metrics, SleepMetrics)
         sleep_score = find_first_of_type(metrics, SleepScoreMetrics)
@@ -191,17 +247,19 @@ def build_plotting_strategies() -> Sequence[PlottingStrategy]:
             return None
 
         sleep_plot = create_sleep_analysis_plot(
-            sleep, sleep_score, ma_window_size=moving_avg_window_size
+            sleep, sleep_score, ma_window_size=moving_avg_window_size, renderer=renderer
         )
-        return MetricPlot("sleep_plot", sleep_plot)
+        return PendingPlot("sleep_plot", sleep_plot, renderer.image_format.value)
 
     def build_metrics_plot(
         metrics: Sequence[BaseMetric[GarminResponseEntryDto, Any]]
-    ) -> MetricPlot:
+    ) -> PendingPlot:
         days_to_plot = DAYS_IN_WEEK  # Configurable?
         # No specific metrics required, it's just a generic plot of all metrics
-        metrics_plot = create_metrics_gridplot(metrics, period_len=days_to_plot)
-        return MetricPlot("metrics_plot", metrics_plot)
+        metrics_plot = create_metrics_gridplot(
+            metrics, renderer=renderer, period_len=days_to_plot
+        )
+        return PendingPlot("metrics_plot", metrics_plot, renderer.image_format.value)
 
     return [build_sleep_plot, build_metrics_plot]
 
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class RenderExecutor(Enum):
+    PROCESS = "process"
+    THREAD = "thread"
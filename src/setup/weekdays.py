@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+# Day of week as accepted by cron triggers
+class Weekday(Enum):
+    MONDAY = "mon"
+    TUESDAY = "tue"
+    WEDNESDAY = "wed"
+    THURSDAY = "thu"
+    FRIDAY = "fri"
+    SATURDAY = "sat"
+    SUNDAY = "sun"
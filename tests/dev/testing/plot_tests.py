@@ -2,12 +2,12 @@ import datetime
 import subprocess
 from pathlib import Path
 
-from matplotlib import pyplot as plt
-
 from src.domain.metrics import SleepMetrics, SleepScoreMetrics
 from src.infra.garmin.dtos import *
 from src.infra.plotting import metrics_gridplot
+from src.infra.plotting.plotting_service import save_plot_to_buffer
 from src.infra.plotting.sleep_analysis_plot import plot as plot_sleep
+from src.infra.plotting.sleep_analysis_plot import to_plot_data as to_sleep_plot_data
 from src.infra.plotting.stress_plot import plot as plot_stress
 from tests.dev.test_utils import load_dto_from_file
 
@@ -37,7 +37,7 @@ sleep_score_metric = SleepScoreMetrics(sleep_score_dto)
 # fig = plot_stress(stress_dto)
 # fig = plot_sleep(sleep_dto, sleep_score_dto, ma_window_size=7)
 
-fig = plot_sleep(sleep_metric, sleep_score_metric, ma_window_size=7)
+fig = plot_sleep(to_sleep_plot_data(sleep_metric, sleep_score_metric, ma_window_size=7))
 
 # metrics_plot.plot(
 #     metrics_plot.MetricsData(
@@ -58,8 +58,7 @@ plot_dir = Path("../plots").resolve()
 save_path = plot_dir.joinpath(
     SUB_DIR, f"{SUB_DIR}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
 )
-plt.savefig(save_path)
-# plt.show()
+save_path.write_bytes(save_plot_to_buffer(fig).getvalue())
 
 # open the fig in associated program to view properly (.show will try adapt to screen size)
 
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from matplotlib import colormaps
+from matplotlib.colors import Normalize, to_rgba
+from matplotlib.figure import Figure
+
+from src.infra.plotting.calendar_plot import (
+    MISSING_VALUE,
+    CalendarCells,
+    to_weekday_grid,
+)
+
+# A wednesday
+START_DATE = date(2023, 5, 31)
+
+
+def test_values_are_arranged_by_weekday_and_week():
+    dates = [START_DATE + timedelta(days) for days in range(7)]
+
+    grid = to_weekday_grid(dates, [float(day) for day in range(7)])
+
+    assert grid.shape == (7, 2)
+    # Wednesday to sunday in the first week, monday and tuesday in the second
+    assert np.isnan(grid[:2, 0]).all()
+    assert list(grid[2:, 0]) == [0, 1, 2, 3, 4]
+    assert list(grid[:2, 1]) == [5, 6]
+    assert np.isnan(grid[2:, 1]).all()
+
+
+def test_missing_days_are_marked():
+    dates = [START_DATE, START_DATE + timedelta(2)]
+
+    grid = to_weekday_grid(dates, [1.0, 3.0])
+
+    assert list(grid[2:5, 0]) == [1, MISSING_VALUE, 3]
+    assert np.isnan(grid[5:, 0]).all()
+
+
+def test_week_starting_on_monday_fills_a_column():
+    monday = date(2023, 6, 5)
+    dates = [monday + timedelta(days) for days in range(14)]
+
+    grid = to_weekday_grid(dates, [float(day) for day in range(14)])
+
+    assert grid.shape == (7, 2)
+    assert not np.isnan(grid).any()
+
+
+def _create_cells(shape: tuple[int, int]) -> CalendarCells:
+    ax = Figure().add_subplot()
+    return CalendarCells(
+        ax, shape, colormaps["RdYlGn"], Normalize(0, 100), missing_color="gray"
+    )
+
+
+def test_cells_are_colored_by_value():
+    cells = _create_cells((7, 1))
+    grid = np.array([[np.nan], [MISSING_VALUE], [0], [50], [100], [100], [100]])
+
+    cells.set_values(grid)
+
+    colors = cells._cells.get_facecolor()
+    assert len(colors) == 7
+    # Cells outside the period are transparent
+    assert colors[0][3] == 0
+    assert tuple(colors[1]) == pytest.approx(to_rgba("gray"))
+    assert tuple(colors[2]) == pytest.approx(colormaps["RdYlGn"](0.0))
+    assert tuple(colors[4]) == pytest.approx(colormaps["RdYlGn"](1.0))
+
+
+def test_cells_of_first_weekday_are_drawn_at_the_top():
+    cells = _create_cells((7, 2))
+
+    paths = cells._cells.get_paths()
+    monday_first_week = paths[0].vertices
+    sunday_first_week = paths[6 * 2].vertices
+    monday_second_week = paths[1].vertices
+
+    assert monday_first_week[:, 1].min() > sunday_first_week[:, 1].max()
+    assert monday_second_week[:, 0].min() > monday_first_week[:, 0].max()
+
+
+def test_grid_of_other_shape_is_rejected():
+    cells = _create_cells((7, 4))
+
+    with pytest.raises(ValueError):
+        cells.set_values(np.zeros((7, 5)))
@@ -0,0 +1,89 @@
+from datetime import date
+from pathlib import Path
+
+from src.infra.storage.delivery_ledger import (
+    DeliveryKey,
+    DeliveryLedger,
+    DeliveryStatus,
+    SummaryType,
+)
+
+SUMMARY_DATE = date(2023, 6, 1)
+
+
+def test_prepared_summary_is_delivered():
+    ledger = DeliveryLedger("account")
+
+    ledger.prepare(SUMMARY_DATE, SummaryType.DAILY, "summary")
+    record = ledger.get(SUMMARY_DATE, SummaryType.DAILY)
+    assert record and record.status == DeliveryStatus.PREPARED
+    assert record.summary == "summary"
+
+    ledger.start(SUMMARY_DATE, SummaryType.DAILY, "summary")
+    record = ledger.get(SUMMARY_DATE, SummaryType.DAILY)
+    assert record and record.status == DeliveryStatus.PENDING
+    assert not ledger.is_delivered(SUMMARY_DATE, SummaryType.DAILY)
+
+    ledger.complete(SUMMARY_DATE, SummaryType.DAILY)
+    assert ledger.is_delivered(SUMMARY_DATE, SummaryType.DAILY)
+    assert not ledger.is_delivered(SUMMARY_DATE, SummaryType.WEEKLY)
+
+
+def test_started_summary_is_not_prepared_again():
+    ledger = DeliveryLedger("account")
+
+    ledger.start(SUMMARY_DATE, SummaryType.DAILY, "summary")
+    ledger.prepare(SUMMARY_DATE, SummaryType.DAILY, "updated summary")
+
+    record = ledger.get(SUMMARY_DATE, SummaryType.DAILY)
+    assert record and record.status == DeliveryStatus.PENDING
+    assert record.summary == "updated summary"
+
+
+def test_delivered_parts_are_tracked():
+    ledger = DeliveryLedger("account")
+    ledger.start(SUMMARY_DATE, SummaryType.DAILY, "summary")
+
+    ledger.add_delivered_parts(SUMMARY_DATE, SummaryType.DAILY, ["embed"])
+    ledger.add_delivered(
+        DeliveryKey(SUMMARY_DATE, SummaryType.DAILY, ("plot", "embed")).serialize()
+    )
+    # Parts are kept if the summary is replaced, e.g. when resuming the delivery
+    ledger.start(SUMMARY_DATE, SummaryType.DAILY, "summary")
+
+    record = ledger.get(SUMMARY_DATE, SummaryType.DAILY)
+    assert record and record.delivered_parts == {"embed", "plot"}
+
+
+def test_parts_of_unrecorded_summary_are_ignored():
+    ledger = DeliveryLedger("account")
+
+    ledger.add_delivered_parts(SUMMARY_DATE, SummaryType.DAILY, ["embed"])
+
+    assert ledger.get(SUMMARY_DATE, SummaryType.DAILY) is None
+
+
+def test_delivery_key_round_trip():
+    key = DeliveryKey(SUMMARY_DATE, SummaryType.WEEKLY, ("embed",))
+
+    assert DeliveryKey.parse(key.serialize()) == key
+
+
+def test_only_most_recent_summary_is_kept(tmp_path: Path):
+    file_path = tmp_path / "ledger.sqlite3"
+    ledger = DeliveryLedger("account", file_path)
+    ledger.start(date(2023, 5, 31), SummaryType.DAILY, "previous summary")
+    ledger.complete(date(2023, 5, 31), SummaryType.DAILY)
+    ledger.start(SUMMARY_DATE, SummaryType.DAILY, "summary")
+
+    # Records survive a restart
+    ledger = DeliveryLedger("account", file_path)
+    previous = ledger.get(date(2023, 5, 31), SummaryType.DAILY)
+    assert previous and previous.status == DeliveryStatus.DELIVERED
+    assert previous.summary is None
+    current = ledger.get(SUMMARY_DATE, SummaryType.DAILY)
+    assert current and current.summary == "summary"
+    assert (
+        DeliveryLedger("other account", file_path).get(SUMMARY_DATE, SummaryType.DAILY)
+        is None
+    )
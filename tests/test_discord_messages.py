@@ -0,0 +1,28 @@
+from datetime import date
+
+from src.presentation.discord_messages import DiscordMessageTable
+from src.presentation.view_models import HealthSummaryViewModel, MetricViewModel
+
+
+def _create_view_model(name: str, percentile_rank: str) -> MetricViewModel:
+    return MetricViewModel(
+        name=name,
+        icon="💓",
+        latest="52",
+        diff_to_avg="-1",
+        diff_to_avg_emoji="🟢",
+        week_avg="53",
+        percentile_rank=percentile_rank,
+    )
+
+
+def test_table_includes_percentile_rank():
+    summary = HealthSummaryViewModel(
+        date(2023, 6, 1),
+        [_create_view_model("RHR", "90th"), _create_view_model("HRV", "")],
+    )
+
+    rows = DiscordMessageTable(summary).description.splitlines()
+
+    assert "Year %" in rows[0]
+    assert "90th" in next(row for row in rows if "RHR" in row)
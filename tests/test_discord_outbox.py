@@ -0,0 +1,191 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pytest
+
+from src.infra.discord.discord_outbox_dispatcher import (
+    RETRY_BASE_DELAY_SECONDS,
+    DiscordOutboxDispatcher,
+)
+from src.infra.discord.discord_rate_limits import DiscordRateLimiter
+from src.infra.storage.discord_outbox import DiscordOutbox, OutboxMessage
+
+IMAGE = ("plot.png", b"\x89PNG plot")
+
+
+class _FakeTimeProvider:
+    def __init__(self, now: datetime):
+        self.now_value = now
+
+    def now(self) -> datetime:
+        return self.now_value
+
+
+# Responds with the queued statuses (204 once the queue is empty)
+class _WebhookHandler(BaseHTTPRequestHandler):
+    statuses: list[int] = []
+    num_requests = 0
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        _WebhookHandler.num_requests += 1
+        status = self.statuses.pop(0) if self.statuses else 204
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "2")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def webhook_url() -> Iterator[str]:
+    _WebhookHandler.statuses = []
+    _WebhookHandler.num_requests = 0
+    server = HTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/webhook"
+    server.shutdown()
+    server.server_close()
+
+
+def _create_dispatcher(
+    outbox: DiscordOutbox,
+    time_provider: _FakeTimeProvider,
+    delivered_keys: list[str],
+    errors: Optional[list[Exception]] = None,
+) -> DiscordOutboxDispatcher:
+    failures = errors if errors is not None else []
+    return DiscordOutboxDispatcher(
+        outbox,
+        DiscordRateLimiter(),
+        time_provider,  # type: ignore
+        num_workers=0,
+        max_attempts=2,
+        on_delivery_failed=lambda e, _: failures.append(e),
+        on_delivered=delivered_keys.append,
+    )
+
+
+# Delivers the next message due, as a worker does
+def _deliver_next(
+    outbox: DiscordOutbox,
+    dispatcher: DiscordOutboxDispatcher,
+    time_provider: _FakeTimeProvider,
+) -> Optional[OutboxMessage]:
+    message = outbox.claim_next(time_provider.now().timestamp())
+    if message:
+        dispatcher._deliver(message)
+    return message
+
+
+def test_messages_to_same_webhook_are_delivered_in_order():
+    outbox = DiscordOutbox()
+    first_id, other_id = outbox.put(["first", "other"], {"content": "1"}, [IMAGE], 0)
+    (second_id,) = outbox.put(["first"], {"content": "2"}, [IMAGE], 0)
+
+    first = outbox.claim_next(0)
+    other = outbox.claim_next(0)
+    # Second message waits for the first one being sent to the same webhook
+    assert outbox.claim_next(0) is None
+    assert first and first.id == first_id and first.files == [IMAGE]
+    assert other and other.id == other_id
+
+    outbox.complete(first.id)
+    second = outbox.claim_next(0)
+    assert second and second.id == second_id
+    assert second.payload == {"content": "2"}
+
+
+def test_sending_messages_are_sent_again_after_restart(tmp_path: Path):
+    file_path = tmp_path / "outbox.sqlite3"
+    outbox = DiscordOutbox(file_path)
+    (message_id,) = outbox.put(["webhook"], {"content": "1"}, [IMAGE], 0, "key")
+    assert outbox.claim_next(0)
+
+    outbox = DiscordOutbox(file_path)
+    message = outbox.claim_next(0)
+    assert message and message.id == message_id
+    assert message.files == [IMAGE] and message.delivery_key == "key"
+
+
+def test_failed_delivery_is_retried(webhook_url: str):
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    outbox = DiscordOutbox()
+    delivered_keys: list[str] = []
+    dispatcher = _create_dispatcher(outbox, time_provider, delivered_keys)
+    outbox.put([webhook_url], {"content": "1"}, [IMAGE], 0, "key")
+    _WebhookHandler.statuses = [500]
+
+    assert _deliver_next(outbox, dispatcher, time_provider)
+    assert _deliver_next(outbox, dispatcher, time_provider) is None
+    assert outbox.get_queued_delivery_keys() == {"key"}
+
+    time_provider.now_value += timedelta(seconds=RETRY_BASE_DELAY_SECONDS)
+    message = _deliver_next(outbox, dispatcher, time_provider)
+    assert message and message.attempts == 1
+    assert _WebhookHandler.num_requests == 2
+    assert outbox.get_queued_delivery_keys() == set()
+    assert delivered_keys == ["key"]
+
+
+def test_rate_limited_delivery_is_postponed_without_counting_attempt(
+    webhook_url: str,
+):
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    outbox = DiscordOutbox()
+    dispatcher = _create_dispatcher(outbox, time_provider, [])
+    outbox.put([webhook_url], {"content": "1"}, [], 0)
+    _WebhookHandler.statuses = [429]
+
+    assert _deliver_next(outbox, dispatcher, time_provider)
+    assert outbox.get_next_attempt_time() == time_provider.now().timestamp() + 2
+
+    time_provider.now_value += timedelta(seconds=2)
+    message = _deliver_next(outbox, dispatcher, time_provider)
+    assert message and message.attempts == 0
+    assert outbox.get_next_attempt_time() is None
+
+
+def test_delivery_is_given_up_after_max_attempts(webhook_url: str):
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    outbox = DiscordOutbox()
+    delivered_keys: list[str] = []
+    errors: list[Exception] = []
+    dispatcher = _create_dispatcher(outbox, time_provider, delivered_keys, errors)
+    outbox.put([webhook_url], {"content": "1"}, [], 0, "key")
+    _WebhookHandler.statuses = [500, 500]
+
+    assert _deliver_next(outbox, dispatcher, time_provider)
+    time_provider.now_value += timedelta(seconds=RETRY_BASE_DELAY_SECONDS)
+    assert _deliver_next(outbox, dispatcher, time_provider)
+
+    assert len(errors) == 1
+    assert outbox.get_next_attempt_time() is None
+    assert outbox.get_queued_delivery_keys() == set()
+    assert delivered_keys == []
+
+
+def test_delivered_is_reported_once_all_destinations_are_delivered(webhook_url: str):
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    outbox = DiscordOutbox()
+    delivered_keys: list[str] = []
+    dispatcher = _create_dispatcher(outbox, time_provider, delivered_keys)
+    outbox.put(
+        [webhook_url, f"{webhook_url}/other"], {"content": "1"}, [IMAGE], 0, "key"
+    )
+    outbox.put([webhook_url], {"content": "2"}, [], 0, "other key")
+
+    assert _deliver_next(outbox, dispatcher, time_provider)
+    assert delivered_keys == []
+
+    while _deliver_next(outbox, dispatcher, time_provider):
+        pass
+    assert sorted(delivered_keys) == ["key", "other key"]
+    assert _WebhookHandler.num_requests == 3
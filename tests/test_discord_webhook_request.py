@@ -0,0 +1,84 @@
+import json
+import threading
+from datetime import datetime, timezone
+from email.message import Message
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Iterator
+
+import pytest
+
+from src.infra.discord.discord_api_client import DiscordApiClient
+from src.infra.discord.discord_webhook_request import post_webhook_message
+
+
+class _FakeTimeProvider:
+    def now(self) -> datetime:
+        return datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc)
+
+
+# Parses the multipart requests it receives, like Discord does
+class _WebhookHandler(BaseHTTPRequestHandler):
+    requests: list[Message] = []
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append(
+            BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+        )
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def webhook_url() -> Iterator[str]:
+    _WebhookHandler.requests = []
+    server = HTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/webhook"
+    server.shutdown()
+    server.server_close()
+
+
+def _get_fields(request: Message) -> dict[str, tuple[str | None, bytes]]:
+    assert request.is_multipart()
+    return {
+        part.get_param("name", header="content-disposition"): (
+            part.get_filename(),
+            part.get_payload(decode=True),
+        )
+        for part in request.get_payload()
+    }
+
+
+def test_multipart_body_is_parsed_by_http_server(webhook_url: str):
+    image = bytes(range(256)) * 1000
+    payload = {"embeds": [{"image": {"url": "attachment://plot.png"}}]}
+
+    response = post_webhook_message(
+        webhook_url, payload, [("plot.png", memoryview(image)), ("empty.png", b"")]
+    )
+
+    assert response.status_code == 204
+    fields = _get_fields(_WebhookHandler.requests[0])
+    assert json.loads(fields["payload_json"][1]) == payload
+    assert fields["files[0]"] == ("plot.png", image)
+    assert fields["files[1]"] == ("empty.png", b"")
+
+
+def test_images_sent_directly_are_sent_as_multipart_body(webhook_url: str):
+    client = DiscordApiClient([webhook_url], _FakeTimeProvider(), "service")  # type: ignore
+    images = [b"\x89PNG first", b"\x89PNG second"]
+
+    client.send_images(images, ["first.png", "second.png"])
+
+    fields = _get_fields(_WebhookHandler.requests[0])
+    assert json.loads(fields["payload_json"][1])["username"] == "service"
+    assert fields["files[0]"] == ("first.png", images[0])
+    assert fields["files[1]"] == ("second.png", images[1])
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from src.application.garmin_service import GarminService
+from src.application.missing_data_cache import MissingDataCache
+from src.domain.common import DatePeriod
+from src.infra.storage.missing_data_stats_store import MissingDataStatsStore
+from src.setup.garmin_metrid_ids import GarminMetricId
+
+END_DATE = date(2023, 6, 1)
+
+
+class _FakeTimeProvider:
+    def __init__(self, now: datetime):
+        self.now_value = now
+
+    def now(self) -> datetime:
+        return self.now_value
+
+
+# Data of the day is never available
+class _FakeFetcherRegistry:
+    def __init__(self):
+        self.requests: list[GarminMetricId] = []
+
+    def fetch(self, metric: GarminMetricId, period: DatePeriod) -> SimpleNamespace:
+        self.requests.append(metric)
+        return SimpleNamespace(endpoint=metric.value, data=None)
+
+
+def _create_garmin_service(
+    fetcher_registry: _FakeFetcherRegistry, time_provider: _FakeTimeProvider
+) -> GarminService:
+    return GarminService(
+        None,  # type: ignore
+        fetcher_registry,  # type: ignore
+        None,  # type: ignore
+        None,  # type: ignore
+        metrics_to_include=[GarminMetricId.HRV],
+        time_provider=time_provider,  # type: ignore
+        missing_data_cache=MissingDataCache(timedelta(minutes=3)),
+        missing_data_stats=MissingDataStatsStore(),
+    )
+
+
+def test_triggered_fetch_skips_data_recently_found_missing():
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    fetcher_registry = _FakeFetcherRegistry()
+    garmin_service = _create_garmin_service(fetcher_registry, time_provider)
+
+    assert garmin_service.try_get_health_summary(END_DATE) is None
+    time_provider.now_value += timedelta(minutes=1)
+    assert (
+        garmin_service.try_get_health_summary(END_DATE, skip_recently_missing=True)
+        is None
+    )
+
+    assert fetcher_registry.requests == [GarminMetricId.HRV]
+
+
+def test_scheduled_retry_within_missing_data_ttl_requests_data():
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 7, 0, tzinfo=timezone.utc))
+    fetcher_registry = _FakeFetcherRegistry()
+    garmin_service = _create_garmin_service(fetcher_registry, time_provider)
+
+    assert garmin_service.try_get_health_summary(END_DATE) is None
+    time_provider.now_value += timedelta(minutes=1)
+    assert garmin_service.try_get_health_summary(END_DATE) is None
+
+    assert fetcher_registry.requests == [GarminMetricId.HRV, GarminMetricId.HRV]
@@ -0,0 +1,62 @@
+import json
+import random
+
+from src.domain.quantile_sketch import KllSketch
+
+NUM_VALUES = 10000
+# Max absolute rank error accepted for the default k. The expected error is about 1%
+MAX_RANK_ERROR = 0.03
+
+
+def _create_sketch(values: list[float]) -> KllSketch:
+    sketch = KllSketch()
+    for value in values:
+        sketch.update(value)
+    return sketch
+
+
+def _get_max_rank_error(sketch: KllSketch, values: list[float]) -> float:
+    sorted_values = sorted(values)
+    return max(
+        abs(sketch.rank(value) - (idx + 1) / len(sorted_values))
+        for idx, value in enumerate(sorted_values)
+        if idx % 100 == 0
+    )
+
+
+def test_rank_error_is_bounded():
+    rng = random.Random(1)
+    values = [rng.gauss(50, 10) for _ in range(NUM_VALUES)]
+
+    sketch = _create_sketch(values)
+
+    assert sketch.n == NUM_VALUES
+    assert sketch._size() < NUM_VALUES // 10
+    assert _get_max_rank_error(sketch, values) <= MAX_RANK_ERROR
+
+
+def test_merged_sketch_ranks_all_values():
+    rng = random.Random(2)
+    # Separate windows with different distributions, e.g. a month of low values followed by a month of high values
+    low_values = [rng.uniform(0, 50) for _ in range(NUM_VALUES // 2)]
+    high_values = [rng.uniform(50, 100) for _ in range(NUM_VALUES // 2)]
+
+    merged = KllSketch.merge_all(
+        [_create_sketch(low_values), _create_sketch(high_values)]
+    )
+
+    assert merged.n == NUM_VALUES
+    assert abs(merged.rank(50) - 0.5) <= MAX_RANK_ERROR
+    assert _get_max_rank_error(merged, low_values + high_values) <= MAX_RANK_ERROR
+
+
+def test_json_round_trip_keeps_ranks():
+    rng = random.Random(3)
+    values = [rng.uniform(0, 100) for _ in range(NUM_VALUES)]
+    sketch = _create_sketch(values)
+
+    restored = KllSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+    assert restored.n == sketch.n
+    assert all(restored.rank(value) == sketch.rank(value) for value in values[:100])
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
@@ -0,0 +1,83 @@
+import random
+from datetime import date, datetime, timedelta
+
+from src.application.retry_planner import (
+    MAX_WAIT_TIME_MINUTES,
+    MIN_RETRY_MINUTES,
+    MIN_SYNC_TIMES,
+    MIN_WAIT_TIME_MINUTES,
+    RetryPlanner,
+)
+from src.infra.storage.sync_time_store import SyncTimeStore
+
+
+def _create_planner(sync_minutes: list[int]) -> RetryPlanner:
+    store = SyncTimeStore()
+    for day, minute in enumerate(sync_minutes, start=1):
+        store.add(date(2023, 1, day), minute)
+    return RetryPlanner(store)
+
+
+def test_retry_before_usual_sync_time():
+    planner = _create_planner([7 * 60] * MIN_SYNC_TIMES)
+
+    delay = planner.get_retry_delay(datetime(2023, 2, 1, 6, 30))
+
+    assert delay == timedelta(minutes=30)
+
+
+def test_retry_later_than_any_sync_time_uses_random_delay():
+    planner = _create_planner([7 * 60] * MIN_SYNC_TIMES)
+
+    delay = planner.get_retry_delay(datetime(2023, 2, 1, 9, 0))
+
+    assert (
+        timedelta(minutes=MIN_WAIT_TIME_MINUTES)
+        <= delay
+        < timedelta(minutes=MAX_WAIT_TIME_MINUTES)
+    )
+
+
+def test_register_available_registers_middle_of_last_failed_and_successful_fetch():
+    store = SyncTimeStore()
+    planner = RetryPlanner(store)
+
+    planner.register_unavailable(datetime(2023, 2, 1, 7, 0))
+    planner.register_available(datetime(2023, 2, 1, 7, 40))
+
+    assert store.get_minutes() == [7 * 60 + 20]
+
+
+def test_register_available_registers_first_fetch_if_successful():
+    store = SyncTimeStore()
+    planner = RetryPlanner(store)
+
+    planner.register_available(datetime(2023, 2, 1, 7, 0))
+
+    assert store.get_minutes() == [7 * 60]
+
+
+# Simulates the fetch retries of each day, with the data becoming available at the same time every day
+def test_retry_delay_converges_on_sync_time():
+    random.seed(0)
+    planner = RetryPlanner(SyncTimeStore())
+    sync_delay = timedelta(minutes=150)
+
+    fetches_per_day: list[int] = []
+    delivery_delays: list[timedelta] = []
+    for day in range(30):
+        notify_time = datetime(2023, 1, 1, 7, 0) + timedelta(days=day)
+        sync_time = notify_time + sync_delay
+        now = notify_time
+        fetches = 1
+        while now < sync_time:
+            planner.register_unavailable(now)
+            now += planner.get_retry_delay(now)
+            fetches += 1
+        planner.register_available(now)
+        fetches_per_day.append(fetches)
+        delivery_delays.append(now - sync_time)
+
+    # Once learned, the first retry is close to the sync time, followed by short retries until the data is available
+    assert max(delivery_delays[-10:]) < timedelta(minutes=MIN_RETRY_MINUTES)
+    assert max(fetches_per_day[-10:]) <= 4
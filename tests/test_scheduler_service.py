@@ -0,0 +1,238 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Sequence
+
+from apscheduler.schedulers.background import BackgroundScheduler  # type: ignore
+
+from src.application.scheduler_service import (
+    LATE_METRICS_MAX_WAIT,
+    TRIGGER_DEDUPLICATION_WINDOW,
+    GarminFetchDataScheduler,
+    TriggerResult,
+    _run_weekly_summary_job,
+)
+from src.domain.metrics import HealthSummary
+from src.infra.storage.delivery_ledger import DeliveryLedger
+from src.infra.storage.sqlite_job_store import SqliteJobStore
+
+JOB_ID = "fetch_job"
+
+
+class _FakeTimeProvider:
+    def __init__(self, now: datetime):
+        self.now_value = now
+
+    def now(self) -> datetime:
+        return self.now_value
+
+
+# Partial summary is available, but the missing metric never arrives
+class _FakeGarminService:
+    def __init__(self):
+        self.late_metric_requests: list[date] = []
+        # Whether data recently found missing was skipped, for each summary request
+        self.skip_recently_missing_requests: list[bool] = []
+
+    def try_get_health_summary(
+        self,
+        end_date: date,
+        allow_partial: bool = False,
+        skip_recently_missing: bool = False,
+    ) -> Optional[HealthSummary]:
+        self.skip_recently_missing_requests.append(skip_recently_missing)
+        return HealthSummary(end_date, [], ["hrv"]) if allow_partial else None
+
+    def try_get_metrics(
+        self,
+        end_date: date,
+        metric_ids: Sequence[str],
+        skip_recently_missing: bool = False,
+    ) -> Optional[HealthSummary]:
+        self.late_metric_requests.append(end_date)
+        return None
+
+
+class _FakeRetryPlanner:
+    def __init__(self, delay: timedelta):
+        self._delay = delay
+
+    def get_retry_delay(self, now: datetime) -> timedelta:
+        return self._delay
+
+    def register_available(self, now: datetime) -> None:
+        pass
+
+    def register_unavailable(self, now: datetime) -> None:
+        pass
+
+
+class _FakeWeeklySummaryService:
+    def retain(self, summary: HealthSummary) -> None:
+        pass
+
+
+class _FakePercentileService:
+    def update_percentile_ranks(self, summary: HealthSummary) -> dict[str, float]:
+        return {}
+
+
+def _create_scheduler(
+    garmin_service: _FakeGarminService,
+    time_provider: _FakeTimeProvider,
+    retry_delay: timedelta,
+    notify_time: time,
+    deadline: timedelta,
+    job_store: Optional[SqliteJobStore] = None,
+) -> GarminFetchDataScheduler:
+    scheduler = GarminFetchDataScheduler(
+        garmin_service,  # type: ignore
+        _FakeWeeklySummaryService(),  # type: ignore
+        _FakePercentileService(),  # type: ignore
+        DeliveryLedger("account"),
+        _FakeRetryPlanner(retry_delay),  # type: ignore
+        job_store or SqliteJobStore("account"),
+        time_provider,  # type: ignore
+        start_offset=timedelta(0),
+        prefetch_lead=timedelta(0),
+        partial_summary_deadline=deadline,
+        send_late_metrics=True,
+        max_concurrent_jobs=1,
+        summary_ready_event=lambda summary: None,
+        summary_prepare_event=lambda summary: None,
+        late_metrics_ready_event=lambda summary: None,
+        weekly_summary_ready_event=lambda summary: None,
+        on_scheduler_exception=None,
+    )
+    scheduler.add_garmin_fetch_summary_job(notify_time, JOB_ID)
+    return scheduler
+
+
+# Runs the job at the given time. Returns the retry time, if rescheduled
+def _run_job(
+    scheduler: GarminFetchDataScheduler,
+    time_provider: _FakeTimeProvider,
+    now: datetime,
+    notify_time: time,
+) -> Optional[datetime]:
+    time_provider.now_value = now
+    job = scheduler._scheduler.get_job(JOB_ID)
+    next_run_time = getattr(job, "next_run_time", None)
+    scheduler._execute_job_wrapper(JOB_ID, notify_time)
+    retry_time = getattr(job, "next_run_time", None)
+    return retry_time if retry_time != next_run_time else None
+
+
+def test_late_metric_never_arriving_is_polled_for_a_bounded_time():
+    notify_time = time(7, 0)
+    deadline = timedelta(hours=1)
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 6, 0, tzinfo=timezone.utc))
+    garmin_service = _FakeGarminService()
+    scheduler = _create_scheduler(
+        garmin_service, time_provider, timedelta(minutes=30), notify_time, deadline
+    )
+
+    # Partial summary is sent at the deadline, then the missing metric is polled
+    run_time: Optional[datetime] = datetime(2023, 6, 1, 8, 0, tzinfo=timezone.utc)
+    run_times = []
+    while run_time and len(run_times) < 100:
+        run_times.append(run_time)
+        run_time = _run_job(scheduler, time_provider, run_time, notify_time)
+
+    stop_time = datetime(2023, 6, 1, 8, 0, tzinfo=timezone.utc) + LATE_METRICS_MAX_WAIT
+    assert len(run_times) > 1
+    assert run_times[-1] < stop_time
+    assert garmin_service.late_metric_requests
+    assert all(day == date(2023, 6, 1) for day in garmin_service.late_metric_requests)
+
+
+def test_late_metric_retry_does_not_cross_midnight():
+    notify_time = time(22, 0)
+    deadline = timedelta(hours=1)
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 21, 0, tzinfo=timezone.utc))
+    garmin_service = _FakeGarminService()
+    scheduler = _create_scheduler(
+        garmin_service, time_provider, timedelta(minutes=45), notify_time, deadline
+    )
+
+    first_retry = _run_job(
+        scheduler,
+        time_provider,
+        datetime(2023, 6, 1, 23, 0, tzinfo=timezone.utc),
+        notify_time,
+    )
+    assert first_retry == datetime(2023, 6, 1, 23, 45, tzinfo=timezone.utc)
+
+    # Next retry would be the next day, so the job is left to its next scheduled run
+    second_retry = _run_job(scheduler, time_provider, first_retry, notify_time)
+    assert second_retry is None
+
+
+# Retries clamped to the partial summary deadline can be shorter than the missing data TTL, but still request the data
+def test_retry_before_deadline_requests_data_found_missing_recently():
+    notify_time = time(7, 0)
+    deadline = timedelta(hours=1)
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 6, 0, tzinfo=timezone.utc))
+    garmin_service = _FakeGarminService()
+    scheduler = _create_scheduler(
+        garmin_service, time_provider, timedelta(minutes=30), notify_time, deadline
+    )
+
+    retry_time = _run_job(
+        scheduler,
+        time_provider,
+        datetime(2023, 6, 1, 7, 58, tzinfo=timezone.utc),
+        notify_time,
+    )
+    assert retry_time == datetime(2023, 6, 1, 8, 0, tzinfo=timezone.utc)
+
+    _run_job(scheduler, time_provider, retry_time, notify_time)
+    assert garmin_service.skip_recently_missing_requests == [False, False]
+
+
+def test_trigger_is_deduplicated():
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 6, 0, tzinfo=timezone.utc))
+    scheduler = _create_scheduler(
+        _FakeGarminService(),
+        time_provider,
+        timedelta(minutes=30),
+        time(7, 0),
+        timedelta(hours=1),
+    )
+    job = scheduler._scheduler.get_job(JOB_ID)
+
+    assert scheduler.trigger_garmin_fetch_summary_job() == TriggerResult.SCHEDULED
+    assert job.next_run_time == time_provider.now_value
+    assert scheduler._is_delivery_requested
+
+    # Job is about to run
+    time_provider.now_value += TRIGGER_DEDUPLICATION_WINDOW / 2
+    assert (
+        scheduler.trigger_garmin_fetch_summary_job() == TriggerResult.ALREADY_SCHEDULED
+    )
+
+    scheduler._is_fetch_running = True
+    assert scheduler.trigger_garmin_fetch_summary_job() == TriggerResult.ALREADY_RUNNING
+
+
+def test_stored_jobs_not_added_again_are_removed():
+    job_store = SqliteJobStore("account")
+    # Jobs stored by a previous run, which had a weekly summary configured
+    previous_scheduler = BackgroundScheduler(
+        timezone="UTC", jobstores={"default": job_store}
+    )
+    for job_id in (JOB_ID, "weekly_job"):
+        previous_scheduler.add_job(_run_weekly_summary_job, "cron", hour=7, id=job_id)
+    previous_scheduler.start(paused=True)
+    previous_scheduler.shutdown()
+
+    time_provider = _FakeTimeProvider(datetime(2023, 6, 1, 6, 0, tzinfo=timezone.utc))
+    scheduler = _create_scheduler(
+        _FakeGarminService(),
+        time_provider,
+        timedelta(minutes=30),
+        time(7, 0),
+        timedelta(hours=1),
+        job_store,
+    )
+    scheduler._remove_stale_jobs()
+
+    assert job_store.get_job_ids() == [JOB_ID]
@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from src.domain.common import DatePeriod
+from src.domain.metrics import SleepMetrics, SleepScoreMetrics
+from src.infra.garmin.dtos import GarminSleepResponse, GarminSleepScoreResponse
+from src.infra.plotting.sleep_analysis_plot import (
+    SleepPlotData,
+    SleepPlotTemplate,
+    template_key,
+    to_plot_data,
+)
+
+END_DATE = date(2023, 6, 4)
+
+
+# Same sleep every night, scaled by the given factor (1 -> 7 hours)
+def _create_plot_data(scale: float) -> SleepPlotData:
+    dates = DatePeriod.from_last_4_weeks(END_DATE).get_date_range()
+    stages = {
+        "deepSleepSeconds": int(3600 * scale),
+        "lightSleepSeconds": int(4 * 3600 * scale),
+        "REMSleepSeconds": int(2 * 3600 * scale),
+        "awakeSleepSeconds": int(600 * scale),
+    }
+    sleep = GarminSleepResponse.from_json(
+        [
+            {
+                "calendarDate": day.isoformat(),
+                "values": {
+                    **stages,
+                    "totalSleepSeconds": sum(stages.values())
+                    - stages["awakeSleepSeconds"],
+                },
+            }
+            for day in dates
+        ]
+    )
+    sleep_score = GarminSleepScoreResponse.from_json(
+        [{"calendarDate": day.isoformat(), "value": 80} for day in dates]
+    )
+    return to_plot_data(SleepMetrics(sleep), SleepScoreMetrics(sleep_score), 7)
+
+
+# X and y limits of each axes, once drawn
+def _get_limits(template: SleepPlotTemplate) -> list[float]:
+    FigureCanvasAgg(template.figure).draw()
+    return [
+        limit
+        for ax in template.figure.axes
+        for limit in (*ax.get_xlim(), *ax.get_ylim())
+    ]
+
+
+def test_reused_template_has_limits_of_fresh_render():
+    # Stacked bars of the long sleep start between the 8-hour target line and the top margin of the short sleep
+    long_sleep = _create_plot_data(scale=1.65)
+    short_sleep = _create_plot_data(scale=0.5)
+    assert template_key(long_sleep) == template_key(short_sleep)
+
+    template = SleepPlotTemplate(long_sleep)
+    _get_limits(template)
+    template.update(short_sleep)
+
+    assert _get_limits(template) == pytest.approx(
+        _get_limits(SleepPlotTemplate(short_sleep))
+    )
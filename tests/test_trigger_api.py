@@ -0,0 +1,116 @@
+from typing import Iterator, Optional
+
+import pytest
+import requests
+
+from src.application.scheduler_service import TriggerResult
+from src.presentation.trigger_api import TriggerApi
+
+TOKEN = "secret"
+
+
+class _FakeTrigger:
+    def __init__(self):
+        self.results = [TriggerResult.SCHEDULED]
+        self.num_calls = 0
+
+    def __call__(self) -> TriggerResult:
+        self.num_calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _start_api(trigger: _FakeTrigger, token: Optional[str] = None) -> TriggerApi:
+    # Any free port
+    api = TriggerApi(trigger, "127.0.0.1", 0, token)
+    api.start()
+    return api
+
+
+def _get_url(api: TriggerApi, path: str) -> str:
+    host, port = api._server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+@pytest.fixture
+def trigger() -> _FakeTrigger:
+    return _FakeTrigger()
+
+
+@pytest.fixture
+def api(trigger: _FakeTrigger) -> Iterator[TriggerApi]:
+    api = _start_api(trigger)
+    yield api
+    api.stop()
+
+
+def test_health(api: TriggerApi):
+    response = requests.get(_get_url(api, "/health"), timeout=5)
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_unknown_path_is_not_found(api: TriggerApi, trigger: _FakeTrigger):
+    assert requests.get(_get_url(api, "/trigger"), timeout=5).status_code == 404
+    assert requests.post(_get_url(api, "/health"), timeout=5).status_code == 404
+    assert trigger.num_calls == 0
+
+
+def test_trigger_runs_fetch_job(api: TriggerApi, trigger: _FakeTrigger):
+    response = requests.post(_get_url(api, "/trigger"), timeout=5)
+
+    assert response.status_code == 202
+    assert response.json() == {"result": "scheduled"}
+    assert trigger.num_calls == 1
+
+
+def test_deduplicated_trigger_is_ok(api: TriggerApi, trigger: _FakeTrigger):
+    trigger.results = [TriggerResult.ALREADY_RUNNING, TriggerResult.ALREADY_SCHEDULED]
+
+    responses = [requests.post(_get_url(api, "/trigger"), timeout=5) for _ in range(2)]
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert [response.json()["result"] for response in responses] == [
+        "already_running",
+        "already_scheduled",
+    ]
+
+
+def test_failed_trigger_is_server_error(api: TriggerApi, trigger: _FakeTrigger):
+    trigger.results = [RuntimeError("No fetch job added")]  # type: ignore
+
+    response = requests.post(_get_url(api, "/trigger"), timeout=5)
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "No fetch job added"}
+
+
+def test_trigger_requires_token(trigger: _FakeTrigger):
+    api = _start_api(trigger, TOKEN)
+    try:
+        url = _get_url(api, "/trigger")
+        assert requests.post(url, timeout=5).status_code == 401
+        assert (
+            requests.post(
+                url, headers={"Authorization": "Bearer wrong"}, timeout=5
+            ).status_code
+            == 401
+        )
+        assert trigger.num_calls == 0
+
+        response = requests.post(
+            url, headers={"Authorization": f"Bearer {TOKEN}"}, timeout=5
+        )
+        assert response.status_code == 202
+        assert trigger.num_calls == 1
+    finally:
+        api.stop()
+
+
+def test_stop_without_start(trigger: _FakeTrigger):
+    api = TriggerApi(trigger, "127.0.0.1", 0)
+
+    api.stop()
@@ -0,0 +1,20 @@
+from datetime import date
+
+from src.application.weekly_summary_service import WeeklySummaryService
+from src.domain.metrics import HealthSummary
+from src.infra.storage.delivery_ledger import DeliveryLedger, SummaryType
+
+
+# A prepared daily summary is still being delivered by the daily job, which creates the weekly summary when done
+def test_prepared_daily_summary_is_not_used_for_weekly_summary():
+    week_end = date(2023, 6, 4)
+    delivery_ledger = DeliveryLedger("account")
+    delivery_ledger.prepare(week_end, SummaryType.DAILY, HealthSummary(week_end, []))
+    weekly_summary_service = WeeklySummaryService(delivery_ledger)
+
+    assert weekly_summary_service.try_get_weekly_summary(week_end) is None
+    assert weekly_summary_service._retained_summary is None
+
+    delivery_ledger.complete(week_end, SummaryType.DAILY)
+    weekly_summary_service.try_get_weekly_summary(week_end)
+    assert weekly_summary_service._retained_summary == HealthSummary(week_end, [])